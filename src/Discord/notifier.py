@@ -1,14 +1,16 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
-import requests
-import yaml
-from utils.helpers import summarize_issues
+from utils.helpers import load_config
 from utils.logger import logger
-from utils.json_helper import load_json, save_json
+from utils.metrics import get_metrics
+from utils.state_store import get_state_store
+from Discord.outbox import MAX_DESCRIPTION_CHARS, MAX_FIELD_CHARS, MAX_TITLE_CHARS, Outbox, truncate
 import os
-from github.monitor import get_pull_request_issues
-import time
+from github.client import get_client
+from github.pipeline import Sink
+from github.repo_cache import get_repo_cache
+from github.scheduler import get_scheduler
 
 # Bot-Setup
 intents = discord.Intents.default()
@@ -17,44 +19,30 @@ intents.message_content = True  # Aktiviert den Zugriff auf Nachrichteninhalte
 bot = commands.Bot(command_prefix="!", intents=intents)
 tree = bot.tree  # Für App Commands (Slash-Befehle)
 
-# Konfiguration laden
-def load_config():
-    with open("config.yaml", "r") as file:
-        return yaml.safe_load(file)
-
-config = load_config()
-
-if "discord" not in config or "token" not in config["discord"]:
-    raise ValueError("Fehlende Discord-Konfiguration in config.yaml")
-
-discord_token = config["discord"]["token"]
-repositories = config["github"].get("repositories", [])  # <-- github statt discord!
-discord_channel_id = config["discord"]["channel_id"]
-headers = {"Authorization": f"token {config['github']['token']}"}
-
-# Templates aus der Config laden
-notifications = config.get("notifications", {})
-pr_template = notifications.get(
-    "message_template",
-    "A new pull request has been created: **{title}** by **{author}**. View it here: {url}"
-)
-issue_template = notifications.get(
-    "issue_template",
-    "Problems were found in pull request **{title}** by **{author}**:\n{issues}\n[View PR]({url})"
-)
-
-# JSON-Datei für gesendete Pull Requests
+# Standard-Templates (überschreibbar unter `notifications` in config.yaml)
+DEFAULT_PR_TEMPLATE = "A new pull request has been created: **{title}** by **{author}**. View it here: {url}"
+DEFAULT_ISSUE_TEMPLATE = "Problems were found in pull request **{title}** by **{author}**:\n{issues}\n[View PR]({url})"
+
+# Alte JSON-Dateien für gesendete Pull Requests und Issues (werden einmalig in den Zustandsspeicher übernommen)
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))  # Gehe drei Ebenen nach oben
 DATA_DIR = os.path.join(BASE_DIR, "data")
 SENT_PULL_REQUESTS_FILE = os.path.join(DATA_DIR, "sent_pull_requests.json")
 ISSUES_FILE = os.path.join(DATA_DIR, "sent_issues.json")
 
-# Sicherstellen, dass der Ordner 'data' existiert
-os.makedirs(DATA_DIR, exist_ok=True)
 
-# Lade bereits gesendete Pull Requests und Issues
-sent_pull_requests = load_json(SENT_PULL_REQUESTS_FILE)
-sent_issues = load_json(ISSUES_FILE)
+def load_discord_config():
+    """Liest und prüft den Abschnitt `discord` der Konfiguration (erst beim Start, nicht beim Import)."""
+    config = load_config()
+    if "discord" not in config or "token" not in config["discord"]:
+        raise ValueError("Fehlende Discord-Konfiguration in config.yaml")
+    return config["discord"]
+
+
+def migrate_legacy_state():
+    """Übernimmt vorhandene JSON-Dateien einmalig in den Zustandsspeicher (SQLite)."""
+    state_store = get_state_store()
+    state_store.migrate_json("pull_request", SENT_PULL_REQUESTS_FILE)
+    state_store.migrate_json("issue", ISSUES_FILE)
 
 @bot.event
 async def on_ready():
@@ -69,10 +57,6 @@ async def on_ready():
         # Synchronisiere die App Commands
         await tree.sync()
         logger.info("Slash-Befehle synchronisiert.")
-
-        # Starte die neue Überwachungs-Task
-        check_all_pull_requests_and_issues.start()
-        check_github_issues.start()
     except Exception as e:
         # Fehler beim Starten des Bots
         logger.error("Fehler beim Starten des Bots: %s", str(e))
@@ -86,136 +70,255 @@ async def status(interaction: discord.Interaction):
         description="Ich bin online und überwache deine Repositories!",
         color=discord.Color.green()
     )
+    budget = get_client().budget.snapshot()
+    if budget["remaining"] is not None:
+        embed.add_field(
+            name="API-Budget",
+            value=f"{budget['remaining']}/{budget['limit']} (Reset in {budget['reset_in']} s)",
+            inline=False,
+        )
+    intervals = get_scheduler().snapshot()
+    if intervals:
+        # Kürzeste Intervalle (aktivste Repositories) zuerst
+        lines = [
+            f"{repo}: alle {state['interval']} s (nächste in {state['next_in']} s)"
+            for repo, state in sorted(intervals.items(), key=lambda item: item[1]["interval"])[:10]
+        ]
+        embed.add_field(name="Abfrageintervalle", value="\n".join(lines), inline=False)
+    await interaction.response.send_message(embed=embed)
+
+def _format_labels(labels):
+    return ", ".join(value for _, value in labels)
+
+def _format_ms(seconds):
+    return "–" if seconds is None else f"{seconds * 1000:.0f} ms"
+
+# Überschriften der Zeitmessungen in /stats
+STATS_SECTIONS = {
+    "pipeline_stage": "Pipeline-Stufen",
+    "github_request": "GitHub-Anfragen",
+    "analysis_tool": "Analyse pro Tool",
+    "analysis_file": "Analyse pro Datei",
+    "sink": "Sinks",
+    "comment_write": "Kommentare schreiben",
+    "discord_send": "Discord senden",
+}
+
+@tree.command(name="stats", description="Zeigt Laufzeiten (p50/p95) pro Stufe und den letzten Zyklus an.")
+async def stats(interaction: discord.Interaction):
+    metrics = get_metrics()
+    timings = metrics.timings()
+    gauges = metrics.gauges()
+    embed = discord.Embed(title="Bot-Statistik", color=discord.Color.blurple())
+
+    cycle = timings.get(("cycle", ()))
+    embed.description = (
+        f"Letzter Zyklus: {_format_ms(cycle['last'])} (p50 {_format_ms(cycle['p50'])}, "
+        f"p95 {_format_ms(cycle['p95'])}, {cycle['count']} Zyklen)"
+        if cycle else "Noch kein Zyklus abgeschlossen."
+    )
+    for name, title in STATS_SECTIONS.items():
+        lines = [
+            f"{_format_labels(labels) or name}: {_format_ms(timing['p50'])} / {_format_ms(timing['p95'])} (n={timing['count']})"
+            for (metric, labels), timing in sorted(timings.items(), key=lambda item: -item[1]["count"])
+            if metric == name
+        ]
+        if lines:
+            embed.add_field(name=f"{title} (p50 / p95)", value=truncate("\n".join(lines), MAX_FIELD_CHARS), inline=False)
+
+    remaining = gauges.get(("github_rate_limit_remaining", ()))
+    limit = gauges.get(("github_rate_limit_limit", ()))
+    if remaining is not None:
+        embed.add_field(name="API-Budget", value=f"{remaining}/{limit}", inline=True)
+    depths = [
+        f"{_format_labels(labels)}: {value}"
+        for (name, labels), value in sorted(gauges.items())
+        if name == "pipeline_queue_depth"
+    ]
+    outbox_depth = gauges.get(("discord_outbox_depth", ()))
+    if outbox_depth is not None:
+        depths.append(f"discord_outbox: {outbox_depth}")
+    if depths:
+        embed.add_field(name="Queues", value="\n".join(depths), inline=True)
+    cache = get_client().cache
+    if cache is not None:
+        cache_stats = cache.stats()
+        embed.add_field(
+            name="HTTP-Cache",
+            value=(
+                f"{cache_stats['hit_rate']:.0%} Treffer ({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}), "
+                f"{cache_stats['entries']} Einträge"
+            ),
+            inline=True,
+        )
     await interaction.response.send_message(embed=embed)
 
 @tree.command(name="repo", description="Zeigt Informationen zu einem Repository an.")
 async def repo(interaction: discord.Interaction, repo_name: str):
     """Gibt Informationen zu einem Repository zurück."""
+    # Sofort bestätigen: Discord verlangt eine Antwort innerhalb von 3 Sekunden
+    await interaction.response.defer()
     # Falls kein "owner/" im Namen enthalten ist, füge den Standard-Owner hinzu
     if "/" not in repo_name:
         repo_name = f"the1andoni/{repo_name}"
 
-    url = f"https://api.github.com/repos/{repo_name}"
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        repo_data = response.json()
+    # Überwachte Repositories stehen meist schon im Cache (aus den Abfragen der Pipeline)
+    try:
+        repo_data = await get_repo_cache().fetch(get_client(), repo_name)
+    except Exception as e:
+        # Nach defer() muss jede Antwort über den Followup kommen, sonst bleibt "denkt nach…" stehen
+        logger.error("Fehler beim Abrufen von %s: %s", repo_name, str(e))
+        embed = discord.Embed(
+            title="Fehler",
+            description=f"Repository {repo_name} konnte nicht abgerufen werden. Bitte später erneut versuchen.",
+            color=discord.Color.red()
+        )
+        await interaction.followup.send(embed=embed)
+        return
+    if repo_data is not None:
         embed = discord.Embed(
             title=f"Repository: {repo_data['full_name']}",
-            description=repo_data.get('description', 'Keine Beschreibung'),
+            description=repo_data.get('description') or 'Keine Beschreibung',
             color=discord.Color.blue()
         )
         embed.add_field(name="Stars", value=repo_data['stargazers_count'], inline=True)
         embed.add_field(name="Forks", value=repo_data['forks_count'], inline=True)
         embed.add_field(name="Offene Issues", value=repo_data['open_issues_count'], inline=True)
         embed.set_thumbnail(url=repo_data['owner']['avatar_url'])  # Profilbild des Owners
-        await interaction.response.send_message(embed=embed)
+        await interaction.followup.send(embed=embed)
     else:
         embed = discord.Embed(
             title="Fehler",
             description=f"Repository {repo_name} konnte nicht gefunden werden.",
             color=discord.Color.red()
         )
-        await interaction.response.send_message(embed=embed)
+        await interaction.followup.send(embed=embed)
 
-@tasks.loop(minutes=5)
-async def check_all_pull_requests_and_issues():
-    try:
-        channel = bot.get_channel(int(discord_channel_id))
-        if not channel:
-            raise ValueError(f"Ungültige Discord-Kanal-ID: {discord_channel_id}")
-
-        pr_issues = get_pull_request_issues()
-        for repo, pull, issues_summary in pr_issues:
-            pr_id = str(pull["id"])
-            is_new = pr_id not in sent_pull_requests
-            has_issues = issues_summary.strip() and issues_summary.strip() != "Keine Probleme gefunden."
-
-            # Nur neue PRs oder neue Issues melden
-            if is_new or has_issues:
-                if has_issues:
-                    # Issue-Template verwenden
-                    msg = issue_template.format(
-                        title=pull["title"],
-                        author=pull["user"]["login"],
-                        issues=issues_summary,
-                        url=pull["html_url"]
-                    )
-                    embed = discord.Embed(
-                        title=f"Issues in Pull Request: {pull['title']}",
-                        description=f"Autor: {pull['user']['login']}\n[Zum Pull Request]({pull['html_url']})",
-                        color=discord.Color.red()
-                    )
-                    embed.add_field(name="Prüfungsergebnisse", value=issues_summary or "Keine Probleme gefunden.")
-                else:
-                    # PR-Template verwenden
-                    msg = pr_template.format(
-                        title=pull["title"],
-                        author=pull["user"]["login"],
-                        url=pull["html_url"]
-                    )
-                    embed = discord.Embed(
-                        title=f"Neuer Pull Request: {pull['title']}",
-                        description=f"Autor: {pull['user']['login']}\n[Zum Pull Request]({pull['html_url']})",
-                        color=discord.Color.green()
-                    )
-                    embed.add_field(name="Prüfungsergebnisse", value=issues_summary or "Keine Probleme gefunden.")
-
-                await channel.send(content=msg, embed=embed)
-
-                logger.info(
-                    "Pull Request geprüft: %s von %s",
-                    pull["title"],
-                    pull["user"]["login"],
-                )
-                sent_pull_requests[pr_id] = {
-                    "title": pull["title"],
-                    "author": pull["user"]["login"],
-                    "url": pull["html_url"],
-                }
-                save_json(SENT_PULL_REQUESTS_FILE, sent_pull_requests)
-    except Exception as e:
-        logger.error("Fehler beim Überprüfen der Pull Requests: %s", str(e))
-        activity = discord.Game("Fehler: Überprüfung fehlgeschlagen")
-        await bot.change_presence(status=discord.Status.dnd, activity=activity)
+@repo.autocomplete("repo_name")
+async def repo_autocomplete(interaction: discord.Interaction, current: str):
+    """Schlägt konfigurierte und bereits zwischengespeicherte Repositories vor (ohne API-Aufruf)."""
+    names = list(dict.fromkeys(load_config().get("github", {}).get("repositories", []) + get_repo_cache().names()))
+    current = current.lower()
+    return [
+        app_commands.Choice(name=name, value=name)
+        for name in names if current in name.lower()
+    ][:25]
 
-@tasks.loop(minutes=5)
-async def check_github_issues():
-    try:
-        channel = bot.get_channel(int(discord_channel_id))
-        if not channel:
-            raise ValueError(f"Ungültige Discord-Kanal-ID: {discord_channel_id}")
-
-        for repo in repositories:
-            url = f"https://api.github.com/repos/{repo}/issues"
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                issues = response.json()
-                for issue in issues:
-                    # Pull Requests sind auch Issues, aber haben einen 'pull_request'-Key
-                    if "pull_request" in issue:
-                        continue
-                    issue_id = str(issue["id"])
-                    if issue_id not in sent_issues:
-                        embed = discord.Embed(
-                            title=f"New Issue: {issue['title']}",
-                            description=issue.get("body", "No description"),
-                            color=discord.Color.orange(),
-                            url=issue["html_url"]
-                        )
-                        embed.add_field(name="Author", value=issue["user"]["login"])
-                        embed.add_field(name="Repository", value=repo)
-                        await channel.send(embed=embed)
-                        sent_issues[issue_id] = {
-                            "title": issue["title"],
-                            "author": issue["user"]["login"],
-                            "url": issue["html_url"],
-                            "created_at": issue["created_at"]
-                        }
-                        save_json(ISSUES_FILE, sent_issues)
+class DiscordSink(Sink):
+    """
+    Meldet neue Pull Requests, gefundene Probleme und neue Issues im Discord-Channel.
+    Die Meldungen gehen nicht direkt an Discord, sondern in die Outbox, die sie gebündelt
+    und gedrosselt in einem eigenen Task sendet.
+    """
+
+    name = "discord"
+
+    def __init__(self, outbox=None):
+        discord_config = load_discord_config()
+        notifications = load_config().get("notifications", {})
+        self.channel_id = discord_config["channel_id"]
+        self.pr_template = notifications.get("message_template", DEFAULT_PR_TEMPLATE)
+        self.issue_template = notifications.get("issue_template", DEFAULT_ISSUE_TEMPLATE)
+        # Bereits gesendete Pull Requests und Issues liegen im Zustandsspeicher (SQLite)
+        migrate_legacy_state()
+        self.store = get_state_store()
+        outbox_config = discord_config.get("outbox", {})
+        self.outbox = outbox or Outbox(
+            bot,
+            self.store,
+            window=outbox_config.get("window", 5),
+            rate=outbox_config.get("rate", 5),
+            per=outbox_config.get("per", 5),
+            retry_interval=outbox_config.get("retry_interval", 60),
+        )
+
+    async def on_pull_request(self, result):
+        pull = result.pull
+        issues_summary = result.issues_summary
+        pr_id = str(pull["id"])
+        is_new = not self.store.contains("pull_request", pr_id)
+        if not result.changed and not is_new:
+            # Ergebnis unverändert seit dem letzten Zyklus (304 bzw. gleicher Head-Commit): bereits gemeldet
+            return
+        has_issues = issues_summary.strip() and issues_summary.strip() != "Keine Probleme gefunden."
+
+        # Nur neue PRs oder neue Issues melden
+        if not (is_new or has_issues):
+            return
+        try:
+            if has_issues:
+                # Issue-Template verwenden
+                msg = self.issue_template.format(
+                    title=pull["title"],
+                    author=pull["user"]["login"],
+                    issues=issues_summary,
+                    url=pull["html_url"]
+                )
+                embed = discord.Embed(
+                    title=truncate(f"Issues in Pull Request: {pull['title']}", MAX_TITLE_CHARS),
+                    description=f"Autor: {pull['user']['login']}\n[Zum Pull Request]({pull['html_url']})",
+                    color=discord.Color.red()
+                )
+                embed.add_field(name="Prüfungsergebnisse", value=truncate(issues_summary or "Keine Probleme gefunden.", MAX_FIELD_CHARS))
             else:
-                logger.error(f"Fehler beim Abrufen der Issues von {repo}: {response.status_code}")
-    except Exception as e:
-        logger.error("Fehler beim Überprüfen der Issues: %s", str(e))
+                # PR-Template verwenden
+                msg = self.pr_template.format(
+                    title=pull["title"],
+                    author=pull["user"]["login"],
+                    url=pull["html_url"]
+                )
+                embed = discord.Embed(
+                    title=truncate(f"Neuer Pull Request: {pull['title']}", MAX_TITLE_CHARS),
+                    description=f"Autor: {pull['user']['login']}\n[Zum Pull Request]({pull['html_url']})",
+                    color=discord.Color.green()
+                )
+                embed.add_field(name="Prüfungsergebnisse", value=truncate(issues_summary or "Keine Probleme gefunden.", MAX_FIELD_CHARS))
+
+            self.outbox.enqueue(self.channel_id, result.repo, content=msg, embed=embed)
+
+            logger.info(
+                "Pull Request geprüft: %s von %s",
+                pull["title"],
+                pull["user"]["login"],
+            )
+            self.store.add("pull_request", pr_id, {
+                "title": pull["title"],
+                "author": pull["user"]["login"],
+                "url": pull["html_url"],
+            })
+        except Exception as e:
+            logger.error("Fehler beim Überprüfen der Pull Requests: %s", str(e))
+            activity = discord.Game("Fehler: Überprüfung fehlgeschlagen")
+            await bot.change_presence(status=discord.Status.dnd, activity=activity)
+
+    async def on_issue(self, repo, issue):
+        issue_id = str(issue["id"])
+        if self.store.contains("issue", issue_id):
+            return
+        embed = discord.Embed(
+            title=truncate(f"New Issue: {issue['title']}", MAX_TITLE_CHARS),
+            description=truncate(issue.get("body") or "No description", MAX_DESCRIPTION_CHARS),
+            color=discord.Color.orange(),
+            url=issue["html_url"]
+        )
+        embed.add_field(name="Author", value=issue["user"]["login"])
+        embed.add_field(name="Repository", value=repo)
+        self.outbox.enqueue(self.channel_id, repo, embed=embed)
+        self.store.add("issue", issue_id, {
+            "title": issue["title"],
+            "author": issue["user"]["login"],
+            "url": issue["html_url"],
+            "created_at": issue["created_at"]
+        })
+
+    async def on_cycle_end(self):
+        # Alle Meldungen dieses Zyklus in einer Transaktion speichern, dann die Outbox wecken
+        self.store.commit()
+        self.outbox.notify()
+
+def run():
+    """Startet nur den Discord-Bot (ohne GitHub-Überwachung)."""
+    bot.run(load_discord_config()["token"])
 
-# Startet den Bot
-bot.run(config["discord"]["token"])
+if __name__ == "__main__":
+    run()
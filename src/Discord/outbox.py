@@ -0,0 +1,183 @@
+import asyncio
+import time
+from collections import deque
+import discord
+from utils.logger import logger
+from utils.metrics import get_metrics
+
+# Grenzen einer Discord-Nachricht
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+MAX_CONTENT_CHARS = 2000
+MAX_TITLE_CHARS = 256
+MAX_DESCRIPTION_CHARS = 4096
+MAX_FIELD_CHARS = 1024
+
+
+def truncate(text, limit):
+    """Kürzt einen Text auf die von Discord erlaubte Länge."""
+    if text is None or len(text) <= limit:
+        return text
+    return text[:limit - 1] + "…"
+
+
+def embed_size(embed):
+    """Zeichenzahl eines Embeds (als dict), wie sie Discord gegen das 6000-Zeichen-Limit zählt."""
+    size = len(embed.get("title", "")) + len(embed.get("description", "") or "")
+    size += len(embed.get("footer", {}).get("text", "")) + len(embed.get("author", {}).get("name", ""))
+    for field in embed.get("fields", []):
+        size += len(field.get("name", "")) + len(field.get("value", ""))
+    return size
+
+
+def is_permanent(error):
+    """True, wenn Discord die Nachricht selbst ablehnt (4xx außer 429); ein erneuter Versuch hilft nicht."""
+    return 400 <= error.status < 500 and error.status != 429
+
+
+class ChannelRateLimiter:
+    """Erlaubt höchstens `rate` Nachrichten pro `per` Sekunden und Channel (gleitendes Fenster)."""
+
+    def __init__(self, rate=5, per=5.0):
+        self.rate = rate
+        self.per = per
+        self._sent = {}
+
+    async def acquire(self, channel_id):
+        sent = self._sent.setdefault(channel_id, deque())
+        while True:
+            now = time.monotonic()
+            while sent and sent[0] <= now - self.per:
+                sent.popleft()
+            if len(sent) < self.rate:
+                sent.append(now)
+                return
+            await asyncio.sleep(sent[0] + self.per - now)
+
+
+class Outbox:
+    """
+    Ausgehende Discord-Nachrichten, entkoppelt von der Pipeline.
+    Sinks reihen Meldungen im Zustandsspeicher ein; ein eigener Task sammelt sie `window`
+    Sekunden lang, fasst sie pro Channel und Repository zu Nachrichten mit bis zu 10 Embeds
+    zusammen und sendet sie unter Einhaltung des Rate-Limits pro Channel. Eine Nachricht wird
+    erst nach erfolgreicher Zustellung aus dem Speicher entfernt; lehnt Discord sie dauerhaft ab
+    (4xx außer 429), wird sie protokolliert und verworfen, statt die Gruppe zu blockieren.
+    """
+
+    def __init__(self, bot, store, window=5, rate=5, per=5.0, retry_interval=60):
+        self.bot = bot
+        self.store = store
+        self.window = window
+        self.retry_interval = retry_interval
+        self._limiter = ChannelRateLimiter(rate, per)
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.sent = 0
+        self.metrics = get_metrics()
+        self.metrics.register_gauge("discord_outbox_depth", store.count_queued_messages)
+
+    def start(self):
+        if self._task is None:
+            # Nach einem Neustart liegengebliebene Nachrichten sofort zustellen
+            self._wakeup.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def enqueue(self, channel_id, repo, content=None, embed=None):
+        """Reiht eine Meldung ein; gespeichert wird sie mit dem nächsten `commit()` des Zustandsspeichers."""
+        self.store.enqueue_message(channel_id, repo, {
+            "content": content,
+            "embed": embed.to_dict() if embed is not None else None,
+        })
+
+    def notify(self):
+        """Weckt den Sende-Task, nachdem neue Meldungen gespeichert wurden."""
+        self._wakeup.set()
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.retry_interval)
+            except asyncio.TimeoutError:
+                pass
+            # Kurz warten, damit gleichzeitig eintreffende Meldungen zusammengefasst werden
+            await asyncio.sleep(self.window)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Fehler beim Senden der Discord-Nachrichten: %s", str(e))
+
+    @staticmethod
+    def _batches(items):
+        """Teilt die Meldungen einer Gruppe in Nachrichten mit höchstens 10 Embeds / 6000 Zeichen."""
+        batch, size = [], 0
+        for item in items:
+            payload = item[3]
+            item_size = embed_size(payload["embed"]) if payload.get("embed") else 0
+            if batch and (len(batch) >= MAX_EMBEDS or size + item_size > MAX_EMBED_CHARS):
+                yield batch
+                batch, size = [], 0
+            batch.append(item)
+            size += item_size
+        if batch:
+            yield batch
+
+    async def flush(self):
+        """Sendet alle gespeicherten Meldungen, gruppiert nach Channel und Repository."""
+        groups = {}
+        for item in self.store.queued_messages():
+            groups.setdefault((item[1], item[2]), []).append(item)
+        for (channel_id, repo), items in groups.items():
+            for batch in self._batches(items):
+                if not await self._send(channel_id, repo, batch):
+                    # Rest dieser Gruppe beim nächsten Durchlauf, damit die Reihenfolge erhalten bleibt
+                    break
+
+    async def _send(self, channel_id, repo, batch):
+        channel = self.bot.get_channel(int(channel_id))
+        if channel is None:
+            logger.error("Ungültige Discord-Kanal-ID: %s", channel_id)
+            return False
+
+        contents = [item[3]["content"] for item in batch if item[3].get("content")]
+        content = "\n".join(contents)
+        if len(content) > MAX_CONTENT_CHARS:
+            content = f"{len(batch)} neue Meldungen für **{repo}**"
+        embeds = [discord.Embed.from_dict(item[3]["embed"]) for item in batch if item[3].get("embed")]
+
+        await self._limiter.acquire(channel_id)
+        try:
+            # 429-Antworten wartet discord.py pro Route selbst ab
+            with self.metrics.span("discord_send"):
+                await channel.send(content=content or None, embeds=embeds)
+        except discord.HTTPException as e:
+            logger.error("Discord-Nachricht für %s konnte nicht gesendet werden: %s", repo, str(e))
+            self.metrics.inc("discord_errors")
+            if not is_permanent(e):
+                return False
+            if len(batch) > 1:
+                # Einzeln senden, damit nur die fehlerhafte Meldung verworfen wird
+                for item in batch:
+                    await self._send(channel_id, repo, [item])
+                return True
+            logger.error("Meldung für %s wird verworfen: %s", repo, batch[0][3])
+            self.store.remove_messages([batch[0][0]])
+            self.metrics.inc("discord_dropped")
+            return True
+        self.store.remove_messages([item[0] for item in batch])
+        self.sent += len(batch)
+        self.metrics.inc("discord_messages")
+        self.metrics.inc("discord_notifications", len(batch))
+        logger.info("Discord: %d Meldungen für %s in einer Nachricht gesendet", len(batch), repo)
+        return True
@@ -0,0 +1,215 @@
+"""
+End-to-End-Benchmark eines Prüfzyklus gegen eine lokale Fake-GitHub-API und einen Fake-Discord.
+
+    cd src && python -m benchmarks.cycle --repos 5 --pulls 20 --files 5 --cycles 3 --churn 0.1
+
+Pro Zyklus werden Latenz, API-Aufrufe (davon 304), geschriebene Kommentare, Discord-Nachrichten,
+CPU-Zeit der Analyse-Prozesse und der Speicherbedarf ausgegeben. Zustand, Caches und Konfiguration
+liegen in einem temporären Ordner; die echten Daten unter `data/` bleiben unberührt.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import tempfile
+import time
+import yaml
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.fake_github import FakeGitHub
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def write_config(path, fake, args):
+    """Übernimmt src/config.yaml und ersetzt GitHub, Discord und Pipeline durch Benchmark-Werte."""
+    with open(os.path.join(SRC_DIR, "config.yaml")) as file:
+        config = yaml.safe_load(file)
+    config["github"].update({
+        "token": "benchmark",
+        "repositories": fake.repositories,
+        "api_url": fake.url,
+        "fetch_backend": "rest",
+        "http_cache": True,
+        "mirror": {"enabled": False},
+    })
+    config["discord"] = {"token": "benchmark", "channel_id": "1", "outbox": {"window": 0}}
+    config["webhook"] = {"enabled": False}
+    monitoring = config.setdefault("monitoring", {})
+    monitoring["workers"] = args.workers
+    with open(path, "w") as file:
+        yaml.safe_dump(config, file)
+
+
+def process_stats(pid):
+    """CPU-Zeit (s) und Spitzen-RSS (KB) eines Prozesses aus /proc (nur Linux, sonst None)."""
+    try:
+        with open(f"/proc/{pid}/stat") as file:
+            fields = file.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as file:
+            peak = next((int(line.split()[1]) for line in file if line.startswith("VmHWM:")), 0)
+    except OSError:
+        return None
+    # Felder 14/15 (utime/stime) stehen nach dem Kommandonamen an Position 11/12
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS, peak
+
+
+class WorkerMeter:
+    """Misst die CPU-Zeit und den Spitzen-Speicher der Analyse-Prozesse über mehrere Zyklen."""
+
+    def __init__(self, pool_getter):
+        self.pool_getter = pool_getter
+        self._cpu = {}
+        self.peak_rss_kb = 0
+
+    def sample(self):
+        """Gibt die seit dem letzten Aufruf verbrauchte CPU-Zeit aller Worker zurück."""
+        used = 0.0
+        for pid in self.pool_getter().worker_pids():
+            stats = process_stats(pid)
+            if stats is None:
+                continue
+            cpu, peak = stats
+            used += cpu - self._cpu.get(pid, 0.0)
+            self._cpu[pid] = cpu
+            self.peak_rss_kb = max(self.peak_rss_kb, peak)
+        return used
+
+
+async def run_benchmark(args):
+    work_dir = tempfile.mkdtemp(prefix="codeguardian-bench-")
+    fake = FakeGitHub(
+        os.path.join(work_dir, "files"),
+        repos=args.repos,
+        pulls=args.pulls,
+        files=args.files,
+        issues=args.issues,
+        latency=args.latency_ms / 1000,
+        rate_limit=args.rate_limit,
+    )
+    await fake.start()
+    config_path = os.path.join(work_dir, "config.yaml")
+    write_config(config_path, fake, args)
+    # Vor dem ersten Import der Bot-Module setzen; die Analyse-Prozesse erben die Variablen
+    os.environ["CODEGUARDIAN_CONFIG"] = config_path
+    os.environ["CODEGUARDIAN_DATA_DIR"] = os.path.join(work_dir, "data")
+
+    from github.client import close_client, get_client
+    from github.monitor import CommentSink, monitor_repositories
+    from github.pipeline import create_pipeline
+    from Discord.notifier import DiscordSink
+    from Discord.outbox import Outbox
+    from utils.metrics import get_metrics
+    from utils.state_store import get_state_store
+    from utils.worker_pool import get_analysis_pool, shutdown_analysis_pool
+
+    client = get_client()
+    discord = FakeDiscord(latency=args.discord_latency_ms / 1000)
+    outbox = Outbox(discord, get_state_store(), window=0, rate=args.discord_rate, per=args.discord_per)
+    pipeline = create_pipeline(client, [CommentSink(client), DiscordSink(outbox=outbox)])
+    meter = WorkerMeter(get_analysis_pool)
+
+    rows = []
+    try:
+        for cycle in range(1, args.cycles + 1):
+            changed = fake.churn(args.churn) if cycle > 1 else None
+            fake.reset_counters()
+            comments_before = len(fake.comments)
+            messages_before = discord.messages
+
+            start = time.perf_counter()
+            if args.mode == "monitor":
+                await monitor_repositories()
+            else:
+                await pipeline.run_cycle(fake.repositories)
+            duration = time.perf_counter() - start
+            # Die Outbox sendet im Bot unabhängig vom Zyklus; ihre Dauer wird getrennt gemessen
+            start = time.perf_counter()
+            await outbox.flush()
+            discord_duration = time.perf_counter() - start
+
+            rows.append({
+                "cycle": cycle,
+                "changed_pulls": changed,
+                "latency_s": round(duration, 3),
+                "discord_s": round(discord_duration, 3),
+                "api_calls": sum(fake.calls.values()),
+                "not_modified": fake.not_modified,
+                "calls": dict(fake.calls),
+                "new_comments": len(fake.comments) - comments_before,
+                "discord_messages": discord.messages - messages_before,
+                "analyzer_cpu_s": round(meter.sample(), 3),
+                "rate_limit_remaining": fake.remaining,
+            })
+    finally:
+        await pipeline.stop()
+        await close_client()
+        shutdown_analysis_pool()
+        await fake.stop()
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "parameters": {
+            key: getattr(args, key)
+            for key in ("mode", "repos", "pulls", "files", "issues", "latency_ms", "churn", "workers")
+        },
+        "cycles": rows,
+        # p50/p95 pro Stufe über alle Zyklen (dieselben Werte wie /stats und /metrics)
+        "stages": {
+            " ".join([name, *(value for _, value in labels)]): timing
+            for (name, labels), timing in sorted(get_metrics().timings().items())
+        },
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "worker_peak_rss_kb": meter.peak_rss_kb,
+    }
+
+
+def print_report(report):
+    print("Parameter:", ", ".join(f"{key}={value}" for key, value in report["parameters"].items()))
+    header = f"{'Zyklus':>6} {'Latenz':>9} {'Discord-Zeit':>12} {'API':>6} {'304':>6} {'Komm.':>6} {'Discord':>8} {'Analyse-CPU':>12} {'Budget':>7}"
+    print(header)
+    for row in report["cycles"]:
+        print(
+            f"{row['cycle']:>6} {row['latency_s']:>8.2f}s {row['discord_s']:>11.2f}s {row['api_calls']:>6} {row['not_modified']:>6} "
+            f"{row['new_comments']:>6} {row['discord_messages']:>8} {row['analyzer_cpu_s']:>11.2f}s "
+            f"{row['rate_limit_remaining']:>7}"
+        )
+    print("\nStufen (p50 / p95 in ms):")
+    for stage, timing in report["stages"].items():
+        print(f"  {timing['p50'] * 1000:8.1f} {timing['p95'] * 1000:8.1f}  {stage} (n={timing['count']})")
+    print(f"Spitzen-RSS: Bot {report['peak_rss_kb'] / 1024:.0f} MB, "
+          f"Analyse-Worker {report['worker_peak_rss_kb'] / 1024:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zyklus-Benchmark für CodeGuardian")
+    parser.add_argument("--mode", choices=("full", "monitor"), default="full",
+                        help="full: Pipeline mit Kommentar- und Discord-Sink wie bot.py; monitor: monitor_repositories()")
+    parser.add_argument("--repos", type=int, default=5)
+    parser.add_argument("--pulls", type=int, default=20, help="Offene Pull Requests pro Repository")
+    parser.add_argument("--files", type=int, default=5, help="Geänderte Dateien pro Pull Request")
+    parser.add_argument("--issues", type=int, default=5, help="Offene Issues pro Repository")
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--churn", type=float, default=0.1, help="Anteil der Pull Requests mit neuem Commit pro Zyklus")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Künstliche Latenz pro GitHub-Anfrage")
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    parser.add_argument("--discord-latency-ms", type=float, default=50)
+    parser.add_argument("--discord-rate", type=int, default=5)
+    parser.add_argument("--discord-per", type=float, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--json", help="Bericht zusätzlich als JSON in diese Datei schreiben")
+    parser.add_argument("--keep", action="store_true", help="Temporären Ordner nicht löschen")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
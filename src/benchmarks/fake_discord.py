@@ -0,0 +1,39 @@
+import asyncio
+
+
+class FakeChannel:
+    """Nimmt Nachrichten entgegen wie ein Discord-Channel und zählt sie (mit optionaler Latenz)."""
+
+    def __init__(self, channel_id, latency=0.0):
+        self.id = channel_id
+        self.latency = latency
+        self.messages = 0
+        self.embeds = 0
+
+    async def send(self, content=None, embed=None, embeds=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.messages += 1
+        self.embeds += len(embeds or []) + (1 if embed is not None else 0)
+
+
+class FakeDiscord:
+    """Ersatz für den Discord-Bot, soweit die Outbox ihn benötigt (`get_channel`, `wait_until_ready`)."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.channels = {}
+
+    def get_channel(self, channel_id):
+        return self.channels.setdefault(channel_id, FakeChannel(channel_id, self.latency))
+
+    async def wait_until_ready(self):
+        pass
+
+    @property
+    def messages(self):
+        return sum(channel.messages for channel in self.channels.values())
+
+    @property
+    def embeds(self):
+        return sum(channel.embeds for channel in self.channels.values())
@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from aiohttp import web
+
+# Beispielcode für die Dateien der simulierten Pull Requests: einige flake8-Funde und ein bandit-Fund
+SAMPLE_CODE = '''import os, sys
+def handler_{index}(value):
+    unused = "{repo}#{number}@{version}"
+    result = eval(value)
+    if result == None:
+        return os.path.join("a","b")
+    return result
+'''
+
+
+def _etag(payload):
+    return '"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest() + '"'
+
+
+def _stable_id(*parts):
+    return int(hashlib.sha1(repr(parts).encode()).hexdigest()[:8], 16)
+
+
+def _timestamp(seconds):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
+
+
+class FakeGitHub:
+    """
+    Lokaler Ersatz für die GitHub-REST-API mit einstellbarer Anzahl an Repositories, Pull Requests,
+    Dateien und Issues. Unterstützt ETags (304), `Link`-Paginierung, Rate-Limit-Header und eine
+    künstliche Latenz pro Anfrage. Die Dateien der Pull Requests werden unter `files_dir` angelegt;
+    ihre Dateinamen sind absolute Pfade, damit die Analyse sie ohne Mirror lesen kann.
+    """
+
+    def __init__(self, files_dir, repos=5, pulls=10, files=5, issues=5, latency=0.0,
+                 rate_limit=5000, reset_interval=3600, host="127.0.0.1", port=0):
+        self.files_dir = files_dir
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.reset_interval = reset_interval
+        self.remaining = rate_limit
+        self.reset_at = time.time() + reset_interval
+        self.host = host
+        self.port = port
+        self.calls = Counter()
+        self.not_modified = 0
+        self.comments = {}
+        self._runner = None
+        self._clock = time.time() - 86400
+        self.repositories = [f"bench/repo{index}" for index in range(repos)]
+        self._pulls = {repo: {} for repo in self.repositories}
+        self._issues = {repo: [] for repo in self.repositories}
+        for repo in self.repositories:
+            for number in range(1, pulls + 1):
+                self._pulls[repo][number] = {"version": 0, "files": files, "updated": self._tick()}
+            for number in range(pulls + 1, pulls + issues + 1):
+                self._issues[repo].append({"number": number, "updated": self._tick()})
+        for repo in self.repositories:
+            for number in self._pulls[repo]:
+                self._write_files(repo, number)
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def _file_path(self, repo, number, index):
+        return os.path.join(self.files_dir, repo.replace("/", "_"), f"pr{number}", f"module{index}.py")
+
+    def _write_files(self, repo, number):
+        pull = self._pulls[repo][number]
+        for index in range(pull["files"]):
+            path = self._file_path(repo, number, index)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as file:
+                file.write(SAMPLE_CODE.format(index=index, repo=repo, number=number, version=pull["version"]))
+
+    def churn(self, fraction):
+        """Simuliert einen neuen Commit in `fraction` der Pull Requests jedes Repositories."""
+        changed = 0
+        for repo in self.repositories:
+            numbers = sorted(self._pulls[repo])
+            for number in numbers[:round(len(numbers) * fraction)]:
+                pull = self._pulls[repo][number]
+                pull["version"] += 1
+                pull["updated"] = self._tick()
+                self._write_files(repo, number)
+                changed += 1
+        return changed
+
+    def reset_counters(self):
+        self.calls.clear()
+        self.not_modified = 0
+
+    # REST-Darstellung
+
+    def _pull_json(self, repo, number):
+        pull = self._pulls[repo][number]
+        head_sha = hashlib.sha1(f"{repo}#{number}@{pull['version']}".encode()).hexdigest()
+        return {
+            "id": _stable_id(repo, number),
+            "number": number,
+            "title": f"Änderung {number}",
+            "state": "open",
+            "draft": False,
+            "html_url": f"https://github.com/{repo}/pull/{number}",
+            "updated_at": _timestamp(pull["updated"]),
+            "user": {"login": "bench"},
+            "head": {"sha": head_sha},
+            "base": {"sha": "0" * 40, "repo": {"full_name": repo}},
+            "_links": {"self": {"href": f"{self.url}/repos/{repo}/pulls/{number}"}},
+        }
+
+    def _file_json(self, repo, number, index):
+        path = self._file_path(repo, number, index)
+        with open(path, "rb") as file:
+            content = file.read()
+        lines = content.decode().splitlines()
+        return {
+            "filename": path,
+            "sha": hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest(),
+            "status": "modified",
+            "additions": len(lines),
+            "deletions": 0,
+            "patch": f"@@ -0,0 +1,{len(lines)} @@\n" + "\n".join("+" + line for line in lines),
+        }
+
+    def _issue_json(self, repo, issue):
+        return {
+            "id": _stable_id(repo, issue["number"]),
+            "number": issue["number"],
+            "title": f"Issue {issue['number']}",
+            "body": "Simuliertes Issue",
+            "html_url": f"https://github.com/{repo}/issues/{issue['number']}",
+            "created_at": _timestamp(issue["updated"]),
+            "updated_at": _timestamp(issue["updated"]),
+            "user": {"login": "bench"},
+        }
+
+    # HTTP
+
+    def _list_response(self, request, items):
+        """Antwortet mit einer Seite von `items` inkl. `Link`-Header und ETag (304 bei Übereinstimmung)."""
+        per_page = int(request.query.get("per_page", 30))
+        page = int(request.query.get("page", 1))
+        chunk = items[(page - 1) * per_page:page * per_page]
+        headers = {"ETag": _etag(chunk)}
+        if page * per_page < len(items):
+            query = dict(request.query, page=str(page + 1))
+            headers["Link"] = f'<{request.url.with_query(query)}>; rel="next"'
+        if request.headers.get("If-None-Match") == headers["ETag"]:
+            self.not_modified += 1
+            return web.Response(status=304, headers=headers)
+        return web.json_response(chunk, headers=headers)
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response = await handler(request)
+        self.calls[f"{request.method} {request.match_info.route.resource.canonical}"] += 1
+        if time.time() >= self.reset_at:
+            self.remaining = self.rate_limit
+            self.reset_at = time.time() + self.reset_interval
+        # Bedingte Anfragen mit 304 zählen bei GitHub nicht gegen das Rate-Limit
+        if response.status != 304:
+            self.remaining = max(0, self.remaining - 1)
+        response.headers["X-RateLimit-Limit"] = str(self.rate_limit)
+        response.headers["X-RateLimit-Remaining"] = str(self.remaining)
+        response.headers["X-RateLimit-Reset"] = str(int(self.reset_at))
+        return response
+
+    async def _pulls_handler(self, request):
+        repo = f"{request.match_info['owner']}/{request.match_info['name']}"
+        pulls = sorted(
+            (self._pull_json(repo, number) for number in self._pulls.get(repo, {})),
+            key=lambda pull: pull["updated_at"],
+            reverse=True,
+        )
+        return self._list_response(request, pulls)
+
+    async def _files_handler(self, request):
+        repo = f"{request.match_info['owner']}/{request.match_info['name']}"
+        number = int(request.match_info["number"])
+        pull = self._pulls[repo][number]
+        return self._list_response(request, [self._file_json(repo, number, index) for index in range(pull["files"])])
+
+    async def _issues_handler(self, request):
+        repo = f"{request.match_info['owner']}/{request.match_info['name']}"
+        issues = [self._issue_json(repo, issue) for issue in self._issues.get(repo, [])]
+        since = request.query.get("since")
+        if since:
+            issues = [issue for issue in issues if issue["updated_at"] >= since]
+        return self._list_response(request, issues)
+
+    async def _comments_handler(self, request):
+        key = (request.match_info["owner"], request.match_info["name"], request.match_info["number"])
+        if request.method == "POST":
+            comment = {"id": len(self.comments) + 1, "body": (await request.json())["body"], "key": key}
+            self.comments[comment["id"]] = comment
+            return web.json_response(comment, status=201)
+        return self._list_response(request, [c for c in self.comments.values() if c["key"] == key])
+
+    async def _comment_handler(self, request):
+        comment = self.comments.get(int(request.match_info["comment_id"]))
+        if comment is None:
+            return web.json_response({"message": "Not Found"}, status=404)
+        comment["body"] = (await request.json())["body"]
+        return web.json_response(comment)
+
+    async def _repo_handler(self, request):
+        repo = f"{request.match_info['owner']}/{request.match_info['name']}"
+        if repo not in self._pulls:
+            return web.json_response({"message": "Not Found"}, status=404)
+        return web.json_response({
+            "full_name": repo,
+            "description": "Benchmark-Repository",
+            "stargazers_count": 0,
+            "forks_count": 0,
+            "open_issues_count": len(self._issues[repo]) + len(self._pulls[repo]),
+            "owner": {"avatar_url": "https://github.com/identicons/bench.png"},
+        })
+
+    async def start(self):
+        app = web.Application(middlewares=[self._middleware])
+        prefix = "/repos/{owner}/{name}"
+        app.router.add_get(prefix, self._repo_handler)
+        app.router.add_get(prefix + "/pulls", self._pulls_handler)
+        app.router.add_get(prefix + "/pulls/{number}/files", self._files_handler)
+        app.router.add_get(prefix + "/issues", self._issues_handler)
+        app.router.add_route("*", prefix + "/issues/{number}/comments", self._comments_handler)
+        app.router.add_patch(prefix + "/issues/comments/{comment_id}", self._comment_handler)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,96 @@
+"""
+Misst die Startzeit des Bots (Import von `bot` bis zur Verbindung mit Discord).
+
+    cd src && python -m benchmarks.startup [--runs 5] [--top 15] [--budget-ms 800]
+
+Gibt die mittlere Importzeit, die teuersten Module laut `python -X importtime` und die schweren
+Analyzer-Module aus, die fälschlich schon beim Start geladen werden. Mit `--budget-ms` endet das
+Skript mit Exit-Code 1, wenn das Budget überschritten oder ein schweres Modul geladen wird.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Diese Module dürfen erst bei der ersten Analyse bzw. bei Bedarf geladen werden
+HEAVY_MODULES = ("flake8", "bandit", "black", "requests", "aiohttp.web", "github.webhook")
+
+
+def _run(args):
+    return subprocess.run(
+        [sys.executable, *args], cwd=SRC_DIR, capture_output=True, text=True, check=True
+    )
+
+
+def measure_wall_time(module, runs):
+    """Startet für jeden Lauf einen frischen Interpreter und gibt die Importzeiten in ms zurück."""
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _run(["-c", f"import {module}"])
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def import_profile(module):
+    """
+    Wertet `python -X importtime` aus.
+    Gibt [(Modul, eigene Zeit in ms, kumulierte Zeit in ms, Tiefe)] in Importreihenfolge zurück.
+    """
+    stderr = _run(["-X", "importtime", "-c", f"import {module}"]).stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    return entries
+
+
+def loaded_heavy_modules(module):
+    code = (
+        f"import json, sys, {module}\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    return json.loads(_run(["-c", code]).stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startzeit-Benchmark für CodeGuardian")
+    parser.add_argument("--module", default="bot", help="Zu importierendes Modul (Standard: bot)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Anzahl der teuersten Module im Bericht")
+    parser.add_argument("--budget-ms", type=float, help="Maximal erlaubte mittlere Startzeit in ms")
+    args = parser.parse_args()
+
+    durations = measure_wall_time(args.module, args.runs)
+    median = statistics.median(durations)
+    print(f"Import von '{args.module}': Median {median:.0f} ms "
+          f"(min {min(durations):.0f} ms, max {max(durations):.0f} ms, {args.runs} Läufe, inkl. Interpreterstart)")
+
+    profile = import_profile(args.module)
+    # Nur Pakete der obersten Ebene, damit Untermodule nicht doppelt zählen
+    top_level = sorted((entry for entry in profile if entry[3] <= 1), key=lambda entry: entry[2], reverse=True)
+    print(f"\nTeuerste Importe (kumuliert, {args.top}):")
+    for name, self_ms, cumulative_ms, _ in top_level[:args.top]:
+        print(f"  {cumulative_ms:8.1f} ms  {self_ms:7.1f} ms  {name}")
+
+    heavy = loaded_heavy_modules(args.module)
+    if heavy:
+        print(f"\nBeim Start geladen, obwohl erst bei Bedarf benötigt: {', '.join(heavy)}")
+    else:
+        print("\nKeine schweren Analyzer-Module beim Start geladen.")
+
+    if args.budget_ms is not None and (median > args.budget_ms or heavy):
+        print(f"Startzeit-Budget von {args.budget_ms:.0f} ms überschritten")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
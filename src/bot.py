@@ -1,31 +1,195 @@
-import yaml
+import argparse
 import asyncio
-from github.monitor import monitor_repositories
-from Discord.notifier import bot
+import discord
+from github.monitor import CommentSink, get_repositories
+from github.client import get_client, close_client
+from github.pipeline import create_pipeline
+from github.repo_cache import get_repo_cache
+from github.scheduler import get_scheduler
+from utils.helpers import load_config
+from utils.metrics import MetricsServer
+from utils.state_store import get_state_store
+from utils.worker_pool import shutdown_analysis_pool
+from Discord.notifier import bot, DiscordSink, load_discord_config
 from utils.logger import logger
 
-def load_config():
-    with open("config.yaml", "r") as file:
-        return yaml.safe_load(file)
-
-config = load_config()
+async def set_error_presence():
+    """Zeigt einen Fehler im Discord-Status an (wie zuvor die einzelnen Abfrage-Tasks)."""
+    try:
+        await bot.change_presence(status=discord.Status.dnd, activity=discord.Game("Fehler: Überprüfung fehlgeschlagen"))
+    except Exception as e:
+        logger.error("Discord-Status konnte nicht gesetzt werden: %s", str(e))
 
-async def start_monitoring():
-    """Asynchroner Task für die GitHub-Überwachung."""
+async def start_monitoring(pipeline, scheduler, wait_for_discord=True):
+    """
+    Asynchroner Task für die GitHub-Überwachung.
+    Ein Zyklus holt und analysiert jeden fälligen Pull Request genau einmal; Kommentar und
+    Discord-Nachricht entstehen aus demselben Ergebnis. Welche Repositories fällig sind,
+    entscheidet der Scheduler anhand ihrer Aktivität und des API-Budgets. Im Webhook-Modus
+    dient die Abfrage nur noch als langsamer Abgleich für verpasste Ereignisse.
+    """
     try:
+        if wait_for_discord:
+            await bot.wait_until_ready()
         while True:
-            monitor_repositories()
-            await asyncio.sleep(300)  # Alle 5 Minuten ausführen
+            due = scheduler.due()
+            if due:
+                try:
+                    activity = await pipeline.run_cycle(due)
+                except Exception as e:
+                    # Ein fehlgeschlagener Zyklus darf die Überwachung nicht beenden; die betroffenen
+                    # Repositories werden wie ruhige behandelt und später erneut abgefragt
+                    logger.exception("Fehler im Überwachungszyklus: %s", str(e))
+                    activity = {repo: False for repo in due}
+                    if wait_for_discord:
+                        await set_error_presence()
+                for repo, active in activity.items():
+                    scheduler.record(repo, active)
+                logger.info("API-Budget: %s", pipeline.client.budget.snapshot())
+                logger.info("Abfrageintervalle: %s", scheduler.snapshot())
+            await asyncio.sleep(max(5, scheduler.seconds_until_next()))
     except asyncio.CancelledError:
         logger.info("GitHub-Monitoring-Task wurde beendet.")
 
-async def main():
+def create_sharding(config, worker_id=None):
+    """
+    Erstellt den Shard-Koordinator, falls `sharding.enabled` gesetzt ist, und ermittelt mit einem
+    ersten Heartbeat die Repositories dieser Instanz. Gibt (Koordinator, Repositories) zurück.
+    """
+    sharding_config = config.get("sharding", {})
+    if not sharding_config.get("enabled", False):
+        return None, get_repositories()
+    from github.sharding import create_coordinator
+
+    coordinator = create_coordinator(
+        get_repositories(), sharding_config, get_state_store().db_path, worker_id=worker_id
+    )
+    return coordinator, coordinator.heartbeat()
+
+def start_sharding(coordinator, scheduler):
+    """Startet die Heartbeat-Schleife (dreimal pro Lease-Laufzeit), falls Sharding aktiv ist."""
+    if coordinator is None:
+        return None
+    return asyncio.create_task(coordinator.run(scheduler, interval=coordinator.leases.ttl / 3))
+
+async def cancel_tasks(tasks):
+    for task in tasks:
+        if task is None:
+            continue
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+def polling_interval(config):
+    """Im Webhook-Modus dient Polling nur dem Abgleich (`webhook.reconcile_interval`), sonst None (Standard)."""
+    webhook_config = config.get("webhook", {})
+    if webhook_config.get("enabled", False):
+        return webhook_config.get("reconcile_interval", 1800)
+    return None
+
+def start_inbox(coordinator, dispatcher):
+    """Übernimmt weitergeleitete Webhook-Ereignisse für die eigenen Shards (nur im Shard- und Webhook-Betrieb)."""
+    if coordinator is None or dispatcher is None:
+        return None
+    from github.sharding import EventInbox
+
+    return asyncio.create_task(EventInbox(get_state_store(), coordinator, dispatcher).run())
+
+async def run_worker(config, worker_id=None):
+    """
+    Worker-Instanz für den Shard-Betrieb: prüft nur die Repositories ihrer Shards und schreibt
+    Kommentare selbst. Discord-Meldungen übernimmt das Gateway (die Instanz mit Discord-Verbindung)
+    aus dem gemeinsamen Zustandsspeicher; der Worker selbst braucht keinen Discord-Token.
+    """
+    from github.sharding import ForwardSink
+
+    logger.info("Worker wird gestartet...")
+    client = get_client()
+    coordinator, repositories = create_sharding(config, worker_id)
+    if coordinator is None:
+        logger.error("Der Worker-Modus setzt `sharding.enabled: true` voraus.")
+        await close_client()
+        return
+    pipeline = create_pipeline(client, [CommentSink(client), ForwardSink(get_state_store())])
+    interval = polling_interval(config)
+    scheduler = get_scheduler(
+        repositories, budget=client.budget, base_interval=interval, min_interval=interval, max_interval=interval
+    )
+    sharding_task = start_sharding(coordinator, scheduler)
+    inbox_task = None
+    if interval is not None:
+        from github.webhook import EventDispatcher
+
+        # Das Gateway leitet Webhooks für die Shards dieses Workers hierher weiter
+        inbox_task = start_inbox(coordinator, EventDispatcher(pipeline))
+    try:
+        await start_monitoring(pipeline, scheduler, wait_for_discord=False)
+    finally:
+        await cancel_tasks([sharding_task, inbox_task])
+        await pipeline.stop()
+        await close_client()
+        shutdown_analysis_pool()
+
+async def main(worker_id=None):
     """Startet den Discord-Bot und die GitHub-Überwachung parallel."""
     logger.info("Bot wird gestartet...")
+    config = load_config()
+    discord_token = load_discord_config()["token"]
     # Starte die GitHub-Überwachung und den Discord-Bot parallel
-    monitoring_task = asyncio.create_task(start_monitoring())
+    client = get_client()
+    discord_sink = DiscordSink()
+    pipeline = create_pipeline(client, [CommentSink(client), discord_sink])
+    coordinator, repositories = create_sharding(config, worker_id)
+    webhook_config = config.get("webhook", {})
+    webhook_server = None
+    interval = polling_interval(config)  # Standard: monitoring.schedule.base_interval (5 Minuten)
+    if webhook_config.get("enabled", False):
+        from github.webhook import WebhookServer
+
+        router = None
+        if coordinator is not None:
+            from github.sharding import WebhookRouter
+
+            # Im Shard-Betrieb empfängt nur das Gateway Webhooks und leitet sie an den Eigentümer des Shards weiter
+            router = WebhookRouter(coordinator, get_state_store())
+        webhook_server = WebhookServer(
+            pipeline,
+            webhook_config["secret"],
+            get_repositories(),
+            host=webhook_config.get("host", "0.0.0.0"),
+            port=webhook_config.get("port", 8080),
+            path=webhook_config.get("path", "/webhook"),
+            router=router,
+        )
+        await webhook_server.start()
+    metrics_config = config.get("metrics", {})
+    metrics_server = None
+    if metrics_config.get("enabled", True):
+        metrics_server = MetricsServer(
+            host=metrics_config.get("host", "127.0.0.1"),
+            port=metrics_config.get("port", 9108),
+        )
+        await metrics_server.start()
+    # Im Webhook-Modus ist Polling nur ein Abgleich: auch aktive Repositories nicht öfter abfragen
+    scheduler = get_scheduler(
+        repositories, budget=client.budget, base_interval=interval, min_interval=interval, max_interval=interval
+    )
+    # `/repo` nutzt die Metadaten überwachter Repositories bis zu deren nächster Abfrage
+    get_repo_cache().scheduler = scheduler
+    monitoring_task = asyncio.create_task(start_monitoring(pipeline, scheduler))
+    sharding_task = start_sharding(coordinator, scheduler)
+    inbox_task = start_inbox(coordinator, webhook_server.dispatcher if webhook_server is not None else None)
+    relay_task = None
+    if coordinator is not None:
+        from github.sharding import ResultRelay
+
+        # Ergebnisse der Worker über den eigenen Discord-Sink melden
+        relay_task = asyncio.create_task(ResultRelay(get_state_store(), [discord_sink]).run())
+    discord_sink.outbox.start()
     try:
-        await bot.start(config["discord"]["token"])
+        await bot.start(discord_token)
     except Exception as e:
         logger.error(f"Ein Fehler ist aufgetreten: {e}")
     finally:
@@ -35,9 +199,26 @@ async def main():
             await monitoring_task
         except asyncio.CancelledError:
             logger.info("Monitoring-Task wurde erfolgreich abgebrochen.")
+        await cancel_tasks([sharding_task, relay_task, inbox_task])
+        if webhook_server is not None:
+            await webhook_server.stop()
+        if metrics_server is not None:
+            await metrics_server.stop()
+        await pipeline.stop()
+        await discord_sink.outbox.stop()
+        await close_client()
+        shutdown_analysis_pool()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CodeGuardian")
+    parser.add_argument("--worker", action="store_true",
+                        help="Nur Shards prüfen, ohne Discord-Verbindung (setzt sharding.enabled voraus)")
+    parser.add_argument("--worker-id", help="Name der Instanz für die Shard-Leases (Standard: Host-PID)")
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        if args.worker:
+            asyncio.run(run_worker(load_config(), args.worker_id))
+        else:
+            asyncio.run(main(args.worker_id))
     except KeyboardInterrupt:
         logger.info("Bot wurde durch KeyboardInterrupt beendet.")
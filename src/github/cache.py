@@ -0,0 +1,152 @@
+import json
+import os
+import sqlite3
+import time
+from urllib.parse import urlencode
+from utils.logger import logger
+from utils.metrics import get_metrics
+
+
+class ResponseCache:
+    """
+    Persistenter Cache für bedingte GitHub-Anfragen (SQLite).
+    Speichert pro URL den ETag bzw. Last-Modified-Header und den Inhalt der letzten Antwort.
+    Antwortet GitHub mit 304, wird der gespeicherte Inhalt verwendet – solche Antworten
+    zählen nicht gegen das Rate-Limit. Neue Antworten werden gesammelt und mit `flush()` in
+    einer Transaktion geschrieben; überschreitet der Cache `max_entries`, werden die am längsten
+    nicht genutzten Einträge entfernt (LRU). Mehrere Prozesse können dieselbe Datei nutzen.
+    """
+
+    def __init__(self, db_path, max_entries=5000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Noch nicht geschriebene Antworten und Zugriffe: {Schlüssel: Eintrag} bzw. {Schlüssel: Zeitpunkt}
+        self._pending = {}
+        self._touched = {}
+        try:
+            self._conn = self._connect()
+        except sqlite3.DatabaseError as e:
+            # Ein beschädigter Cache darf den Start nicht verhindern: neu anlegen
+            logger.error("HTTP-Cache %s ist beschädigt und wird neu angelegt: %s", db_path, str(e))
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+            self._conn = self._connect()
+        get_metrics().register_gauge("http_cache_entries", self._count)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                link TEXT,
+                data TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        conn.commit()
+        return conn
+
+    @staticmethod
+    def key(url, params=None):
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted(params.items()))}"
+
+    def _entry(self, key):
+        entry = self._pending.get(key)
+        if entry is not None:
+            return entry
+        row = self._conn.execute(
+            "SELECT etag, last_modified, link, data FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "link": row[2], "data": json.loads(row[3])}
+
+    def conditional_headers(self, key):
+        """Gibt die Header für eine bedingte Anfrage zurück (leer, falls nichts gespeichert ist)."""
+        entry = self._entry(key)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def get(self, key):
+        entry = self._entry(key)
+        if entry is None:
+            return None
+        self._touched[key] = time.time()
+        return entry["data"]
+
+    def get_link(self, key):
+        entry = self._entry(key)
+        return entry.get("link") if entry else None
+
+    def store(self, key, headers, data):
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        self._pending[key] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            # Link-Header für die Paginierung, falls eine 304-Antwort ihn nicht mitliefert
+            "link": headers.get("Link"),
+            "data": data,
+        }
+
+    def _count(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return count
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": self._count(),
+        }
+
+    def flush(self):
+        """Schreibt neue Antworten und Zugriffszeiten (einmal pro Zyklus) und entfernt alte Einträge."""
+        if self._pending or self._touched:
+            now = time.time()
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO responses (key, etag, last_modified, link, data, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (key, entry["etag"], entry["last_modified"], entry["link"], json.dumps(entry["data"]), now)
+                        for key, entry in self._pending.items()
+                    ],
+                )
+                self._conn.executemany(
+                    "UPDATE responses SET last_used = ? WHERE key = ?",
+                    [(used, key) for key, used in self._touched.items() if key not in self._pending],
+                )
+                overflow = self._count() - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE rowid IN (SELECT rowid FROM responses ORDER BY last_used LIMIT ?)",
+                        (overflow,),
+                    )
+            self._pending = {}
+            self._touched = {}
+        logger.info("HTTP-Cache: %d Treffer, %d Fehlschläge, %d Einträge", self.hits, self.misses, self._count())
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,206 @@
+import asyncio
+import re
+import aiohttp
+from multidict import CIMultiDict
+from github.cache import ResponseCache
+from github.rate_limit import RateLimitBudget
+from utils.helpers import load_config
+from utils.metrics import get_metrics
+from utils.paths import data_path
+from utils.logger import logger
+
+DEFAULT_API_URL = "https://api.github.com"
+
+
+def endpoint_name(path):
+    """Fasst API-Pfade für Metriken zusammen, z. B. `repos/{repo}/pulls/{n}/files`."""
+    path = path.split("?", 1)[0]
+    path = re.sub(r"^https?://[^/]+(/api/v3)?/", "", path).lstrip("/")
+    path = re.sub(r"^repos/[^/]+/[^/]+", "repos/{repo}", path)
+    return re.sub(r"/\d+(?=/|$)", "/{n}", path)
+
+
+def next_page_url(headers):
+    """Gibt die URL aus `Link: <...>; rel="next"` zurück (oder None)."""
+    for part in headers.get("Link", "").split(","):
+        section = part.split(";")
+        if len(section) > 1 and any(param.strip() == 'rel="next"' for param in section[1:]):
+            return section[0].strip().strip("<>")
+    return None
+
+
+class GitHubResponse:
+    """Antwort eines GitHub-API-Aufrufs (Status, Header und bereits gelesener Inhalt)."""
+
+    def __init__(self, status, headers, data, not_modified=False):
+        self.status = status
+        self.headers = headers
+        self.data = data
+        # True, wenn GitHub mit 304 geantwortet hat und `data` aus dem Cache stammt
+        self.not_modified = not_modified
+
+    def json(self):
+        return self.data
+
+
+class GitHubClient:
+    """
+    Asynchroner GitHub-Client mit gemeinsamem Verbindungspool.
+    Alle Aufrufe teilen sich eine aiohttp-Session (Keep-Alive), werden über ein
+    Semaphor begrenzt und haben ein Timeout pro Anfrage.
+    Mit einem ResponseCache werden GET-Anfragen bedingt gestellt (If-None-Match).
+    Das RateLimitBudget stellt Anfragen zurück, wenn das API-Budget knapp wird.
+    """
+
+    # Wie oft eine durch das Rate-Limit abgelehnte Anfrage nach dem Warten wiederholt wird
+    RATE_LIMIT_RETRIES = 2
+
+    def __init__(self, token, api_url=DEFAULT_API_URL, max_connections=10, max_concurrency=8, timeout=15, cache=None, budget=None):
+        self.token = token
+        self.cache = cache
+        self.budget = budget or RateLimitBudget()
+        self.api_url = api_url.rstrip("/")
+        self.max_connections = max_connections
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={
+                    "Authorization": f"token {self.token}",
+                    "Accept": "application/vnd.github+json",
+                },
+            )
+        return self._session
+
+    def url(self, path):
+        """Erlaubt sowohl absolute URLs (z. B. aus `_links`) als auch API-Pfade."""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.api_url}/{path.lstrip('/')}"
+
+    async def _send(self, method, path, **kwargs):
+        session = self._get_session()
+        metrics = get_metrics()
+        endpoint = f"{method} {endpoint_name(self.url(path))}"
+        async with self._semaphore:
+            with metrics.span("github_request", endpoint=endpoint):
+                async with session.request(method, self.url(path), **kwargs) as response:
+                    if response.content_type == "application/json":
+                        data = await response.json()
+                    else:
+                        data = await response.text()
+        metrics.inc("github_requests", endpoint=endpoint, status=response.status)
+        return GitHubResponse(response.status, response.headers, data)
+
+    async def request(self, method, path, **kwargs):
+        for attempt in range(self.RATE_LIMIT_RETRIES + 1):
+            await self.budget.wait()
+            response = await self._send(method, path, **kwargs)
+            self.budget.update(response.headers)
+            if response.status not in (403, 429) or attempt == self.RATE_LIMIT_RETRIES:
+                return response
+            if not self.budget.block(response.status, response.headers):
+                return response
+        return response
+
+    async def get(self, path, use_cache=True, **kwargs):
+        """
+        GET-Anfrage. Bei aktivem Cache wird der gespeicherte ETag mitgeschickt; eine 304-Antwort
+        wird als Status 200 mit `not_modified=True` und dem gespeicherten Inhalt zurückgegeben.
+        """
+        if self.cache is None or not use_cache:
+            return await self.request("GET", path, **kwargs)
+
+        key = ResponseCache.key(self.url(path), kwargs.get("params"))
+        headers = {**kwargs.pop("headers", {}), **self.cache.conditional_headers(key)}
+        response = await self.request("GET", path, headers=headers, **kwargs)
+        if response.status == 304:
+            self.cache.hits += 1
+            get_metrics().inc("http_cache", result="hit")
+            headers = CIMultiDict(response.headers)
+            if "Link" not in headers and self.cache.get_link(key):
+                headers["Link"] = self.cache.get_link(key)
+            return GitHubResponse(200, headers, self.cache.get(key), not_modified=True)
+        self.cache.misses += 1
+        get_metrics().inc("http_cache", result="miss")
+        if response.status == 200:
+            self.cache.store(key, response.headers, response.data)
+        return response
+
+    async def paginate(self, path, params=None):
+        """
+        Liefert alle Seiten einer Listen-Ressource als GitHubResponse (100 Einträge pro Seite)
+        und folgt dabei dem `Link`-Header. Bricht bei einem Fehlerstatus nach dieser Seite ab.
+        """
+        url = path
+        params = {"per_page": 100, **(params or {})}
+        while url:
+            response = await self.get(url, params=params)
+            yield response
+            if response.status != 200:
+                return
+            # Die nächste URL enthält bereits alle Parameter
+            url = next_page_url(response.headers)
+            params = None
+
+    async def post(self, path, **kwargs):
+        return await self.request("POST", path, **kwargs)
+
+    async def patch(self, path, **kwargs):
+        return await self.request("PATCH", path, **kwargs)
+
+    def flush_cache(self):
+        if self.cache is not None:
+            self.cache.flush()
+
+    async def close(self):
+        self.flush_cache()
+        if self.cache is not None:
+            self.cache.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_client = None
+
+
+def get_client():
+    """Gibt den gemeinsam genutzten GitHub-Client zurück (wird beim ersten Aufruf erstellt)."""
+    global _client
+    if _client is None:
+        config = load_config()
+        if "github" not in config or "token" not in config["github"]:
+            raise ValueError("Fehlende GitHub-Konfiguration in config.yaml")
+        github_config = config["github"]
+        _client = GitHubClient(
+            github_config["token"],
+            api_url=github_config.get("api_url", DEFAULT_API_URL),
+            max_connections=github_config.get("max_connections", 10),
+            max_concurrency=github_config.get("max_concurrency", 8),
+            timeout=github_config.get("request_timeout", 15),
+            cache=ResponseCache(
+                data_path("http_cache.sqlite3"),
+                max_entries=github_config.get("http_cache_entries", 5000),
+            ) if github_config.get("http_cache", True) else None,
+            budget=RateLimitBudget(reserve=github_config.get("rate_limit_reserve", 100)),
+        )
+        metrics = get_metrics()
+        metrics.register_gauge("github_rate_limit_remaining", lambda client=_client: client.budget.remaining)
+        metrics.register_gauge("github_rate_limit_limit", lambda client=_client: client.budget.limit)
+        logger.info("GitHub-Client erstellt (%s)", _client.api_url)
+    return _client
+
+
+async def close_client():
+    """Schließt den gemeinsam genutzten GitHub-Client."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,110 @@
+import hashlib
+from utils.helpers import comment_on_pull_request
+from utils.logger import logger
+from utils.metrics import get_metrics
+from utils.state_store import get_state_store
+
+# Versteckte Markierung, an der der Bot seinen eigenen Kommentar im Pull Request wiedererkennt
+MARKER = "<!-- codeguardian:summary -->"
+
+# Namensraum im Zustandsspeicher: {Repository}#{Nummer} -> {hash, comment_id, head_sha}
+COMMENTS = "comment"
+
+
+class CommentManager:
+    """
+    Verwaltet genau einen Bot-Kommentar pro Pull Request.
+    Vom zuletzt geschriebenen Text wird ein Hash gespeichert; ändert sich das Ergebnis nicht,
+    entfällt der Schreibzugriff. Sonst wird der vorhandene Kommentar (über die ID bzw. den
+    versteckten Marker gefunden) bearbeitet und nur ohne vorhandenen Kommentar (bzw. wenn er
+    gelöscht wurde, 404) ein neuer angelegt. Bei anderen Fehlern bleibt der Zustand unverändert,
+    sodass der nächste Zyklus es erneut versucht, statt einen doppelten Kommentar zu schreiben.
+    """
+
+    def __init__(self, client, store=None):
+        self.client = client
+        self.store = store or get_state_store()
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.metrics = get_metrics()
+
+    @staticmethod
+    def render(pull, issues_summary):
+        return (
+            f"{MARKER}\n"
+            f"Automatische Prüfung abgeschlossen (Commit {pull['head']['sha'][:7]}):\n{issues_summary}"
+        )
+
+    async def _find_comment(self, repo, number):
+        """
+        Sucht den Bot-Kommentar anhand des Markers (z. B. nach Verlust des Zustandsspeichers).
+        Gibt (gefunden oder sicher nicht vorhanden, Kommentar-ID oder None) zurück.
+        """
+        async for response in self.client.paginate(f"repos/{repo}/issues/{number}/comments"):
+            if response.status != 200:
+                logger.error("Fehler beim Abrufen der Kommentare von %s#%s: %s", repo, number, response.status)
+                return False, None
+            for comment in response.data:
+                if MARKER in (comment.get("body") or ""):
+                    return True, comment["id"]
+        return True, None
+
+    async def _update(self, repo, comment_id, body):
+        """Bearbeitet den Kommentar und gibt den HTTP-Status zurück (404 = Kommentar gelöscht)."""
+        response = await self.client.patch(f"repos/{repo}/issues/comments/{comment_id}", json={"body": body})
+        if response.status not in (200, 404):
+            logger.error("Fehler beim Bearbeiten des Kommentars %s: %s", comment_id, response.status)
+        return response.status
+
+    async def upsert(self, repo, pull, issues_summary):
+        """Schreibt bzw. aktualisiert den Kommentar, falls sich das Ergebnis geändert hat."""
+        key = f"{repo}#{pull['number']}"
+        state = self.store.get_value(COMMENTS, key) or {}
+        if not state and not issues_summary.strip():
+            # Nichts zu melden und noch kein Kommentar vorhanden
+            return
+        body = self.render(pull, issues_summary)
+        digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        if state.get("hash") == digest:
+            self.skip()
+            return
+
+        with self.metrics.span("comment_write"):
+            comment_id = state.get("comment_id")
+            if not comment_id:
+                found, comment_id = await self._find_comment(repo, pull["number"])
+                if not found:
+                    # Ohne sichere Auskunft keinen zweiten Kommentar anlegen; nächster Zyklus versucht es erneut
+                    return
+            status = await self._update(repo, comment_id, body) if comment_id else 404
+            if status == 200:
+                self.updated += 1
+                self.metrics.inc("comments", action="updated")
+            elif status != 404:
+                # Vorübergehender Fehler (5xx, 403, ...): Zustand unverändert lassen und später erneut versuchen
+                return
+            else:
+                comment = await comment_on_pull_request(self.client, repo, pull["number"], body)
+                if comment is None:
+                    return
+                comment_id = comment["id"]
+                self.created += 1
+                self.metrics.inc("comments", action="created")
+        self.store.set_value(COMMENTS, key, {
+            "hash": digest,
+            "comment_id": comment_id,
+            "head_sha": pull["head"]["sha"],
+        })
+
+    def skip(self):
+        """Zählt einen entfallenen Schreibzugriff (Ergebnis unverändert)."""
+        self.skipped += 1
+        self.metrics.inc("comments", action="skipped")
+
+    def log_stats(self):
+        logger.info(
+            "Kommentare: %d neu, %d bearbeitet, %d unverändert übersprungen",
+            self.created, self.updated, self.skipped,
+        )
+        self.created = self.updated = self.skipped = 0
@@ -0,0 +1,397 @@
+import asyncio
+import hashlib
+import json
+from utils.logger import logger
+from utils.metrics import get_metrics
+from utils.state_store import get_state_store
+
+# Zuordnung der GraphQL-`changeType`-Werte zum `status` der REST-API
+CHANGE_TYPES = {
+    "ADDED": "added",
+    "DELETED": "removed",
+    "MODIFIED": "modified",
+    "RENAMED": "renamed",
+    "COPIED": "copied",
+    "CHANGED": "changed",
+}
+
+# Namensraum im Zustandsspeicher für die `updated_at`-Wasserstände pro Repository
+WATERMARKS = "watermark"
+# Wasserstände, die wegen eines fehlgeschlagenen Elements zurückgehalten wurden
+RETRIES = "watermark_retry"
+
+
+class RepoSnapshot:
+    """
+    Ergebnis der fetch-Stufe für ein Repository.
+    `pulls` ist eine Liste von (pull, files); `files` ist None, wenn die Dateien erst in der
+    diff-Stufe über `/pulls/N/files` geholt werden (REST). `watermarks` enthält pro Art
+    ("pulls", "issues") den neuesten `updated_at`-Wert der geholten Elemente; festgeschrieben
+    wird er erst, wenn die Pipeline alle Elemente fehlerfrei verarbeitet hat.
+    `repository` sind die Repository-Metadaten in der Form der REST-API (für `/repo`), falls bekannt.
+    """
+
+    def __init__(self, repo, pulls=None, issues=None, active=False, watermarks=None, repository=None):
+        self.repo = repo
+        self.pulls = pulls or []
+        self.issues = issues or []
+        self.active = active
+        self.watermarks = watermarks or {}
+        self.repository = repository
+
+
+class RestFetcher:
+    """
+    Holt offene Pull Requests und Issues über die REST-API (ein Repository pro Anfrage).
+    Alle Seiten werden über den `Link`-Header verfolgt. Pro Repository wird der neueste
+    `updated_at`-Wert als Wasserstand im Zustandsspeicher abgelegt (über `advance()`, sobald die
+    Pipeline die Elemente verarbeitet hat); nach dem ersten Abgleich werden nur noch Elemente
+    geholt, die seit dem letzten Durchlauf aktualisiert wurden.
+    """
+
+    name = "rest"
+
+    def __init__(self, client, store=None):
+        self.client = client
+        self.store = store or get_state_store()
+
+    async def _fetch_pulls(self, repo):
+        """
+        Offene Pull Requests, die seit dem Wasserstand aktualisiert wurden (neueste zuerst).
+        Gibt (Pull Requests oder None bei Fehler, Repository-Objekt aus `base.repo` oder None) zurück.
+        """
+        watermark = self.store.get_value(WATERMARKS, f"{repo}:pulls")
+        retry = self.store.get_value(RETRIES, f"{repo}:pulls", False)
+        params = {"state": "open", "sort": "updated", "direction": "desc"}
+        pulls = []
+        repository = None
+        async for response in self.client.paginate(f"repos/{repo}/pulls", params):
+            if response.status != 200:
+                logger.error("Fehler beim Abrufen von %s: %s", repo, response.status)
+                return None, None
+            if repository is None and response.data:
+                # Auch der zwischengespeicherte Inhalt einer 304-Antwort enthält das Repository
+                repository = (response.data[0].get("base") or {}).get("repo")
+            if response.not_modified and not pulls and not retry:
+                # Erste Seite unverändert: bei Sortierung nach `updated` gibt es nichts Neues
+                # (außer ein Element ist im letzten Zyklus gescheitert und muss erneut durchlaufen)
+                return [], repository
+            for pull in response.data:
+                # `since` gibt es für /pulls nicht; die Sortierung erlaubt den Abbruch am Wasserstand
+                if watermark and pull["updated_at"] < watermark:
+                    return pulls, repository
+                pulls.append(pull)
+        return pulls, repository
+
+    async def _fetch_repository_info(self, repo):
+        """Repository-Metadaten über `GET /repos/{repo}` (bedingt; unverändert kostet sie kein Budget)."""
+        response = await self.client.get(f"repos/{repo}")
+        return response.data if response.status == 200 else None
+
+    async def _fetch_issues(self, repo):
+        """Offene Issues, die seit dem Wasserstand aktualisiert wurden."""
+        params = {"state": "open", "sort": "updated", "direction": "desc"}
+        watermark = self.store.get_value(WATERMARKS, f"{repo}:issues")
+        retry = self.store.get_value(RETRIES, f"{repo}:issues", False)
+        if watermark:
+            params["since"] = watermark
+        issues = []
+        async for response in self.client.paginate(f"repos/{repo}/issues", params):
+            if response.status != 200:
+                logger.error(f"Fehler beim Abrufen der Issues von {repo}: {response.status}")
+                return None
+            if response.not_modified and not issues and not retry:
+                return []
+            issues.extend(response.data)
+        return issues
+
+    def advance(self, repo, kind, value, retry=False):
+        """
+        Setzt den Wasserstand von `repo` ("pulls"/"issues") auf `value`, falls er neuer ist.
+        Mit `retry` wird die erste Seite im nächsten Zyklus auch bei 304 ausgewertet, da das
+        gescheiterte Element sonst erst nach der nächsten Änderung im Repository erneut käme.
+        """
+        if value > (self.store.get_value(WATERMARKS, f"{repo}:{kind}") or ""):
+            self.store.set_value(WATERMARKS, f"{repo}:{kind}", value)
+        if retry != self.store.get_value(RETRIES, f"{repo}:{kind}", False):
+            self.store.set_value(RETRIES, f"{repo}:{kind}", retry)
+
+    def _set_watermark(self, snapshot, kind, items):
+        """
+        Vermerkt den neuesten `updated_at`-Wert im Snapshot. Ohne Elemente wird ein zurückgehaltener
+        Wasserstand unverändert übernommen, damit die Pipeline die Wiederholung beendet
+        (z. B. wenn das gescheiterte Element inzwischen geschlossen ist).
+        """
+        if items:
+            snapshot.watermarks[kind] = max(item["updated_at"] for item in items)
+        elif self.store.get_value(RETRIES, f"{snapshot.repo}:{kind}", False):
+            snapshot.watermarks[kind] = self.store.get_value(WATERMARKS, f"{snapshot.repo}:{kind}") or ""
+
+    async def _fetch_repository(self, repo):
+        with get_metrics().span("pipeline_stage", stage="fetch"):
+            return await self._fetch_snapshot(repo)
+
+    async def _fetch_snapshot(self, repo):
+        snapshot = RepoSnapshot(repo)
+        try:
+            pulls, snapshot.repository = await self._fetch_pulls(repo)
+            if snapshot.repository is None and pulls is not None:
+                # Ohne offene Pull Requests fehlt `base.repo`
+                snapshot.repository = await self._fetch_repository_info(repo)
+            if pulls is not None:
+                logger.info("Repository: %s - %d aktualisierte offene Pull Requests", repo, len(pulls))
+                snapshot.pulls = [(pull, None) for pull in pulls]
+                snapshot.active = bool(pulls)
+                self._set_watermark(snapshot, "pulls", pulls)
+
+            issues = await self._fetch_issues(repo)
+            if issues is not None:
+                self._set_watermark(snapshot, "issues", issues)
+                # Pull Requests sind auch Issues, aber haben einen 'pull_request'-Key
+                snapshot.issues = [issue for issue in issues if "pull_request" not in issue]
+                snapshot.active = snapshot.active or bool(issues)
+        except Exception as e:
+            logger.error("Fehler beim Prüfen von %s: %s", repo, str(e))
+        return snapshot
+
+    async def fetch(self, repositories):
+        """Liefert ein RepoSnapshot pro Repository, sobald es abgerufen ist."""
+        for finished in asyncio.as_completed([self._fetch_repository(repo) for repo in repositories]):
+            yield await finished
+
+
+PULL_FIELDS = """
+    databaseId number title url isDraft updatedAt headRefOid baseRefOid
+    author { login }
+    files(first: 100) { pageInfo { hasNextPage endCursor } nodes { path additions deletions changeType } }
+"""
+
+# Repository-Metadaten für `/repo`, nur mit der ersten Seite der Pull Requests abgefragt
+REPOSITORY_FIELDS = """
+    nameWithOwner description stargazerCount forkCount
+    owner { login avatarUrl }
+    openIssues: issues(states: OPEN) { totalCount }
+"""
+
+ISSUE_FIELDS = """
+    databaseId number title body url createdAt updatedAt
+    author { login }
+"""
+
+FILE_FIELDS = "pageInfo { hasNextPage endCursor } nodes { path additions deletions changeType }"
+
+
+class GraphQLError(Exception):
+    """Die GraphQL-API hat einen Fehler zurückgegeben."""
+
+
+class GraphQLFetcher:
+    """
+    Holt offene Pull Requests (mit Head-SHA und geänderten Dateien) und offene Issues vieler
+    Repositories mit wenigen GraphQL-Abfragen. Mehrere Repositories werden per Alias in einer
+    Abfrage gebündelt; weitere Seiten werden über Cursor nachgeladen.
+    Die Dateien enthalten keinen `patch` und keinen Blob-SHA – beides ergänzt die diff-Stufe
+    aus dem lokalen Mirror.
+    """
+
+    name = "graphql"
+
+    def __init__(self, client, batch_size=10, page_size=50):
+        self.client = client
+        self.batch_size = batch_size
+        self.page_size = page_size
+        # Fingerabdruck pro Repository, um Aktivität ohne ETags zu erkennen
+        self._fingerprints = {}
+
+    async def _query(self, query, variables):
+        """
+        Führt eine Abfrage aus und gibt (data, {Alias: Fehlermeldung}) zurück.
+        GitHub liefert bei einzelnen fehlenden Repositories (z. B. `NOT_FOUND`) trotzdem die übrigen
+        Daten; nur ohne `data` schlägt die ganze Abfrage fehl.
+        """
+        response = await self.client.post("graphql", json={"query": query, "variables": variables})
+        if response.status != 200:
+            raise GraphQLError(f"GraphQL-Abfrage fehlgeschlagen: {response.status}")
+        errors = response.data.get("errors") or []
+        if response.data.get("data") is None:
+            message = errors[0].get("message") if errors else "keine Daten"
+            raise GraphQLError(f"GraphQL-Fehler: {message}")
+        failed = {}
+        for error in errors:
+            path = error.get("path") or [None]
+            failed.setdefault(path[0], error.get("message"))
+        return response.data["data"], failed
+
+    def _pull_to_rest(self, repo, node):
+        """Bringt einen GraphQL-Pull-Request in die Form der REST-API, die die Pipeline erwartet."""
+        return {
+            "id": node["databaseId"],
+            "number": node["number"],
+            "title": node["title"],
+            "html_url": node["url"],
+            "state": "open",
+            "draft": node["isDraft"],
+            "updated_at": node["updatedAt"],
+            "user": {"login": (node.get("author") or {}).get("login", "ghost")},
+            "head": {"sha": node["headRefOid"]},
+            "base": {"sha": node["baseRefOid"], "repo": {"full_name": repo}},
+            "_links": {"self": {"href": self.client.url(f"repos/{repo}/pulls/{node['number']}")}},
+        }
+
+    @staticmethod
+    def _repository_to_rest(node, open_pulls):
+        """Repository-Metadaten in der Form von `GET /repos/{repo}` (offene Issues zählen dort PRs mit)."""
+        return {
+            "full_name": node["nameWithOwner"],
+            "description": node.get("description"),
+            "stargazers_count": node["stargazerCount"],
+            "forks_count": node["forkCount"],
+            "open_issues_count": node["openIssues"]["totalCount"] + open_pulls,
+            "owner": {"login": node["owner"]["login"], "avatar_url": node["owner"]["avatarUrl"]},
+        }
+
+    @staticmethod
+    def _file_to_rest(node):
+        return {
+            "filename": node["path"],
+            "additions": node["additions"],
+            "deletions": node["deletions"],
+            "status": CHANGE_TYPES.get(node["changeType"], "modified"),
+        }
+
+    @staticmethod
+    def _issue_to_rest(node):
+        return {
+            "id": node["databaseId"],
+            "number": node["number"],
+            "title": node["title"],
+            "body": node.get("body"),
+            "html_url": node["url"],
+            "created_at": node["createdAt"],
+            "updated_at": node["updatedAt"],
+            "user": {"login": (node.get("author") or {}).get("login", "ghost")},
+        }
+
+    async def _fetch_connections(self, repos):
+        """
+        Holt alle Seiten der Pull Requests und Issues für eine Gruppe von Repositories.
+        Gibt ({Repository: (PR-Knoten, Issue-Knoten)} ohne nicht abrufbare Repositories,
+        {Repository: Metadaten}) zurück.
+        """
+        nodes = {repo: ([], []) for repo in repos}
+        repositories = {}
+        skipped = set()
+        # Cursor pro (Repository, Verbindung); None = erste Seite, fehlt = fertig
+        cursors = {(repo, kind): None for repo in repos for kind in ("pullRequests", "issues")}
+        while cursors:
+            fields = []
+            variables = {}
+            aliases = {}
+            for index, ((repo, kind), cursor) in enumerate(cursors.items()):
+                owner, name = repo.split("/", 1)
+                alias = f"r{index}"
+                aliases[alias] = (repo, kind)
+                variables[f"c{index}"] = cursor
+                selection = PULL_FIELDS if kind == "pullRequests" else ISSUE_FIELDS
+                order = "orderBy: {field: UPDATED_AT, direction: DESC}"
+                repository = REPOSITORY_FIELDS if kind == "pullRequests" and cursor is None else ""
+                fields.append(
+                    f'{alias}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ {repository}'
+                    f'{kind}(states: OPEN, first: {self.page_size}, after: $c{index}, {order}) {{ '
+                    f'totalCount pageInfo {{ hasNextPage endCursor }} nodes {{ {selection} }} }} }}'
+                )
+            declarations = ", ".join(f"$c{index}: String" for index in range(len(aliases)))
+            data, failed = await self._query(f"query({declarations}) {{ {' '.join(fields)} }}", variables)
+
+            cursors = {}
+            for alias, (repo, kind) in aliases.items():
+                if alias in failed or data.get(alias) is None:
+                    # Nur dieses Repository überspringen, der Rest der Gruppe bleibt gültig
+                    logger.error("Repository %s über GraphQL nicht abrufbar: %s", repo, failed.get(alias, "nicht gefunden"))
+                    skipped.add(repo)
+                    continue
+                if "nameWithOwner" in data[alias]:
+                    repositories[repo] = self._repository_to_rest(data[alias], data[alias][kind]["totalCount"])
+                connection = data[alias][kind]
+                nodes[repo][0 if kind == "pullRequests" else 1].extend(connection["nodes"])
+                if connection["pageInfo"]["hasNextPage"]:
+                    cursors[(repo, kind)] = connection["pageInfo"]["endCursor"]
+        return {repo: value for repo, value in nodes.items() if repo not in skipped}, repositories
+
+    async def _fetch_remaining_files(self, repo, pull_nodes):
+        """Lädt weitere Dateiseiten für Pull Requests mit mehr als 100 geänderten Dateien nach."""
+        owner, name = repo.split("/", 1)
+        pending = {
+            node["number"]: node["files"]["pageInfo"]["endCursor"]
+            for node in pull_nodes
+            if node.get("files") and node["files"]["pageInfo"]["hasNextPage"]
+        }
+        by_number = {node["number"]: node for node in pull_nodes}
+        while pending:
+            fields = []
+            variables = {}
+            for number, cursor in pending.items():
+                variables[f"c{number}"] = cursor
+                fields.append(
+                    f'p{number}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ '
+                    f'pullRequest(number: {number}) {{ files(first: 100, after: $c{number}) {{ {FILE_FIELDS} }} }} }}'
+                )
+            declarations = ", ".join(f"$c{number}: String" for number in pending)
+            data, failed = await self._query(f"query({declarations}) {{ {' '.join(fields)} }}", variables)
+            next_pending = {}
+            for number in pending:
+                if f"p{number}" in failed or data.get(f"p{number}") is None:
+                    logger.error("Dateien von %s#%s über GraphQL nicht abrufbar", repo, number)
+                    continue
+                files = data[f"p{number}"]["pullRequest"]["files"]
+                by_number[number]["files"]["nodes"].extend(files["nodes"])
+                if files["pageInfo"]["hasNextPage"]:
+                    next_pending[number] = files["pageInfo"]["endCursor"]
+            pending = next_pending
+
+    def _snapshot(self, repo, pull_nodes, issue_nodes, repository=None):
+        pulls = []
+        for node in pull_nodes:
+            files = [self._file_to_rest(file) for file in (node.get("files") or {}).get("nodes", [])]
+            pulls.append((self._pull_to_rest(repo, node), files))
+        issues = [self._issue_to_rest(node) for node in issue_nodes]
+
+        fingerprint = hashlib.sha256(json.dumps(
+            [[(pull["id"], pull["head"]["sha"]) for pull, _ in pulls], [issue["id"] for issue in issues]]
+        ).encode()).hexdigest()
+        active = self._fingerprints.get(repo) != fingerprint
+        self._fingerprints[repo] = fingerprint
+        logger.info("Repository: %s - %d offene Pull Requests (GraphQL)", repo, len(pulls))
+        return RepoSnapshot(repo, pulls, issues, active, repository=repository)
+
+    async def fetch(self, repositories):
+        """Liefert ein RepoSnapshot pro Repository; je `batch_size` Repositories teilen sich eine Abfrage."""
+        for start in range(0, len(repositories), self.batch_size):
+            batch = repositories[start:start + self.batch_size]
+            try:
+                with get_metrics().span("pipeline_stage", stage="fetch"):
+                    nodes, metadata = await self._fetch_connections(batch)
+                    for repo in nodes:
+                        await self._fetch_remaining_files(repo, nodes[repo][0])
+            except Exception as e:
+                logger.error("Fehler beim GraphQL-Abruf von %s: %s", ", ".join(batch), str(e))
+                for repo in batch:
+                    yield RepoSnapshot(repo)
+                continue
+            for repo in batch:
+                if repo in nodes:
+                    yield self._snapshot(repo, *nodes[repo], repository=metadata.get(repo))
+                else:
+                    yield RepoSnapshot(repo)
+
+
+def create_fetcher(client, github_config):
+    """Wählt das Fetch-Backend über `github.fetch_backend` (rest oder graphql)."""
+    if github_config.get("fetch_backend", "rest") == "graphql":
+        graphql_config = github_config.get("graphql", {})
+        return GraphQLFetcher(
+            client,
+            batch_size=graphql_config.get("batch_size", 10),
+            page_size=graphql_config.get("page_size", 50),
+        )
+    return RestFetcher(client)
@@ -0,0 +1,209 @@
+import asyncio
+import base64
+import codecs
+import contextlib
+import os
+import shutil
+import tempfile
+from utils.helpers import load_config
+from utils.logger import logger
+from utils.paths import BASE_DIR, DATA_DIR
+
+DEFAULT_URL_TEMPLATE = "https://github.com/{repo}.git"
+
+# Branches und die Head-Refs aller Pull Requests spiegeln
+FETCH_REFSPECS = [
+    "+refs/heads/*:refs/heads/*",
+    "+refs/pull/*/head:refs/pull/*/head",
+]
+
+
+def unquote_path(path):
+    """
+    Entfernt Git-Quoting aus einem Pfad im Diff-Kopf. Trotz `core.quotePath=false` setzt Git Pfade
+    mit Steuerzeichen, `"` oder `\\` in Anführungszeichen und schreibt C-Escapes (z. B. `\\t`, `\\303`).
+    """
+    if len(path) < 2 or not (path.startswith('"') and path.endswith('"')):
+        return path
+    return codecs.escape_decode(path[1:-1].encode("utf-8"))[0].decode("utf-8", errors="replace")
+
+
+class MirrorError(Exception):
+    """Ein Git-Befehl im Mirror ist fehlgeschlagen."""
+
+
+class RepoMirror:
+    """
+    Lokaler Bare-Clone eines überwachten Repositories.
+    Neue Commits werden inkrementell über `refs/pull/*/head` geholt; Dateien eines Pull Requests
+    werden direkt aus den Git-Objekten geschrieben – ganz ohne GitHub-API-Aufrufe.
+    """
+
+    def __init__(self, repo, remote_url, base_dir, token=None):
+        self.repo = repo
+        self.remote_url = remote_url
+        self.path = os.path.join(base_dir, repo.replace("/", "__") + ".git")
+        self.worktree_dir = os.path.join(base_dir, "worktrees", repo.replace("/", "__"))
+        self._token = token
+        self._lock = asyncio.Lock()
+
+    def _auth_env(self):
+        """
+        Token nur pro Aufruf und über die Umgebung übergeben (GIT_CONFIG_*, Git ≥ 2.31): so landet er
+        weder in der Git-Konfiguration noch in der für alle Benutzer lesbaren Kommandozeile.
+        """
+        if not self._token or not self.remote_url.startswith("https://"):
+            return {}
+        credentials = base64.b64encode(f"x-access-token:{self._token}".encode()).decode()
+        return {
+            "GIT_CONFIG_COUNT": "1",
+            "GIT_CONFIG_KEY_0": "http.extraheader",
+            "GIT_CONFIG_VALUE_0": f"AUTHORIZATION: basic {credentials}",
+        }
+
+    async def _git(self, *args, input=None, check=True):
+        process = await asyncio.create_subprocess_exec(
+            # Pfade mit Umlauten u. Ä. nicht in Anführungszeichen/Oktal-Escapes ausgeben
+            "git", "-c", "core.quotePath=false", "--git-dir", self.path, *args,
+            stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0", **self._auth_env()},
+        )
+        stdout, stderr = await process.communicate(input)
+        if check and process.returncode != 0:
+            raise MirrorError(f"git {args[0]} für {self.repo} fehlgeschlagen: {stderr.decode(errors='replace').strip()}")
+        return process.returncode, stdout
+
+    async def _ensure(self):
+        if os.path.isdir(self.path):
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        await self._git("init", "--bare", "--quiet")
+        # Nur die URL setzen; welche Refs gespiegelt werden, legt FETCH_REFSPECS fest
+        await self._git("config", "remote.origin.url", self.remote_url)
+        logger.info("Mirror für %s angelegt: %s", self.repo, self.path)
+
+    async def has_commit(self, sha):
+        returncode, _ = await self._git("cat-file", "-e", f"{sha}^{{commit}}", check=False)
+        return returncode == 0
+
+    async def _fetch(self):
+        await self._ensure()
+        await self._git("fetch", "--prune", "--quiet", "origin", *FETCH_REFSPECS)
+
+    async def fetch(self):
+        """Holt neue Branches und Pull-Request-Heads (inkrementell)."""
+        async with self._lock:
+            await self._fetch()
+
+    async def ensure_commit(self, sha):
+        """Fetcht nur, wenn der Commit noch nicht im Mirror vorhanden ist."""
+        async with self._lock:
+            if os.path.isdir(self.path) and await self.has_commit(sha):
+                return
+            await self._fetch()
+            if not await self.has_commit(sha):
+                raise MirrorError(f"Commit {sha} nicht in {self.repo} gefunden")
+
+    async def read_files(self, sha, paths):
+        """Liest den Inhalt mehrerer Dateien bei Commit `sha` mit einem einzigen `git cat-file --batch`."""
+        request = "".join(f"{sha}:{path}\n" for path in paths).encode()
+        _, stdout = await self._git("cat-file", "--batch", input=request)
+        contents = {}
+        offset = 0
+        for path in paths:
+            newline = stdout.index(b"\n", offset)
+            header = stdout[offset:newline].split()
+            offset = newline + 1
+            if header[-1] == b"missing":
+                contents[path] = None
+                continue
+            size = int(header[-1])
+            contents[path] = stdout[offset:offset + size] if header[-2] == b"blob" else None
+            offset += size + 1
+        return contents
+
+    async def describe_files(self, base_sha, head_sha, files):
+        """
+        Ergänzt Dateien ohne `sha`/`patch` (z. B. vom GraphQL-Backend) aus dem Mirror:
+        Blob-SHA bei `head_sha` und den Patch gegenüber der Merge-Base mit `base_sha`.
+        """
+        await self.ensure_commit(head_sha)
+        await self.ensure_commit(base_sha)
+        paths = [file["filename"] for file in files]
+        # -z: Pfade unverändert und NUL-getrennt
+        _, tree = await self._git("ls-tree", "-z", head_sha, "--", *paths)
+        blob_shas = {}
+        for entry in tree.decode("utf-8", errors="replace").split("\0"):
+            if entry:
+                meta, path = entry.split("\t", 1)
+                blob_shas[path] = meta.split()[2]
+
+        _, diff = await self._git("diff", "--no-color", "--no-ext-diff", "--unified=0", f"{base_sha}...{head_sha}", "--", *paths)
+        patches = {}
+        current = None
+        for line in diff.decode("utf-8", errors="replace").splitlines():
+            if line.startswith("diff --git "):
+                current = None
+            elif line.startswith("+++ "):
+                target = unquote_path(line[4:])
+                current = target[2:] if target.startswith("b/") else None
+                patches[current] = []
+            elif current is not None and (line.startswith("@@") or line[:1] in ("+", "-", " ", "\\")):
+                patches[current].append(line)
+
+        return [
+            {
+                **file,
+                "sha": file.get("sha") or blob_shas.get(file["filename"]),
+                "patch": file.get("patch") or "\n".join(patches.get(file["filename"], [])) or None,
+            }
+            for file in files
+        ]
+
+    @contextlib.asynccontextmanager
+    async def checkout(self, sha, paths):
+        """
+        Schreibt die Dateien `paths` bei Commit `sha` in ein temporäres Verzeichnis.
+        Liefert {Repo-Pfad: lokaler Pfad}; das Verzeichnis wird danach wieder gelöscht.
+        """
+        await self.ensure_commit(sha)
+        os.makedirs(self.worktree_dir, exist_ok=True)
+        target = tempfile.mkdtemp(prefix=f"{sha[:12]}-", dir=self.worktree_dir)
+        local_paths = {}
+        try:
+            for path, content in (await self.read_files(sha, paths)).items():
+                if content is None:
+                    logger.warning("Datei %s fehlt in %s@%s", path, self.repo, sha[:7])
+                    continue
+                local_path = os.path.join(target, path)
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                with open(local_path, "wb") as file:
+                    file.write(content)
+                local_paths[path] = local_path
+            yield local_paths
+        finally:
+            shutil.rmtree(target, ignore_errors=True)
+
+
+_mirrors = {}
+
+
+def mirror_enabled():
+    return load_config()["github"].get("mirror", {}).get("enabled", False)
+
+
+def get_mirror(repo):
+    """Gibt den Mirror für `repo` zurück (Einstellungen unter `github.mirror`)."""
+    if repo not in _mirrors:
+        github_config = load_config()["github"]
+        mirror_config = github_config.get("mirror", {})
+        _mirrors[repo] = RepoMirror(
+            repo,
+            mirror_config.get("url_template", DEFAULT_URL_TEMPLATE).format(repo=repo),
+            # Relative Pfade beziehen sich auf das Projektverzeichnis
+            os.path.join(BASE_DIR, mirror_config.get("directory", os.path.join(DATA_DIR, "mirrors"))),
+            token=github_config.get("token"),
+        )
+    return _mirrors[repo]
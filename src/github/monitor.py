@@ -1,70 +1,50 @@
-import requests
-from utils.helpers import comment_on_pull_request, summarize_issues, load_config
+import asyncio
+from github.client import get_client, close_client
+from github.comments import CommentManager
+from github.pipeline import Sink, create_pipeline
+from utils.helpers import load_config
+from utils.worker_pool import shutdown_analysis_pool
 
-def get_pull_request_issues():
-    """
-    Holt alle offenen Pull Requests und gibt eine Liste mit Issues zurück.
-    Jedes Element: (repo, pull, issues_summary)
-    """
+def get_repositories():
     config = load_config()
     if "github" not in config or "token" not in config["github"]:
         raise ValueError("Fehlende GitHub-Konfiguration in config.yaml")
-    token = config["github"]["token"]
-    repositories = config["github"].get("repositories", [])
-    headers = {"Authorization": f"token {token}"}
+    return config["github"].get("repositories", [])
 
-    results = []
-    for repo in repositories:
-        url = f"https://api.github.com/repos/{repo}/pulls"
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            pulls = response.json()
-            for pull in pulls:
-                pull_number = pull["number"]
-                files_url = pull["_links"]["self"]["href"] + "/files"
-                files_response = requests.get(files_url, headers=headers)
-                if files_response.status_code == 200:
-                    files = files_response.json()
-                    issues_summary = ""
-                    for file in files:
-                        file_path = file["filename"]
-                        issues_summary += f"\n**{file_path}**:\n{summarize_issues(file_path)}"
-                    results.append((repo, pull, issues_summary))
-        else:
-            print(f"Fehler beim Abrufen von {repo}: {response.status_code}")
-    return results
+class CommentSink(Sink):
+    """Hält das Analyseergebnis als einen einzigen Bot-Kommentar im Pull Request aktuell."""
 
-def monitor_repositories():
-    config = load_config()
-    if "github" not in config or "token" not in config["github"]:
-        raise ValueError("Fehlende GitHub-Konfiguration in config.yaml")
-    token = config["github"]["token"]
-    repositories = config["github"].get("repositories", [])
-    headers = {"Authorization": f"token {token}"}
+    name = "comment"
+
+    def __init__(self, client):
+        self.client = client
+        self.comments = CommentManager(client)
+
+    async def on_pull_request(self, result):
+        # Unveränderte Ergebnisse (z. B. nach einer 304-Antwort) gar nicht erst vergleichen
+        if not result.changed:
+            self.comments.skip()
+            return
+        await self.comments.upsert(result.repo, result.pull, result.issues_summary)
+
+    async def on_cycle_end(self):
+        self.comments.log_stats()
 
-    for repo in repositories:
-        url = f"https://api.github.com/repos/{repo}/pulls"
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            pulls = response.json()
-            print(f"Repository: {repo} - {len(pulls)} offene Pull Requests")
-            for pull in pulls:
-                pull_number = pull["number"]
-                files_url = pull["_links"]["self"]["href"] + "/files"
-                files_response = requests.get(files_url, headers=headers)
-                if files_response.status_code == 200:
-                    files = files_response.json()
-                    issues_summary = ""
-                    for file in files:
-                        file_path = file["filename"]
-                        issues_summary += f"\n**{file_path}**:\n{summarize_issues(file_path)}"
+async def monitor_repositories():
+    """Ein einzelner Prüfzyklus, der nur Kommentare schreibt (ohne Discord)."""
+    client = get_client()
+    pipeline = create_pipeline(client, [CommentSink(client)])
+    try:
+        await pipeline.run_cycle(get_repositories())
+    finally:
+        await pipeline.stop()
 
-                    if issues_summary.strip():
-                        # Kommentar im Pull Request hinzufügen
-                        comment = f"Automatische Prüfung abgeschlossen:\n{issues_summary}"
-                        comment_on_pull_request(repo, pull_number, comment, headers)
-        else:
-            print(f"Fehler beim Abrufen von {repo}: {response.status_code}")
+async def _main():
+    try:
+        await monitor_repositories()
+    finally:
+        await close_client()
+        shutdown_analysis_pool()
 
 if __name__ == "__main__":
-    monitor_repositories()
+    asyncio.run(_main())
@@ -0,0 +1,296 @@
+import asyncio
+from github.fetchers import RestFetcher, create_fetcher
+from github.mirror import get_mirror, mirror_enabled
+from github.repo_cache import get_repo_cache
+from utils.helpers import format_summary, load_config, get_analysis_cache
+from utils.diff import build_line_index, filter_findings, needs_analysis
+from utils.worker_pool import analyze_files_parallel
+from utils.metrics import get_metrics
+from utils.state_store import get_state_store
+from utils.logger import logger
+
+
+class PullRequestResult:
+    """Analyseergebnis eines Pull Requests, das an alle Sinks verteilt wird."""
+
+    def __init__(self, repo, pull, issues_summary, changed=True):
+        self.repo = repo
+        self.pull = pull
+        self.issues_summary = issues_summary
+        # False, wenn sich die Dateien seit dem letzten Zyklus nicht geändert haben (304)
+        self.changed = changed
+
+
+class Sink:
+    """Basisklasse für Empfänger der Pipeline-Ergebnisse (GitHub-Kommentare, Discord, ...)."""
+
+    name = "sink"
+
+    async def on_pull_request(self, result):
+        pass
+
+    async def on_issue(self, repo, issue):
+        pass
+
+    async def on_cycle_end(self):
+        pass
+
+
+class Pipeline:
+    """
+    Gemeinsame Verarbeitungskette für alle Pull Requests und Issues:
+
+        fetch -> diff -> analyze -> Sinks (comment, notify)
+
+    Die Stufen sind über begrenzte Queues verbunden; ist eine Stufe langsam, blockieren die
+    vorherigen (Backpressure), statt unbegrenzt Arbeit anzuhäufen. Jeder Pull Request wird
+    pro Zyklus genau einmal geholt und analysiert; jedes Ergebnis geht an alle Sinks.
+    """
+
+    def __init__(self, client, sinks, fetcher=None, queue_size=100, diff_workers=8, analyze_workers=4, repo_cache=None):
+        self.client = client
+        self.fetcher = fetcher or RestFetcher(client)
+        # Repository-Metadaten aus den Pull Requests für `/repo` vorhalten
+        self.repo_cache = repo_cache or get_repo_cache()
+        self.sinks = list(sinks)
+        self.diff_workers = diff_workers
+        self.analyze_workers = analyze_workers
+        self._pulls = asyncio.Queue(queue_size)    # fetch -> diff
+        self._jobs = asyncio.Queue(queue_size)     # diff -> analyze
+        self._results = asyncio.Queue(queue_size)  # analyze -> Verteilung an die Sinks
+        self._sink_queues = [asyncio.Queue(queue_size) for _ in self.sinks]
+        self._tasks = []
+        # Letzte Zusammenfassung pro `/files`-URL (bzw. URL@Head-SHA); bei 304 wird sie ohne erneute Analyse wiederverwendet
+        self._summaries = {}
+        # Während eines Abfragezyklus: {(Repository, "pulls"/"issues"): [updated_at fehlgeschlagener Elemente]}
+        self._failures = None
+        self.metrics = get_metrics()
+        queues = {"pulls": self._pulls, "jobs": self._jobs, "results": self._results}
+        queues.update({f"sink_{sink.name}": queue for sink, queue in zip(self.sinks, self._sink_queues)})
+        for name, queue in queues.items():
+            self.metrics.register_gauge("pipeline_queue_depth", queue.qsize, queue=name)
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks += [asyncio.create_task(self._worker(self._pulls, self._diff)) for _ in range(self.diff_workers)]
+        self._tasks += [asyncio.create_task(self._worker(self._jobs, self._analyze)) for _ in range(self.analyze_workers)]
+        self._tasks.append(asyncio.create_task(self._worker(self._results, self._dispatch)))
+        for sink, queue in zip(self.sinks, self._sink_queues):
+            self._tasks.append(asyncio.create_task(self._worker(queue, lambda item, sink=sink: self._deliver(sink, item))))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, queue, handler):
+        while True:
+            item = await queue.get()
+            try:
+                await handler(item)
+            except Exception as e:
+                logger.error("Fehler in der Pipeline (%s): %s", handler.__name__, str(e))
+            finally:
+                queue.task_done()
+
+    # Stufe 1: fetch
+
+    async def _fetch(self, repositories):
+        """
+        Gibt ({Repository: True, falls es Änderungen gab},
+        {(Repository, Art): neuester updated_at-Wert}) zurück.
+        """
+        activity = {}
+        watermarks = {}
+        async for snapshot in self.fetcher.fetch(repositories):
+            activity[snapshot.repo] = snapshot.active
+            self.repo_cache.put(snapshot.repository)
+            for kind, value in snapshot.watermarks.items():
+                watermarks[(snapshot.repo, kind)] = value
+            for pull, files in snapshot.pulls:
+                await self.submit_pull(snapshot.repo, pull, files)
+            for issue in snapshot.issues:
+                await self.submit_issue(snapshot.repo, issue)
+        return activity, watermarks
+
+    def _fail(self, repo, kind, item):
+        """Merkt sich ein nicht vollständig verarbeitetes Element, damit der Wasserstand davor bleibt."""
+        if self._failures is not None and item.get("updated_at"):
+            self._failures.setdefault((repo, kind), []).append(item["updated_at"])
+
+    def _advance_watermarks(self, watermarks):
+        """
+        Schreibt die Wasserstände des Zyklus fort. Ist ein Element in einer Stufe gescheitert,
+        bleibt der Wasserstand bei dessen `updated_at`, sodass es im nächsten Zyklus erneut geholt
+        wird – auch wenn GitHub die Liste dann mit 304 beantwortet.
+        """
+        for (repo, kind), latest in watermarks.items():
+            failed = self._failures.get((repo, kind))
+            self.fetcher.advance(repo, kind, min(failed) if failed else latest, retry=bool(failed))
+
+    async def submit_pull(self, repo, pull, files=None):
+        """
+        Reiht einen Pull Request zur Prüfung ein (blockiert, solange die Queue voll ist).
+        Ohne `files` holt die diff-Stufe die geänderten Dateien über `/pulls/N/files`.
+        """
+        self.repo_cache.observe_pull(pull)
+        await self._pulls.put((repo, pull, files))
+
+    async def submit_issue(self, repo, issue):
+        await self._results.put(("issue", (repo, issue)))
+
+    # Stufe 2: diff
+
+    async def _diff(self, item):
+        with self.metrics.span("pipeline_stage", stage="diff"):
+            try:
+                await self._diff_pull(*item)
+            except Exception:
+                self._fail(item[0], "pulls", item[1])
+                raise
+
+    async def _diff_pull(self, repo, pull, files):
+        files_url = pull["_links"]["self"]["href"] + "/files"
+        if files is None:
+            files, unchanged = await self._fetch_files(files_url)
+            if files is None:
+                logger.error("Fehler beim Abrufen der Dateien von %s", pull["html_url"])
+                self._fail(repo, "pulls", pull)
+                return
+            summary_key = files_url
+        else:
+            # Vorab geholte Dateien (GraphQL): unverändert, solange der Head-Commit gleich bleibt
+            summary_key = f"{files_url}@{pull['head']['sha']}"
+            unchanged = True
+            if mirror_enabled():
+                files = await get_mirror(repo).describe_files(pull["base"]["sha"], pull["head"]["sha"], files)
+
+        if unchanged and summary_key in self._summaries:
+            result = PullRequestResult(repo, pull, self._summaries[summary_key], changed=False)
+            await self._results.put(("pull_request", result))
+            return
+
+        line_index = {}
+        if load_config().get("monitoring", {}).get("diff_scope", True):
+            # Nur Funde auf geänderten Zeilen melden; Dateien ohne hinzugefügte Python-Zeilen überspringen
+            line_index = build_line_index(files)
+            files = [file for file in files if needs_analysis(file, line_index)]
+        await self._jobs.put((repo, pull, summary_key, files, line_index))
+
+    async def _fetch_files(self, files_url):
+        """
+        Holt alle Seiten von `/pulls/N/files`. Gibt (Dateien, unverändert) zurück;
+        unverändert heißt, dass jede Seite mit 304 beantwortet wurde.
+        """
+        files = []
+        unchanged = True
+        async for response in self.client.paginate(files_url):
+            if response.status != 200:
+                return None, False
+            unchanged = unchanged and response.not_modified
+            files.extend(response.data)
+        return files, unchanged
+
+    # Stufe 3: analyze
+
+    async def _analyze(self, item):
+        with self.metrics.span("pipeline_stage", stage="analyze"):
+            try:
+                await self._analyze_pull(*item)
+            except Exception:
+                self._fail(item[0], "pulls", item[1])
+                raise
+
+    async def _analyze_pull(self, repo, pull, summary_key, files, line_index):
+        materialize = None
+        if mirror_enabled():
+            # Dateien zum Head-Commit aus dem lokalen Mirror holen statt über die API
+            head_sha = pull["head"]["sha"]
+            materialize = lambda paths: get_mirror(repo).checkout(head_sha, paths)
+
+        results = await analyze_files_parallel(
+            [(file["filename"], file.get("sha")) for file in files],
+            materialize=materialize,
+        )
+        issues_summary = ""
+        for file in files:
+            file_path = file["filename"]
+            result = filter_findings(results[file_path], line_index.get(file_path))
+            issues_summary += f"\n**{file_path}**:\n{format_summary(result)}"
+
+        self._summaries[summary_key] = issues_summary
+        await self._results.put(("pull_request", PullRequestResult(repo, pull, issues_summary)))
+
+    # Stufe 4: Verteilung an comment/notify
+
+    async def _dispatch(self, item):
+        for queue in self._sink_queues:
+            await queue.put(item)
+
+    async def _deliver(self, sink, item):
+        kind, payload = item
+        try:
+            with self.metrics.span("sink", sink=sink.name):
+                if kind == "pull_request":
+                    await sink.on_pull_request(payload)
+                else:
+                    await sink.on_issue(*payload)
+        except Exception as e:
+            logger.error("Fehler im Sink %s: %s", sink.name, str(e))
+            if kind == "pull_request":
+                self._fail(payload.repo, "pulls", payload.pull)
+            else:
+                self._fail(payload[0], "issues", payload[1])
+
+    async def join(self):
+        """Wartet, bis alle eingereihten Elemente alle Stufen durchlaufen haben."""
+        for queue in [self._pulls, self._jobs, self._results, *self._sink_queues]:
+            await queue.join()
+
+    async def drain(self):
+        """Wartet, bis alles verarbeitet ist, und schließt den Durchlauf bei allen Sinks ab."""
+        await self.join()
+        for sink in self.sinks:
+            try:
+                await sink.on_cycle_end()
+            except Exception as e:
+                logger.error("Fehler im Sink %s: %s", sink.name, str(e))
+        get_state_store().commit()
+        self.client.flush_cache()
+        get_analysis_cache().flush()
+
+    async def run_cycle(self, repositories):
+        """
+        Ein Prüfzyklus: alle Repositories parallel holen und warten, bis alles verarbeitet ist.
+        Gibt {Repository: True, falls es Änderungen gab} zurück.
+        """
+        self.start()
+        with self.metrics.span("cycle"):
+            self._failures = {}
+            try:
+                activity, watermarks = await self._fetch(repositories)
+                await self.join()
+                # Wasserstände erst setzen, wenn jedes Element alle Stufen durchlaufen hat; so schreibt
+                # auch ein zwischenzeitliches commit() (Webhook, Gateway) keinen vorläufigen Stand fest
+                self._advance_watermarks(watermarks)
+            finally:
+                self._failures = None
+            await self.drain()
+        logger.info("Analyse-Cache: %s", get_analysis_cache().stats())
+        return activity
+
+
+def create_pipeline(client, sinks):
+    """Erstellt eine Pipeline mit den Einstellungen unter `monitoring.pipeline` und `github.fetch_backend`."""
+    config = load_config()
+    pipeline_config = config.get("monitoring", {}).get("pipeline", {})
+    return Pipeline(
+        client,
+        sinks,
+        fetcher=create_fetcher(client, config["github"]),
+        queue_size=pipeline_config.get("queue_size", 100),
+        diff_workers=pipeline_config.get("diff_workers", 8),
+        analyze_workers=pipeline_config.get("analyze_workers", 4),
+    )
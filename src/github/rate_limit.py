@@ -0,0 +1,75 @@
+import asyncio
+import time
+from utils.logger import logger
+
+
+class RateLimitBudget:
+    """
+    Verfolgt das verbleibende GitHub-API-Budget anhand von `X-RateLimit-Remaining`/`-Reset`
+    und `Retry-After`. Ist das Budget bis auf die Reserve aufgebraucht, werden weitere Anfragen
+    bis zum Reset zurückgestellt, statt mit 403 fehlzuschlagen.
+    """
+
+    def __init__(self, reserve=100):
+        self.reserve = reserve
+        self.limit = None
+        self.remaining = None
+        self.reset_at = 0.0
+        self._blocked_until = 0.0
+
+    def update(self, headers):
+        """Übernimmt die Rate-Limit-Header einer Antwort."""
+        if "X-RateLimit-Remaining" in headers:
+            self.remaining = int(headers["X-RateLimit-Remaining"])
+        if "X-RateLimit-Limit" in headers:
+            self.limit = int(headers["X-RateLimit-Limit"])
+        if "X-RateLimit-Reset" in headers:
+            self.reset_at = float(headers["X-RateLimit-Reset"])
+
+    def block(self, status, headers):
+        """
+        Wertet eine 403/429-Antwort aus. Gibt True zurück, wenn sie durch das Rate-Limit
+        verursacht wurde und die Anfrage später wiederholt werden soll.
+        """
+        now = time.time()
+        if "Retry-After" in headers:
+            self._blocked_until = now + float(headers["Retry-After"])
+        elif status in (403, 429) and self.remaining == 0:
+            self._blocked_until = max(self.reset_at, now + 1)
+        else:
+            return False
+        logger.warning("GitHub-Rate-Limit erreicht, Anfragen pausieren %.0f s", self._blocked_until - now)
+        return True
+
+    def delay(self):
+        """Sekunden, die die nächste Anfrage warten muss (0 = sofort)."""
+        now = time.time()
+        delay = max(0.0, self._blocked_until - now)
+        if self.remaining is not None and self.remaining <= self.reserve and self.reset_at > now:
+            delay = max(delay, self.reset_at - now)
+        return delay
+
+    async def wait(self):
+        delay = self.delay()
+        if delay > 0:
+            logger.info("API-Budget knapp (%s verbleibend), Anfrage um %.0f s zurückgestellt", self.remaining, delay)
+            await asyncio.sleep(delay)
+
+    def pressure(self):
+        """
+        Faktor >= 1, um den Abfrageintervalle gestreckt werden: 1 bei mindestens halbem Budget,
+        bis zu 4, wenn das Budget fast aufgebraucht ist.
+        """
+        if not self.limit or self.remaining is None or time.time() >= self.reset_at:
+            return 1.0
+        fraction = self.remaining / self.limit
+        if fraction >= 0.5:
+            return 1.0
+        return min(4.0, 0.5 / max(fraction, 0.125))
+
+    def snapshot(self):
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset_in": max(0, round(self.reset_at - time.time())) if self.reset_at else None,
+        }
@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+from utils.helpers import load_config
+from utils.metrics import get_metrics
+
+# Felder, die `/repo` anzeigt; nur vollständige Repository-Objekte werden übernommen
+REPO_FIELDS = ("full_name", "description", "stargazers_count", "forks_count", "open_issues_count", "owner")
+
+
+class RepoCache:
+    """
+    In-Memory-Cache für Repository-Metadaten (TTL + LRU).
+    Gefüllt wird er von `/repo` und bei jeder Abfrage durch die Pipeline (aus `base.repo` der
+    Pull Requests – auch aus dem zwischengespeicherten Inhalt einer 304-Antwort –, über
+    `GET /repos/{repo}` oder aus der GraphQL-Abfrage), sodass überwachte Repositories ohne
+    zusätzlichen API-Aufruf beantwortet werden können. Mit einem `scheduler` bleibt ein Eintrag
+    bis zur nächsten geplanten Abfrage plus `ttl` gültig, sonst `ttl` Sekunden.
+    """
+
+    def __init__(self, ttl=300, max_entries=512, scheduler=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.scheduler = scheduler
+        self._entries = OrderedDict()
+        self.metrics = get_metrics()
+        self.metrics.register_gauge("repo_cache_entries", lambda: len(self._entries))
+
+    @staticmethod
+    def _key(repo):
+        return repo.lower()
+
+    def _ttl_for(self, repo):
+        interval = self.scheduler.interval(repo) if self.scheduler is not None else None
+        return self.ttl + (interval or 0)
+
+    def get(self, repo, now=None):
+        """Gibt die Metadaten zurück, solange sie gültig sind (siehe Klassenbeschreibung), sonst None."""
+        now = now or time.monotonic()
+        key = self._key(repo)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= now - self._ttl_for(repo):
+            self.metrics.inc("repo_cache", result="miss")
+            return None
+        self._entries.move_to_end(key)
+        self.metrics.inc("repo_cache", result="hit")
+        return entry[1]
+
+    def put(self, data, now=None):
+        """Speichert ein Repository-Objekt der GitHub-API (ältester Eintrag fällt bei Überlauf heraus)."""
+        if not data or any(field not in data for field in REPO_FIELDS):
+            return
+        key = self._key(data["full_name"])
+        self._entries[key] = (now or time.monotonic(), {field: data[field] for field in REPO_FIELDS})
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def observe_pull(self, pull):
+        """Übernimmt das Repository aus einem Pull Request (`base.repo`), falls vollständig vorhanden."""
+        self.put((pull.get("base") or {}).get("repo"))
+
+    async def fetch(self, client, repo):
+        """Gibt die Metadaten aus dem Cache oder über `GET /repos/{repo}` zurück; None, falls unbekannt."""
+        data = self.get(repo)
+        if data is not None:
+            return data
+        response = await client.get(f"repos/{repo}")
+        if response.status != 200:
+            return None
+        self.put(response.data)
+        return response.data
+
+    def names(self):
+        """Namen aller zwischengespeicherten Repositories (auch abgelaufene), zuletzt genutzte zuerst."""
+        return [data["full_name"] for _, data in reversed(self._entries.values())]
+
+
+_repo_cache = None
+
+
+def get_repo_cache():
+    """Gibt den gemeinsam genutzten Repository-Cache zurück (Einstellungen unter `github.repo_cache`)."""
+    global _repo_cache
+    if _repo_cache is None:
+        cache_config = load_config().get("github", {}).get("repo_cache", {})
+        _repo_cache = RepoCache(
+            ttl=cache_config.get("ttl", 300),
+            max_entries=cache_config.get("max_entries", 512),
+        )
+    return _repo_cache
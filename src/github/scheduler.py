@@ -0,0 +1,94 @@
+import time
+from utils.helpers import load_config
+
+
+class RepoScheduler:
+    """
+    Adaptives Abfrageintervall pro Repository.
+    Repositories mit Änderungen werden häufiger abgefragt (Intervall halbiert), ruhige seltener
+    (Intervall verdoppelt, bis `max_interval`). Bei knappem API-Budget werden alle Intervalle
+    zusätzlich gestreckt.
+    """
+
+    def __init__(self, repositories, budget=None, base_interval=300, min_interval=60, max_interval=3600):
+        self.budget = budget
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._intervals = {}
+        self._next_due = {}
+        self.set_repositories(repositories)
+
+    def set_repositories(self, repositories):
+        now = time.time()
+        for repo in repositories:
+            self._intervals.setdefault(repo, self.base_interval)
+            self._next_due.setdefault(repo, now)
+        for repo in set(self._intervals) - set(repositories):
+            del self._intervals[repo]
+            del self._next_due[repo]
+
+    def due(self, now=None):
+        """Gibt die Repositories zurück, die jetzt abgefragt werden sollen."""
+        now = now or time.time()
+        return [repo for repo, due in self._next_due.items() if due <= now]
+
+    def seconds_until_next(self, now=None):
+        now = now or time.time()
+        if not self._next_due:
+            return self.base_interval
+        return max(0.0, min(self._next_due.values()) - now)
+
+    def record(self, repo, active, now=None):
+        """Passt das Intervall nach einer Abfrage an (`active` = es gab Änderungen)."""
+        if repo not in self._intervals:
+            return
+        now = now or time.time()
+        interval = self._intervals[repo]
+        if active:
+            interval = max(self.min_interval, interval / 2)
+        else:
+            interval = min(self.max_interval, interval * 2)
+        self._intervals[repo] = interval
+        pressure = self.budget.pressure() if self.budget else 1.0
+        self._next_due[repo] = now + interval * pressure
+
+    def interval(self, repo):
+        """Aktueller Abstand zwischen zwei Abfragen von `repo` in Sekunden (inkl. Budget-Streckung), sonst None."""
+        repo = next((name for name in self._intervals if name.lower() == repo.lower()), None)
+        if repo is None:
+            return None
+        pressure = self.budget.pressure() if self.budget else 1.0
+        return self._intervals[repo] * pressure
+
+    def snapshot(self, now=None):
+        """Aktuelle Intervalle und Restzeit bis zur nächsten Abfrage pro Repository."""
+        now = now or time.time()
+        return {
+            repo: {
+                "interval": round(self._intervals[repo]),
+                "next_in": max(0, round(self._next_due[repo] - now)),
+            }
+            for repo in self._intervals
+        }
+
+
+_scheduler = None
+
+
+def get_scheduler(repositories=None, budget=None, base_interval=None, min_interval=None, max_interval=None):
+    """
+    Gibt den gemeinsam genutzten Scheduler zurück (Einstellungen unter `monitoring.schedule`).
+    `base_interval`/`min_interval`/`max_interval` überschreiben die Konfiguration, z. B. im Webhook-Modus.
+    """
+    global _scheduler
+    if _scheduler is None:
+        schedule_config = load_config().get("monitoring", {}).get("schedule", {})
+        _scheduler = RepoScheduler(
+            repositories or [],
+            budget=budget,
+            base_interval=base_interval or schedule_config.get("base_interval", 300),
+            min_interval=min_interval or schedule_config.get("min_interval", 60),
+            max_interval=max_interval or schedule_config.get("max_interval", 3600),
+        )
+    return _scheduler
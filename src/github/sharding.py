@@ -0,0 +1,298 @@
+import asyncio
+import bisect
+import hashlib
+import math
+import os
+import socket
+import sqlite3
+import time
+from github.pipeline import PullRequestResult, Sink
+from github.repo_cache import get_repo_cache
+from utils.logger import logger
+
+
+def _hash(value):
+    return int(hashlib.md5(value.encode("utf-8")).hexdigest()[:16], 16)
+
+
+class HashRing:
+    """
+    Konsistentes Hashing von Repositories auf eine feste Anzahl Shards.
+    Jeder Shard erhält `replicas` virtuelle Punkte auf dem Ring; ändert sich die Shard-Anzahl,
+    wechselt nur ein kleiner Teil der Repositories den Shard.
+    """
+
+    def __init__(self, shard_count, replicas=64):
+        self.shard_count = shard_count
+        self._points = sorted(
+            (_hash(f"shard-{shard}#{replica}"), shard)
+            for shard in range(shard_count)
+            for replica in range(replicas)
+        )
+        self._keys = [point for point, _ in self._points]
+
+    def shard_for(self, repo):
+        index = bisect.bisect(self._keys, _hash(repo)) % len(self._points)
+        return self._points[index][1]
+
+
+class ShardLeases:
+    """
+    Verteilt die Shards über Leases in der gemeinsamen SQLite-Datenbank auf alle laufenden Instanzen.
+    Jede Instanz meldet sich per Heartbeat an, verlängert ihre Leases und übernimmt freie oder
+    abgelaufene Shards bis zu ihrem fairen Anteil (Shards / lebende Instanzen). Hat sie mehr als
+    diesen Anteil, gibt sie den Überschuss frei. Fällt eine Instanz aus, laufen ihre Leases nach
+    `ttl` Sekunden ab und werden beim nächsten Heartbeat der anderen übernommen.
+    """
+
+    def __init__(self, db_path, worker_id, shard_count, ttl=60):
+        self.worker_id = worker_id
+        self.shard_count = shard_count
+        self.ttl = ttl
+        self.owned = set()
+        # Der Heartbeat läuft in einem Thread (asyncio.to_thread), nie parallel
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shard_workers (
+                worker_id TEXT PRIMARY KEY,
+                heartbeat_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shard_leases (
+                shard INTEGER PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+
+    def heartbeat(self, now=None):
+        """Verlängert, übernimmt und gibt Leases frei. Gibt die Menge der eigenen Shards zurück."""
+        now = now or time.time()
+        # BEGIN IMMEDIATE sperrt die Datenbank für andere Schreiber bis zum Ende der Transaktion
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO shard_workers (worker_id, heartbeat_at) VALUES (?, ?)",
+                (self.worker_id, now),
+            )
+            self._conn.execute("DELETE FROM shard_workers WHERE heartbeat_at <= ?", (now - self.ttl,))
+            (live,) = self._conn.execute("SELECT COUNT(*) FROM shard_workers").fetchone()
+            target = math.ceil(self.shard_count / max(1, live))
+
+            leases = dict(
+                (shard, (owner, expires_at))
+                for shard, owner, expires_at in self._conn.execute("SELECT shard, owner, expires_at FROM shard_leases")
+            )
+            mine = sorted(
+                shard for shard, (owner, expires_at) in leases.items()
+                if owner == self.worker_id and expires_at > now and shard < self.shard_count
+            )
+            # Überschuss freigeben, damit neu gestartete Instanzen Shards bekommen
+            released = mine[target:]
+            mine = mine[:target]
+            free = [
+                shard for shard in range(self.shard_count)
+                if shard not in leases or leases[shard][1] <= now or shard in released
+            ]
+            acquired = [shard for shard in free if shard not in released][:max(0, target - len(mine))]
+            mine += acquired
+
+            self._conn.executemany(
+                "DELETE FROM shard_leases WHERE shard = ? AND owner = ?",
+                [(shard, self.worker_id) for shard in released],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO shard_leases (shard, owner, expires_at) VALUES (?, ?, ?)",
+                [(shard, self.worker_id, now + self.ttl) for shard in mine],
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        owned = set(mine)
+        if owned != self.owned:
+            logger.info(
+                "Shards von %s: %s (%d Instanzen, Anteil %d)",
+                self.worker_id, sorted(owned), live, target,
+            )
+        self.owned = owned
+        return owned
+
+    def release(self):
+        """Gibt alle Leases frei (beim geordneten Beenden), damit andere sofort übernehmen können."""
+        with self._conn:
+            self._conn.execute("DELETE FROM shard_leases WHERE owner = ?", (self.worker_id,))
+            self._conn.execute("DELETE FROM shard_workers WHERE worker_id = ?", (self.worker_id,))
+        self.owned = set()
+
+    def close(self):
+        self._conn.close()
+
+
+class ShardCoordinator:
+    """Verbindet Hash-Ring und Leases: welche der konfigurierten Repositories diese Instanz prüft."""
+
+    def __init__(self, repositories, leases, ring=None):
+        self.repositories = list(repositories)
+        self.leases = leases
+        self.ring = ring or HashRing(leases.shard_count)
+
+    def heartbeat(self):
+        owned = self.leases.heartbeat()
+        return [repo for repo in self.repositories if self.ring.shard_for(repo) in owned]
+
+    def owns(self, repo):
+        """True, wenn diese Instanz den Shard des Repositories hält (Stand des letzten Heartbeats)."""
+        return self.ring.shard_for(repo) in self.leases.owned
+
+    async def run(self, scheduler, interval):
+        """Heartbeat-Schleife; übergibt dem Scheduler nach jeder Runde die eigenen Repositories."""
+        try:
+            while True:
+                try:
+                    scheduler.set_repositories(await asyncio.to_thread(self.heartbeat))
+                except Exception as e:
+                    logger.error("Fehler beim Shard-Heartbeat: %s", str(e))
+                await asyncio.sleep(interval)
+        finally:
+            self.leases.release()
+
+
+class ForwardSink(Sink):
+    """
+    Sink der Worker-Instanzen: reiht Ergebnisse im gemeinsamen Zustandsspeicher für das Gateway ein.
+    Sie werden mit den Wasserständen des Zyklus in einer Transaktion geschrieben (Pipeline.drain).
+    """
+
+    name = "forward"
+
+    def __init__(self, store):
+        self.store = store
+
+    async def on_pull_request(self, result):
+        self.store.forward_result({
+            "kind": "pull_request",
+            "repo": result.repo,
+            "pull": result.pull,
+            "issues_summary": result.issues_summary,
+            "changed": result.changed,
+        })
+
+    async def on_issue(self, repo, issue):
+        self.store.forward_result({"kind": "issue", "repo": repo, "issue": issue})
+
+
+class ResultRelay:
+    """
+    Läuft im Gateway (der einzigen Instanz mit Discord-Verbindung) und übergibt die Ergebnisse
+    der Worker an die lokalen Sinks, als kämen sie aus der eigenen Pipeline.
+    """
+
+    def __init__(self, store, sinks, poll_interval=2):
+        self.store = store
+        self.sinks = list(sinks)
+        self.poll_interval = poll_interval
+
+    async def relay(self):
+        """Verarbeitet alle wartenden Ergebnisse; gibt ihre Anzahl zurück."""
+        rows = self.store.forwarded_results()
+        if not rows:
+            return 0
+        for _, payload in rows:
+            if payload["kind"] == "pull_request":
+                # Auch Repositories der Worker beantwortet `/repo` aus dem Cache
+                get_repo_cache().observe_pull(payload["pull"])
+            for sink in self.sinks:
+                try:
+                    if payload["kind"] == "pull_request":
+                        await sink.on_pull_request(PullRequestResult(
+                            payload["repo"], payload["pull"], payload["issues_summary"], payload["changed"]
+                        ))
+                    else:
+                        await sink.on_issue(payload["repo"], payload["issue"])
+                except Exception as e:
+                    logger.error("Fehler im Sink %s: %s", sink.name, str(e))
+        for sink in self.sinks:
+            await sink.on_cycle_end()
+        self.store.remove_results([row_id for row_id, _ in rows])
+        logger.info("%d Ergebnisse von Workern übernommen", len(rows))
+        return len(rows)
+
+    async def run(self):
+        while True:
+            try:
+                if await self.relay():
+                    continue
+            except Exception as e:
+                logger.error("Fehler beim Übernehmen der Worker-Ergebnisse: %s", str(e))
+            await asyncio.sleep(self.poll_interval)
+
+
+class WebhookRouter:
+    """
+    Leitet Webhook-Ereignisse im Gateway an den Eigentümer des Shards weiter, damit nie zwei
+    Instanzen denselben Pull Request gleichzeitig prüfen und kommentieren.
+    """
+
+    def __init__(self, coordinator, store):
+        self.coordinator = coordinator
+        self.store = store
+
+    def forward(self, event, repo, payload):
+        """Gibt True zurück, wenn das Ereignis an eine andere Instanz weitergeleitet wurde."""
+        if self.coordinator.owns(repo):
+            return False
+        self.store.route_event(
+            self.coordinator.ring.shard_for(repo),
+            {"event": event, "repo": repo, "payload": payload},
+        )
+        return True
+
+
+class EventInbox:
+    """Übernimmt die an die eigenen Shards weitergeleiteten Webhook-Ereignisse (Gegenstück zu WebhookRouter)."""
+
+    def __init__(self, store, coordinator, dispatcher, poll_interval=2):
+        self.store = store
+        self.coordinator = coordinator
+        self.dispatcher = dispatcher
+        self.poll_interval = poll_interval
+
+    def deliver(self):
+        """Reicht alle wartenden Ereignisse an den Dispatcher weiter; gibt ihre Anzahl zurück."""
+        rows = self.store.routed_events(self.coordinator.leases.owned)
+        for _, event in rows:
+            self.dispatcher.dispatch(event["event"], event["repo"], event["payload"])
+        self.store.remove_events([row_id for row_id, _ in rows])
+        return len(rows)
+
+    async def run(self):
+        while True:
+            try:
+                if self.deliver():
+                    logger.info("Weitergeleitete Webhook-Ereignisse übernommen")
+            except Exception as e:
+                logger.error("Fehler beim Übernehmen weitergeleiteter Webhook-Ereignisse: %s", str(e))
+            await asyncio.sleep(self.poll_interval)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def create_coordinator(repositories, sharding_config, db_path, worker_id=None):
+    """Erstellt den Shard-Koordinator mit den Einstellungen unter `sharding`."""
+    leases = ShardLeases(
+        db_path,
+        worker_id or sharding_config.get("worker_id") or default_worker_id(),
+        shard_count=sharding_config.get("shards", 16),
+        ttl=sharding_config.get("lease_ttl", 60),
+    )
+    return ShardCoordinator(repositories, leases)
@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import aiohttp
+from aiohttp import web
+from github.mirror import get_mirror, mirror_enabled
+from utils.logger import logger
+
+# Aktionen, bei denen ein Pull Request (erneut) geprüft wird
+PULL_REQUEST_ACTIONS = {"opened", "reopened", "synchronize", "ready_for_review"}
+ISSUE_ACTIONS = {"opened", "reopened"}
+
+
+def sign_payload(secret, body):
+    """Berechnet den Wert für `X-Hub-Signature-256` (so wie GitHub ihn sendet)."""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, body, signature):
+    if not signature:
+        return False
+    return hmac.compare_digest(sign_payload(secret, body), signature)
+
+
+class EventDispatcher:
+    """Speist Webhook-Ereignisse im Hintergrund in die Pipeline ein (vom Empfänger oder aus dem Shard-Postfach)."""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self._tasks = set()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, submit):
+        self.pipeline.start()
+        await submit
+        # Ergebnisse sofort verarbeiten und speichern, nicht erst im nächsten Abgleich
+        await self.pipeline.drain()
+
+    def dispatch(self, event, repo, payload):
+        """Verarbeitet ein Ereignis; gibt False zurück, wenn es für den Bot keine Rolle spielt."""
+        action = payload.get("action")
+        if event == "pull_request" and action in PULL_REQUEST_ACTIONS:
+            self._spawn(self._process(self.pipeline.submit_pull(repo, payload["pull_request"])))
+        elif event == "issues" and action in ISSUE_ACTIONS:
+            self._spawn(self._process(self.pipeline.submit_issue(repo, payload["issue"])))
+        elif event == "push" and mirror_enabled():
+            # Neue Commits vorab in den Mirror holen
+            self._spawn(get_mirror(repo).fetch())
+        else:
+            return False
+        return True
+
+    def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+
+class WebhookServer:
+    """
+    HTTP-Endpunkt für GitHub-Webhooks, der neben dem Discord-Client im selben Event-Loop läuft.
+    Ereignisse werden sofort mit 202 bestätigt und im Hintergrund in die Pipeline eingespeist.
+    Mit einem `router` (Shard-Betrieb) gehen Ereignisse für Repositories anderer Instanzen an
+    deren Postfach, statt hier verarbeitet zu werden.
+    """
+
+    def __init__(self, pipeline, secret, repositories, host="0.0.0.0", port=8080, path="/webhook", router=None):
+        self.pipeline = pipeline
+        self.secret = secret
+        self.repositories = set(repositories)
+        self.host = host
+        self.port = port
+        self.path = path
+        self.router = router
+        self.dispatcher = EventDispatcher(pipeline)
+        self._runner = None
+
+    async def handle(self, request):
+        body = await request.read()
+        if not verify_signature(self.secret, body, request.headers.get("X-Hub-Signature-256")):
+            logger.warning("Webhook mit ungültiger Signatur abgelehnt")
+            return web.Response(status=401, text="invalid signature")
+
+        event = request.headers.get("X-GitHub-Event", "")
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return web.Response(status=400, text="invalid payload")
+        if event == "ping":
+            return web.Response(text="pong")
+
+        repo = payload.get("repository", {}).get("full_name")
+        if repo not in self.repositories:
+            return web.Response(status=202, text="ignored")
+        logger.info("Webhook empfangen: %s/%s für %s", event, payload.get("action"), repo)
+
+        if self.router is not None and self.router.forward(event, repo, payload):
+            return web.Response(status=202, text="forwarded")
+        self.dispatcher.dispatch(event, repo, payload)
+        return web.Response(status=202, text="accepted")
+
+    async def start(self):
+        self.pipeline.start()
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info("Webhook-Empfänger läuft auf %s:%s%s", self.host, self.port, self.path)
+
+    async def stop(self):
+        self.dispatcher.stop()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def replay(url, secret, event, payload_path):
+    """Sendet eine aufgezeichnete Webhook-Payload signiert an einen (lokalen) Empfänger."""
+    with open(payload_path, "rb") as file:
+        body = file.read()
+    headers = {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event,
+        "X-Hub-Signature-256": sign_payload(secret, body),
+    }
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, data=body, headers=headers) as response:
+            return response.status, await response.text()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aufgezeichnete GitHub-Webhook-Payload erneut senden")
+    parser.add_argument("event", help="z. B. pull_request, issues, push")
+    parser.add_argument("payload", help="Pfad zur JSON-Payload")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/webhook")
+    parser.add_argument("--secret", required=True)
+    args = parser.parse_args()
+    print(*asyncio.run(replay(args.url, args.secret, args.event, args.payload)))
@@ -0,0 +1,103 @@
+import threading
+import time
+from flake8.api import legacy as flake8
+from flake8.formatting.base import BaseFormatter
+from bandit.core import config as bandit_config
+from bandit.core import manager as bandit_manager
+from utils.logger import logger
+
+# Wird in den Cache-Schlüssel aufgenommen; bei Änderungen am Ergebnisformat erhöhen
+ENGINE_VERSION = 1
+
+
+def _collecting_formatter(sink):
+    """Erzeugt eine flake8-Formatter-Klasse, die alle Verstöße in `sink` sammelt statt sie auszugeben."""
+
+    class CollectingFormatter(BaseFormatter):
+        def handle(self, error):
+            sink.append({
+                "code": error.code,
+                "line": error.line_number,
+                "column": error.column_number,
+                "text": error.text,
+            })
+
+        def format(self, error):
+            return None
+
+    return CollectingFormatter
+
+
+class AnalysisEngine:
+    """
+    Führt flake8 und bandit im selben Prozess aus, statt pro Datei zwei Interpreter zu starten.
+    Die flake8-StyleGuide und die bandit-Konfiguration werden einmal erstellt und für alle
+    Dateien wiederverwendet.
+    """
+
+    def __init__(self, flake8_options=None, bandit_options=None):
+        self._lock = threading.RLock()
+        self._flake8_findings = []
+        self._style_guide = flake8.get_style_guide(**(flake8_options or {}))
+        self._style_guide.init_report(_collecting_formatter(self._flake8_findings))
+        bandit_options = bandit_options or {}
+        self._bandit_config = bandit_config.BanditConfig()
+        self._bandit_profile = {
+            "include": set(bandit_options.get("tests", [])),
+            "exclude": set(bandit_options.get("skips", [])),
+        }
+
+    def check_quality(self, path):
+        """Gibt die flake8-Funde einer Datei zurück."""
+        with self._lock:
+            del self._flake8_findings[:]
+            self._style_guide.check_files([path])
+            return list(self._flake8_findings)
+
+    def check_security(self, path):
+        """Gibt die bandit-Funde einer Datei zurück."""
+        manager = bandit_manager.BanditManager(
+            self._bandit_config, "file", quiet=True, profile=self._bandit_profile
+        )
+        manager.discover_files([path])
+        manager.run_tests()
+        return [
+            {
+                "code": issue.test_id,
+                "line": issue.lineno,
+                "severity": issue.severity,
+                "confidence": issue.confidence,
+                "text": issue.text,
+            }
+            for issue in manager.get_issue_list()
+        ]
+
+    def analyze_file(self, path):
+        """
+        Prüft eine Datei mit beiden Tools.
+        Gibt {"quality": [...], "security": [...], "duration": Sekunden,
+        "timings": {"flake8": Sekunden, "bandit": Sekunden}} zurück.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            quality = self.check_quality(path)
+            checked = time.perf_counter()
+            security = self.check_security(path)
+            duration = time.perf_counter() - start
+        logger.info("Analyse von %s in %.3f s (%d/%d Funde)", path, duration, len(quality), len(security))
+        return {
+            "quality": quality,
+            "security": security,
+            "duration": round(duration, 4),
+            "timings": {"flake8": round(checked - start, 4), "bandit": round(start + duration - checked, 4)},
+        }
+
+    def analyze_files(self, paths):
+        """Prüft alle Dateien eines Pull Requests in einem Durchlauf. Gibt {Pfad: Ergebnis} zurück."""
+        start = time.perf_counter()
+        results = {path: self.analyze_file(path) for path in paths}
+        if paths:
+            logger.info(
+                "%d Dateien in %.3f s analysiert", len(paths), time.perf_counter() - start
+            )
+        return results
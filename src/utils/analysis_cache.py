@@ -0,0 +1,109 @@
+import json
+import sqlite3
+import threading
+import time
+from utils.logger import logger
+
+
+class AnalysisCache:
+    """
+    Persistenter Cache für Analyseergebnisse, adressiert über den Git-Blob-SHA einer Datei
+    und einen Schlüssel für Analyzer-Version und -Konfiguration.
+    Unveränderte Dateien werden dadurch nie erneut geprüft. Überschreitet der Cache
+    `max_entries`, werden die am längsten nicht genutzten Einträge entfernt (LRU).
+    Mehrere Prozesse können dieselbe Datei nutzen: Treffer werden nur vorgemerkt und mit dem
+    nächsten Schreibzugriff bzw. `flush()` festgehalten; ist die Datenbank gesperrt, gilt der
+    Zugriff als Fehlschlag, statt die Analyse abzubrechen.
+    """
+
+    def __init__(self, db_path, max_entries=20000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Zuletzt genutzte Einträge: {(Blob-SHA, Analyzer-Schlüssel): Zeitpunkt}
+        self._touched = {}
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analysis (
+                blob_sha TEXT NOT NULL,
+                analyzer_key TEXT NOT NULL,
+                result TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (blob_sha, analyzer_key)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS analysis_last_used ON analysis (last_used)")
+        self._conn.commit()
+
+    def get(self, blob_sha, analyzer_key):
+        """Gibt das gespeicherte Ergebnis zurück oder None."""
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT result FROM analysis WHERE blob_sha = ? AND analyzer_key = ?",
+                    (blob_sha, analyzer_key),
+                ).fetchone()
+            except sqlite3.OperationalError as e:
+                logger.error("Analyse-Cache nicht lesbar: %s", str(e))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[(blob_sha, analyzer_key)] = time.time()
+            return json.loads(row[0])
+
+    def put(self, blob_sha, analyzer_key, result):
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO analysis (blob_sha, analyzer_key, result, last_used) VALUES (?, ?, ?, ?)",
+                        (blob_sha, analyzer_key, json.dumps(result), time.time()),
+                    )
+                    self._write_touched()
+                    self._evict()
+            except sqlite3.OperationalError as e:
+                # Der Cache ist optional; das Ergebnis selbst bleibt gültig
+                logger.error("Analyse-Cache nicht beschreibbar: %s", str(e))
+
+    def _write_touched(self):
+        self._conn.executemany(
+            "UPDATE analysis SET last_used = ? WHERE blob_sha = ? AND analyzer_key = ?",
+            [(used, blob_sha, key) for (blob_sha, key), used in self._touched.items()],
+        )
+        self._touched = {}
+
+    def flush(self):
+        """Hält die vorgemerkten Zugriffszeiten fest (einmal pro Zyklus)."""
+        with self._lock:
+            if not self._touched:
+                return
+            try:
+                with self._conn:
+                    self._write_touched()
+            except sqlite3.OperationalError as e:
+                logger.error("Analyse-Cache nicht beschreibbar: %s", str(e))
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM analysis").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM analysis WHERE rowid IN (SELECT rowid FROM analysis ORDER BY last_used LIMIT ?)",
+                (overflow,),
+            )
+            logger.info("Analyse-Cache: %d alte Einträge entfernt", overflow)
+
+    def stats(self):
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM analysis").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": count}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,69 @@
+import re
+
+# Kopfzeile eines Hunks, z. B. "@@ -10,7 +10,8 @@ def foo():"
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+ANALYZED_EXTENSIONS = (".py",)
+
+
+def changed_lines(patch):
+    """
+    Gibt die Zeilennummern (in der neuen Dateiversion) zurück, die ein Patch hinzufügt oder ändert.
+    `patch` ist das Feld `patch` aus der `/pulls/N/files`-Antwort von GitHub.
+    """
+    lines = set()
+    if not patch:
+        return lines
+    current = None
+    for row in patch.splitlines():
+        match = HUNK_HEADER.match(row)
+        if match:
+            current = int(match.group(1))
+            continue
+        if current is None or row.startswith("\\"):
+            # "\ No newline at end of file"
+            continue
+        if row.startswith("+"):
+            lines.add(current)
+            current += 1
+        elif row.startswith("-"):
+            continue
+        else:
+            current += 1
+    return lines
+
+
+def build_line_index(files):
+    """
+    Baut aus der `/files`-Antwort einen Index {Dateiname: geänderte Zeilen}.
+    Dateien ohne `patch` (z. B. zu groß oder binär) erhalten None, d. h. alle Funde zählen.
+    """
+    index = {}
+    for file in files:
+        patch = file.get("patch")
+        index[file["filename"]] = changed_lines(patch) if patch is not None else None
+    return index
+
+
+def needs_analysis(file, line_index):
+    """
+    Prüft, ob eine Datei überhaupt analysiert werden muss: entfernte Dateien, Nicht-Python-Dateien
+    und Patches, die nur Zeilen löschen, können keine neuen Funde enthalten.
+    """
+    if file.get("status") == "removed":
+        return False
+    if not file["filename"].endswith(ANALYZED_EXTENSIONS):
+        return False
+    lines = line_index.get(file["filename"])
+    return lines is None or bool(lines)
+
+
+def filter_findings(result, lines):
+    """Behält nur die Funde, die auf geänderten Zeilen liegen (`lines` None = alle)."""
+    if lines is None or result.get("error"):
+        return result
+    return {
+        **result,
+        "quality": [finding for finding in result["quality"] if finding["line"] in lines],
+        "security": [finding for finding in result["security"] if finding["line"] in lines],
+    }
@@ -1,22 +1,25 @@
-import requests
 import subprocess
 import json
 import yaml
 import os 
-from flake8.api import legacy as flake8
-from black import format_file_in_place, FileMode
-from bandit.core import manager as bandit_manager
+import hashlib
+from functools import lru_cache
 from utils.logger import logger
+from utils.analysis_cache import AnalysisCache
+from utils.paths import data_path
+
+# Schwere Abhängigkeiten (flake8, bandit, requests) werden erst bei der ersten Verwendung
+# importiert, damit der Bot beim Start schnell verbunden ist (siehe benchmarks/startup.py).
 
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-config_path = os.path.join(base_dir, "config.yaml")
-# Konfiguration laden
+# Über CODEGUARDIAN_CONFIG lässt sich eine andere Konfiguration verwenden (z. B. für Benchmarks)
+config_path = os.environ.get("CODEGUARDIAN_CONFIG", os.path.join(base_dir, "config.yaml"))
+# Konfiguration laden (einmal beim ersten Zugriff, nicht beim Import)
+@lru_cache(maxsize=None)
 def load_config():
        with open(config_path, "r") as file:
         return yaml.safe_load(file)
 
-config = load_config()
-
 def format_message(title, url, author):
     """Formatiert eine Nachricht für Pull-Request-Benachrichtigungen."""
     return f"**{title}**\nSubmitted by: {author}\nView Pull Request: {url}"
@@ -38,22 +41,31 @@ def handle_api_error(response):
     if response.status_code != 200:
         raise Exception(f"API Error: {response.status_code} - {response.text}")
 
+_analysis_engine = None
+
+def get_analysis_engine():
+    """Gibt die In-Process-Analyse-Engine zurück (wird beim ersten Aufruf erstellt)."""
+    global _analysis_engine
+    if _analysis_engine is None:
+        from utils.analysis import AnalysisEngine
+
+        monitoring = load_config().get("monitoring", {})
+        _analysis_engine = AnalysisEngine(
+            flake8_options=monitoring.get("flake8_config", {}),
+            bandit_options=monitoring.get("bandit_config", {}),
+        )
+    return _analysis_engine
+
 def check_code_quality(file_path):
     """
     Führt eine Code-Qualitätsprüfung mit flake8 durch.
     Gibt eine Liste von Problemen zurück, falls welche gefunden werden.
     """
     try:
-        result = subprocess.run(
-            ["flake8", file_path, "--format=json"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        if result.returncode == 0:
+        issues = get_analysis_engine().check_quality(file_path)
+        if not issues:
             logger.info("Code-Qualitätsprüfung bestanden: %s", file_path)
             return []  # Keine Probleme gefunden
-        issues = json.loads(result.stdout)
         logger.warning("Code-Qualitätsprobleme gefunden in %s: %d", file_path, len(issues))
         return issues
     except Exception as e:
@@ -84,54 +96,123 @@ def detect_security_issues(file_path):
     Gibt eine Liste von Sicherheitslücken zurück, falls welche gefunden werden.
     """
     try:
-        bandit_config = config.get("monitoring", {}).get("bandit_config", {})
-        result = subprocess.run(
-            ["bandit", "-f", "json", "-r", file_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        if result.returncode == 0:
-            return []  # Keine Sicherheitsprobleme gefunden
-        return json.loads(result.stdout)["results"]  # Gibt die Sicherheitsprobleme zurück
+        return get_analysis_engine().check_security(file_path)
     except Exception as e:
         raise Exception(f"Fehler bei der Sicherheitsprüfung: {str(e)}")
 
-def summarize_issues(file_path):
+@lru_cache(maxsize=None)
+def analyzer_key():
     """
-    Führt Code-Qualitäts- und Sicherheitsprüfungen durch und gibt eine Zusammenfassung zurück.
+    Schlüssel für Version und Konfiguration der Analyzer.
+    Ändert sich flake8, bandit oder deren Konfiguration, werden gespeicherte Ergebnisse ungültig.
     """
-    quality_issues = check_code_quality(file_path)
-    security_issues = detect_security_issues(file_path)
+    from importlib import metadata
+    from utils.analysis import ENGINE_VERSION
 
+    monitoring = load_config().get("monitoring", {})
+    parts = {
+        "engine": ENGINE_VERSION,
+        "flake8": metadata.version("flake8"),
+        "bandit": metadata.version("bandit"),
+        "flake8_config": monitoring.get("flake8_config", {}),
+        "bandit_config": monitoring.get("bandit_config", {}),
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:16]
+
+_analysis_cache = None
+
+def get_analysis_cache():
+    """Gibt den persistenten Analyse-Cache zurück (wird beim ersten Aufruf geöffnet)."""
+    global _analysis_cache
+    if _analysis_cache is None:
+        cache_config = load_config().get("monitoring", {}).get("analysis_cache", {})
+        _analysis_cache = AnalysisCache(
+            data_path("analysis_cache.sqlite3"),
+            max_entries=cache_config.get("max_entries", 20000),
+        )
+    return _analysis_cache
+
+def lookup_cached_results(files):
+    """
+    Schlägt Dateien im Analyse-Cache nach. `files` ist eine Liste von (Pfad, Blob-SHA).
+    Gibt ({Pfad: Ergebnis} für Treffer, [(Pfad, Blob-SHA)] für noch zu prüfende Dateien) zurück.
+    """
+    key = analyzer_key()
+    cache = get_analysis_cache()
+    results = {}
+    pending = []
+    for file_path, blob_sha in files:
+        cached = cache.get(blob_sha, key) if blob_sha else None
+        if cached is not None:
+            results[file_path] = cached
+        else:
+            pending.append((file_path, blob_sha))
+    return results, pending
+
+def store_result(blob_sha, result):
+    """Speichert das Analyseergebnis einer Datei im Analyse-Cache."""
+    get_analysis_cache().put(blob_sha, analyzer_key(), result)
+
+def analyze_files(files):
+    """
+    Führt Code-Qualitäts- und Sicherheitsprüfungen für alle Dateien eines Pull Requests in einem
+    Durchlauf aus. `files` ist eine Liste von (Pfad, Blob-SHA); mit Blob-SHA (aus der `/files`-Antwort
+    von GitHub) wird das Ergebnis im Analyse-Cache nachgeschlagen bzw. gespeichert, sodass
+    unveränderte Dateien nicht erneut geprüft werden.
+    Gibt {Pfad: {"quality": [...], "security": [...], "duration": Sekunden}} zurück.
+    """
+    results, pending = lookup_cached_results(files)
+    analyzed = get_analysis_engine().analyze_files([file_path for file_path, _ in pending])
+    for file_path, blob_sha in pending:
+        results[file_path] = analyzed[file_path]
+        if blob_sha:
+            store_result(blob_sha, analyzed[file_path])
+    return results
+
+def analyze_file(file_path, blob_sha=None):
+    """Prüft eine einzelne Datei (siehe analyze_files)."""
+    return analyze_files([(file_path, blob_sha)])[file_path]
+
+def format_summary(result):
+    """Formatiert das Analyseergebnis einer Datei als kurze Zusammenfassung."""
+    if result.get("error"):
+        return f"Analyse fehlgeschlagen: {result['error']}"
     summary = []
-    if quality_issues:
-        summary.append(f"Code-Qualitätsprobleme gefunden: {len(quality_issues)}")
-    if security_issues:
-        summary.append(f"Sicherheitsprobleme gefunden: {len(security_issues)}")
+    if result["quality"]:
+        summary.append(f"Code-Qualitätsprobleme gefunden: {len(result['quality'])}")
+    if result["security"]:
+        summary.append(f"Sicherheitsprobleme gefunden: {len(result['security'])}")
 
     return "\n".join(summary) if summary else "Keine Probleme gefunden."
 
-def comment_on_pull_request(repo, pull_number, comment, headers):
+def summarize_issues(file_path, blob_sha=None):
+    """
+    Führt Code-Qualitäts- und Sicherheitsprüfungen durch und gibt eine Zusammenfassung zurück.
+    """
+    return format_summary(analyze_file(file_path, blob_sha))
+
+async def comment_on_pull_request(client, repo, pull_number, comment):
     """
     Fügt einen Kommentar zu einem Pull Request hinzu.
+    :param client: Gemeinsam genutzter GitHub-Client (siehe github.client).
     :param repo: Name des Repositories (z. B. "user/repo").
     :param pull_number: Nummer des Pull Requests.
     :param comment: Der Kommentartext.
-    :param headers: HTTP-Header mit Authentifizierung.
+    :return: Der angelegte Kommentar (mit `id`) oder None bei einem Fehler.
     """
-    url = f"https://api.github.com/repos/{repo}/issues/{pull_number}/comments"
-    response = requests.post(url, headers=headers, json={"body": comment})
-    if response.status_code == 201:
+    response = await client.post(f"repos/{repo}/issues/{pull_number}/comments", json={"body": comment})
+    if response.status == 201:
         logger.info(f"Kommentar erfolgreich hinzugefügt: {comment}")
-    else:
-        logger.error(f"Fehler beim Hinzufügen des Kommentars: {response.status_code} - {response.text}")
+        return response.data
+    logger.error(f"Fehler beim Hinzufügen des Kommentars: {response.status} - {response.data}")
+    return None
 
 def send_discord_issue_notification(repo, pull, issues_summary):
     """
     Sendet eine Nachricht an Discord, wenn Issues gefunden wurden.
     """
-    import os
+    import requests
+
     webhook_url = os.environ.get("DISCORD_ISSUE_WEBHOOK_URL")
     if not webhook_url:
         return
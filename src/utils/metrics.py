@@ -0,0 +1,189 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from utils.logger import logger
+
+PREFIX = "codeguardian"
+
+
+def _labels_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels, **extra):
+    items = list(labels) + sorted(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+def quantile(samples, q):
+    """Quantil `q` (0..1) einer Stichprobe (nächster Rang); None bei leerer Stichprobe."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class Timer:
+    """Dauerstatistik eines Abschnitts: Anzahl, Summe und die letzten `window` Messungen für Quantile."""
+
+    def __init__(self, window=1024):
+        self.count = 0
+        self.total = 0.0
+        self.last = None
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.samples.append(seconds)
+
+
+class Metrics:
+    """
+    Einfache In-Process-Metriken: Zähler, Messwerte (Gauges) und Zeitmessungen (Spans).
+    Zeitmessungen behalten die letzten Werte, um p50/p95 pro Stufe zu berechnen. Gauges können
+    auch als Funktion registriert werden (z. B. Queue-Längen), die erst beim Auslesen aufgerufen wird.
+    Ausgabe im Prometheus-Textformat über `render_prometheus()`.
+    """
+
+    def __init__(self, window=1024):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._gauge_callbacks = {}
+        self._timers = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _labels_key(labels))] = value
+
+    def register_gauge(self, name, callback, **labels):
+        """Registriert eine Funktion, deren Rückgabewert beim Auslesen als Gauge erscheint."""
+        with self._lock:
+            self._gauge_callbacks[(name, _labels_key(labels))] = callback
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                timer = self._timers[key] = Timer(self.window)
+            timer.observe(seconds)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Misst die Dauer des Blocks (auch in async-Funktionen verwendbar)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def gauges(self):
+        """Alle Gauges inkl. der registrierten Funktionen als {(Name, Labels): Wert}."""
+        with self._lock:
+            values = dict(self._gauges)
+            callbacks = dict(self._gauge_callbacks)
+        for key, callback in callbacks.items():
+            try:
+                values[key] = callback()
+            except Exception as e:
+                logger.error("Fehler beim Auslesen der Metrik %s: %s", key[0], str(e))
+        return values
+
+    def timings(self):
+        """
+        Zusammenfassung aller Zeitmessungen:
+        {(Name, Labels): {"count", "p50", "p95", "last"}} (Sekunden).
+        """
+        with self._lock:
+            timers = {key: (timer.count, list(timer.samples), timer.last) for key, timer in self._timers.items()}
+        return {
+            key: {"count": count, "p50": quantile(samples, 0.5), "p95": quantile(samples, 0.95), "last": last}
+            for key, (count, samples, last) in timers.items()
+        }
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def render_prometheus(self):
+        """Alle Metriken im Prometheus-Textformat (Version 0.0.4)."""
+        lines = []
+        typed = set()
+
+        def declare(metric, kind):
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} {kind}")
+                typed.add(metric)
+
+        for (name, labels), value in sorted(self.counters().items()):
+            declare(f"{PREFIX}_{name}_total", "counter")
+            lines.append(f"{PREFIX}_{name}_total{_format_labels(labels)} {value}")
+        for (name, labels), value in sorted(self.gauges().items()):
+            if value is not None:
+                declare(f"{PREFIX}_{name}", "gauge")
+                lines.append(f"{PREFIX}_{name}{_format_labels(labels)} {value}")
+        with self._lock:
+            timers = {key: (timer.count, timer.total, list(timer.samples)) for key, timer in self._timers.items()}
+        for (name, labels), (count, total, samples) in sorted(timers.items()):
+            metric = f"{PREFIX}_{name}_seconds"
+            declare(metric, "summary")
+            for q in (0.5, 0.95):
+                lines.append(f"{metric}{_format_labels(labels, quantile=q)} {quantile(samples, q):.6f}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = None
+
+
+def get_metrics():
+    """Gibt die prozessweite Metrik-Registry zurück."""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
+
+
+class MetricsServer:
+    """Lokaler HTTP-Endpunkt (Standard: http://127.0.0.1:9108/metrics) im Prometheus-Textformat."""
+
+    def __init__(self, metrics=None, host="127.0.0.1", port=9108, path="/metrics"):
+        self.metrics = metrics or get_metrics()
+        self.host = host
+        self.port = port
+        self.path = path
+        self._runner = None
+
+    async def handle(self, request):
+        from aiohttp import web
+
+        return web.Response(text=self.metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get(self.path, self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info("Metrik-Endpunkt läuft auf http://%s:%s%s", self.host, self.port, self.path)
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,12 @@
+import os
+
+# Projektverzeichnis (zwei Ebenen über src/utils)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Über CODEGUARDIAN_DATA_DIR lässt sich der Datenordner umlenken (z. B. für Benchmarks)
+DATA_DIR = os.environ.get("CODEGUARDIAN_DATA_DIR", os.path.join(BASE_DIR, "data"))
+
+
+def data_path(file_name):
+    """Gibt den Pfad einer Datei im Ordner 'data' zurück und legt den Ordner bei Bedarf an."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, file_name)
@@ -0,0 +1,252 @@
+import json
+import os
+import sqlite3
+import time
+from utils.json_helper import load_json
+from utils.logger import logger
+from utils.paths import data_path
+
+
+class StateStore:
+    """
+    SQLite-basierter Speicher für bereits gemeldete Pull Requests und Issues sowie für
+    weiteren Bot-Zustand (Schlüssel/Wert, z. B. Abruf-Wasserstände, die Warteschlange
+    ausgehender Discord-Nachrichten und – im Shard-Betrieb – die Ergebnisse der Worker für das Gateway
+    sowie an andere Instanzen weitergeleitete Webhook-Ereignisse).
+    Einträge sind über (Art, ID) indiziert. Schreibzugriffe werden gesammelt und mit `commit()`
+    einmal pro Zyklus in einer Transaktion geschrieben, statt nach jeder Meldung die ganze
+    JSON-Datei neu zu schreiben.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._pending = {}
+        self._pending_values = {}
+        self._pending_outbox = []
+        self._pending_results = []
+        # Mehrere Prozesse (Gateway und Worker) können dieselbe Datenbank nutzen
+        self._conn = sqlite3.connect(db_path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sent_items (
+                kind TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (kind, item_id)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS kv (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel_id TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS forwarded_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS routed_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                shard INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS routed_events_shard ON routed_events (shard, id)")
+        self._conn.commit()
+
+    def contains(self, kind, item_id):
+        """Prüft, ob ein Eintrag (z. B. kind="pull_request") bereits gespeichert ist."""
+        if (kind, str(item_id)) in self._pending:
+            return True
+        row = self._conn.execute(
+            "SELECT 1 FROM sent_items WHERE kind = ? AND item_id = ?", (kind, str(item_id))
+        ).fetchone()
+        return row is not None
+
+    def get(self, kind, item_id):
+        if (kind, str(item_id)) in self._pending:
+            return self._pending[(kind, str(item_id))]
+        row = self._conn.execute(
+            "SELECT data FROM sent_items WHERE kind = ? AND item_id = ?", (kind, str(item_id))
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add(self, kind, item_id, data):
+        """Merkt einen Eintrag vor; geschrieben wird er mit dem nächsten `commit()`."""
+        self._pending[(kind, str(item_id))] = data
+
+    def get_value(self, namespace, key, default=None):
+        if (namespace, key) in self._pending_values:
+            return self._pending_values[(namespace, key)]
+        row = self._conn.execute(
+            "SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_value(self, namespace, key, value):
+        """Merkt einen Wert vor; geschrieben wird er mit dem nächsten `commit()`."""
+        self._pending_values[(namespace, key)] = value
+
+    def enqueue_message(self, channel_id, repo, payload):
+        """
+        Merkt eine ausgehende Nachricht vor. Sie wird mit `commit()` zusammen mit den
+        gemeldeten Einträgen geschrieben – nach einem Neustart geht also weder etwas verloren,
+        noch wird ein bereits gemerkter Eintrag erneut eingereiht.
+        """
+        self._pending_outbox.append((str(channel_id), repo, payload))
+
+    def queued_messages(self):
+        """Gibt alle gespeicherten ausgehenden Nachrichten als [(id, channel_id, repo, payload)] zurück."""
+        rows = self._conn.execute("SELECT id, channel_id, repo, payload FROM outbox ORDER BY id").fetchall()
+        return [(row_id, channel_id, repo, json.loads(payload)) for row_id, channel_id, repo, payload in rows]
+
+    def count_queued_messages(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()
+        return count
+
+    def remove_messages(self, ids):
+        """Entfernt zugestellte Nachrichten (sofort, nicht erst mit dem nächsten `commit()`)."""
+        with self._conn:
+            self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(row_id,) for row_id in ids])
+
+    def forward_result(self, payload):
+        """Merkt ein Pipeline-Ergebnis für das Gateway vor (geschrieben mit dem nächsten `commit()`)."""
+        self._pending_results.append(payload)
+
+    def forwarded_results(self, limit=500):
+        """Gibt die ältesten weitergeleiteten Ergebnisse als [(id, payload)] zurück."""
+        rows = self._conn.execute(
+            "SELECT id, payload FROM forwarded_results ORDER BY id LIMIT ?", (limit,)
+        ).fetchall()
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def remove_results(self, ids):
+        with self._conn:
+            self._conn.executemany("DELETE FROM forwarded_results WHERE id = ?", [(row_id,) for row_id in ids])
+
+    def route_event(self, shard, payload):
+        """Legt ein Webhook-Ereignis sofort im Postfach des Shards ab (für dessen Eigentümer)."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO routed_events (shard, payload, created_at) VALUES (?, ?, ?)",
+                (shard, json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+
+    def routed_events(self, shards, limit=100):
+        """Gibt die ältesten Ereignisse der angegebenen Shards als [(id, payload)] zurück."""
+        shards = list(shards)
+        if not shards:
+            return []
+        rows = self._conn.execute(
+            f"SELECT id, payload FROM routed_events WHERE shard IN ({', '.join('?' * len(shards))}) ORDER BY id LIMIT ?",
+            (*shards, limit),
+        ).fetchall()
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def remove_events(self, ids):
+        with self._conn:
+            self._conn.executemany("DELETE FROM routed_events WHERE id = ?", [(row_id,) for row_id in ids])
+
+    def commit(self):
+        """Schreibt alle vorgemerkten Einträge in einer Transaktion."""
+        if not (self._pending or self._pending_values or self._pending_outbox or self._pending_results):
+            return
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sent_items (kind, item_id, data, created_at) VALUES (?, ?, ?, ?)",
+                [
+                    (kind, item_id, json.dumps(data, ensure_ascii=False), now)
+                    for (kind, item_id), data in self._pending.items()
+                ],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO kv (namespace, key, value) VALUES (?, ?, ?)",
+                [
+                    (namespace, key, json.dumps(value, ensure_ascii=False))
+                    for (namespace, key), value in self._pending_values.items()
+                ],
+            )
+            self._conn.executemany(
+                "INSERT INTO outbox (channel_id, repo, payload, created_at) VALUES (?, ?, ?, ?)",
+                [
+                    (channel_id, repo, json.dumps(payload, ensure_ascii=False), now)
+                    for channel_id, repo, payload in self._pending_outbox
+                ],
+            )
+            self._conn.executemany(
+                "INSERT INTO forwarded_results (payload, created_at) VALUES (?, ?)",
+                [(json.dumps(payload, ensure_ascii=False), now) for payload in self._pending_results],
+            )
+        if self._pending:
+            logger.info("Zustand gespeichert: %d neue Einträge", len(self._pending))
+        self._pending.clear()
+        self._pending_values.clear()
+        self._pending_outbox.clear()
+        self._pending_results.clear()
+
+    def count(self, kind):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM sent_items WHERE kind = ?", (kind,)).fetchone()
+        return count
+
+    def migrate_json(self, kind, file_path):
+        """
+        Einmalige Übernahme einer alten JSON-Datei (z. B. sent_pull_requests.json).
+        Die Datei wird danach in `<Name>.migrated` umbenannt. Eine leere Datei gilt als leerer
+        Zustand; eine unlesbare bleibt liegen und verhindert den Start nicht.
+        """
+        if not os.path.exists(file_path):
+            return 0
+        try:
+            entries = load_json(file_path) if os.path.getsize(file_path) else {}
+        except ValueError as e:
+            logger.error("Alte Zustandsdatei %s ist nicht lesbar und wird nicht übernommen: %s", file_path, str(e))
+            return 0
+        for item_id, data in entries.items():
+            self.add(kind, item_id, data)
+        self.commit()
+        os.replace(file_path, file_path + ".migrated")
+        logger.info("%d Einträge aus %s übernommen", len(entries), file_path)
+        return len(entries)
+
+    def close(self):
+        self.commit()
+        self._conn.close()
+
+
+_state_store = None
+
+
+def get_state_store():
+    """Gibt den gemeinsam genutzten Zustandsspeicher (data/state.sqlite3) zurück."""
+    global _state_store
+    if _state_store is None:
+        _state_store = StateStore(data_path("state.sqlite3"))
+    return _state_store
@@ -0,0 +1,163 @@
+import asyncio
+import contextlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils.helpers import get_analysis_engine, load_config, lookup_cached_results, store_result
+from utils.logger import logger
+from utils.metrics import get_metrics
+
+
+class AnalysisError(Exception):
+    """Ein Analyse-Job ist fehlgeschlagen (Timeout oder abgestürzter Worker)."""
+
+
+def _analyze_job(path):
+    """Läuft im Worker-Prozess; die Engine wird pro Prozess einmal erstellt."""
+    return get_analysis_engine().analyze_file(path)
+
+
+class AnalysisPool:
+    """
+    Verteilt Analyse-Jobs auf mehrere Prozesse.
+    Jeder Job hat ein Timeout; hängt ein Job oder stürzt ein Worker ab, wird der Pool ersetzt,
+    sodass eine einzelne problematische Datei nicht den ganzen Zyklus blockiert. Jobs, die nur
+    wegen eines solchen Neustarts abgebrochen wurden, werden einmal wiederholt.
+    """
+
+    def __init__(self, workers=None, timeout=60):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._executor = None
+        self._generation = 0
+        self._slots = asyncio.Semaphore(self.workers)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            self._generation += 1
+        return self._executor, self._generation
+
+    def _recycle(self, generation):
+        """Beendet alle Worker des Pools `generation`; der nächste Job startet einen neuen Pool."""
+        if self._executor is None or generation != self._generation:
+            return
+        executor, self._executor = self._executor, None
+        if hasattr(executor, "terminate_workers"):
+            executor.terminate_workers()
+        else:
+            for process in list(executor._processes.values()):
+                process.kill()
+            executor.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Analyse-Pool wurde neu gestartet")
+
+    async def run(self, fn, *args):
+        """Führt `fn(*args)` in einem Worker aus. Das Timeout zählt erst ab dem Start des Jobs."""
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            for attempt in (1, 2):
+                executor, generation = self._get_executor()
+                future = loop.run_in_executor(executor, fn, *args)
+                try:
+                    return await asyncio.wait_for(future, self.timeout)
+                except asyncio.TimeoutError:
+                    self._recycle(generation)
+                    raise AnalysisError(f"Timeout nach {self.timeout} s")
+                except BrokenProcessPool:
+                    self._recycle(generation)
+                    if attempt == 2:
+                        raise AnalysisError("Worker-Prozess abgestürzt")
+
+    async def analyze(self, paths):
+        """Analysiert Dateien parallel und liefert (Pfad, Ergebnis) in der Reihenfolge der Fertigstellung."""
+
+        async def job(path):
+            try:
+                return path, await self.run(_analyze_job, path)
+            except AnalysisError as e:
+                logger.error("Analyse von %s fehlgeschlagen: %s", path, str(e))
+                return path, {"quality": [], "security": [], "error": str(e)}
+            except Exception as e:
+                # Ein unerwarteter Fehler im Worker betrifft nur diese Datei, nicht den ganzen Pull Request
+                logger.exception("Unerwarteter Fehler bei der Analyse von %s", path)
+                return path, {"quality": [], "security": [], "error": f"{type(e).__name__}: {e}"}
+
+        for finished in asyncio.as_completed([job(path) for path in paths]):
+            yield await finished
+
+    def worker_pids(self):
+        """PIDs der laufenden Worker-Prozesse (z. B. für CPU- und Speichermessungen)."""
+        if self._executor is None:
+            return []
+        return [process.pid for process in list(self._executor._processes.values())]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_analysis_pool = None
+
+
+def get_analysis_pool():
+    """Gibt den gemeinsam genutzten Analyse-Pool zurück (Größe über `monitoring.workers`)."""
+    global _analysis_pool
+    if _analysis_pool is None:
+        monitoring = load_config().get("monitoring", {})
+        _analysis_pool = AnalysisPool(
+            workers=monitoring.get("workers"),
+            timeout=monitoring.get("analysis_timeout", 60),
+        )
+        logger.info("Analyse-Pool mit %d Workern erstellt", _analysis_pool.workers)
+    return _analysis_pool
+
+
+def shutdown_analysis_pool():
+    global _analysis_pool
+    if _analysis_pool is not None:
+        _analysis_pool.shutdown()
+        _analysis_pool = None
+
+
+async def analyze_files_parallel(files, materialize=None):
+    """
+    Wie helpers.analyze_files, verteilt die nicht gecachten Dateien aber auf den Analyse-Pool.
+    `files` ist eine Liste von (Pfad, Blob-SHA). `materialize` ist optional ein asynchroner
+    Kontextmanager, der für eine Liste von Repo-Pfaden {Repo-Pfad: lokaler Pfad} liefert
+    (z. B. RepoMirror.checkout); er wird nur für nicht gecachte Dateien aufgerufen.
+    """
+    results, pending = lookup_cached_results(files)
+    metrics = get_metrics()
+    metrics.inc("analysis_files", len(results), source="cache")
+    if not pending:
+        return results
+    blob_shas = dict(pending)
+    if materialize is None:
+        materialize = _identity_paths
+
+    async with materialize(list(blob_shas)) as local_paths:
+        repo_paths = {local_path: path for path, local_path in local_paths.items()}
+        async for local_path, result in get_analysis_pool().analyze(list(repo_paths)):
+            file_path = repo_paths[local_path]
+            results[file_path] = result
+            metrics.inc("analysis_files", source="error" if "error" in result else "analyzed")
+            if "duration" in result:
+                # Gemessen im Worker-Prozess, hier in die gemeinsame Registry übernommen
+                metrics.observe("analysis_file", result["duration"])
+                for tool, seconds in result.get("timings", {}).items():
+                    metrics.observe("analysis_tool", seconds, tool=tool)
+            if blob_shas[file_path] and "error" not in result:
+                store_result(blob_shas[file_path], result)
+    for file_path in blob_shas:
+        results.setdefault(file_path, {"quality": [], "security": [], "error": "Datei nicht verfügbar"})
+    return results
+
+
+@contextlib.asynccontextmanager
+async def _identity_paths(paths):
+    yield {path: path for path in paths}
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# Die Module liegen unter src/ und werden wie in bot.py ohne Paketpräfix importiert
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+# Zustand und Caches der Tests nie im echten data/-Ordner ablegen
+os.environ.setdefault("CODEGUARDIAN_DATA_DIR", tempfile.mkdtemp(prefix="codeguardian-tests-"))
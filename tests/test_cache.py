@@ -0,0 +1,66 @@
+import asyncio
+import os
+from github.cache import ResponseCache
+from github.client import GitHubClient, GitHubResponse
+from utils.metrics import get_metrics
+
+
+def cache_at(tmp_path, max_entries=5000):
+    return ResponseCache(os.path.join(tmp_path, "http_cache.sqlite3"), max_entries=max_entries)
+
+
+def test_conditional_get_uses_cached_body_and_reports_metrics(tmp_path):
+    cache = cache_at(tmp_path)
+    client = GitHubClient("token", cache=cache)
+    sent_headers = []
+
+    async def request(method, path, headers=None, **kwargs):
+        sent_headers.append(headers)
+        if headers.get("If-None-Match") == '"v1"':
+            return GitHubResponse(304, {}, None)
+        return GitHubResponse(200, {"ETag": '"v1"'}, [{"id": 1}])
+
+    client.request = request
+    before = get_metrics().counters().get(("http_cache", (("result", "hit"),)), 0)
+
+    async def run():
+        first = await client.get("repos/o/r/pulls")
+        second = await client.get("repos/o/r/pulls")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert not first.not_modified
+    assert second.not_modified and second.data == [{"id": 1}]
+    assert sent_headers[1] == {"If-None-Match": '"v1"'}
+
+    cache.flush()
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+    assert get_metrics().counters()[("http_cache", (("result", "hit"),))] == before + 1
+    assert get_metrics().gauges()[("http_cache_entries", ())] == 1
+    assert "codeguardian_http_cache_entries 1" in get_metrics().render_prometheus()
+    cache.close()
+
+
+def test_flush_evicts_least_recently_used_entries(tmp_path):
+    cache = cache_at(tmp_path, max_entries=2)
+    for key in ("a", "b"):
+        cache.store(key, {"ETag": f'"{key}"'}, {"key": key})
+    cache.flush()
+    # "a" wird erneut genutzt, "c" kommt hinzu: "b" fällt heraus
+    cache.get("a")
+    cache.store("c", {"ETag": '"c"'}, {"key": "c"})
+    cache.flush()
+
+    assert cache.get("a") == {"key": "a"}
+    assert cache.get("b") is None
+    assert cache.get("c") == {"key": "c"}
+    cache.close()
+
+
+def test_corrupt_database_is_recreated(tmp_path):
+    path = os.path.join(tmp_path, "http_cache.sqlite3")
+    with open(path, "wb") as file:
+        file.write(b"kein SQLite")
+    cache = ResponseCache(path)
+    assert cache.stats()["entries"] == 0
+    cache.close()
@@ -0,0 +1,49 @@
+import asyncio
+from github.client import GitHubClient, GitHubResponse, next_page_url
+
+
+def test_next_page_url():
+    headers = {
+        "Link": '<https://api.github.com/repos/o/r/pulls?page=2>; rel="next", '
+        '<https://api.github.com/repos/o/r/pulls?page=5>; rel="last"'
+    }
+    assert next_page_url(headers) == "https://api.github.com/repos/o/r/pulls?page=2"
+
+
+def test_next_page_url_with_next_not_first():
+    headers = {
+        "Link": '<https://api.github.com/repos/o/r/pulls?page=1>; rel="prev", '
+        '<https://api.github.com/repos/o/r/pulls?page=3>; rel="next"'
+    }
+    assert next_page_url(headers) == "https://api.github.com/repos/o/r/pulls?page=3"
+
+
+def test_next_page_url_on_last_page_or_without_header():
+    assert next_page_url({"Link": '<https://api.github.com/repos/o/r/pulls?page=1>; rel="first"'}) is None
+    assert next_page_url({}) is None
+
+
+def test_paginate_follows_link_header():
+    client = GitHubClient("token")
+    requested = []
+    pages = {
+        "repos/o/r/pulls": ([1, 2], '<https://api.github.com/repos/o/r/pulls?per_page=100&page=2>; rel="next"'),
+        "https://api.github.com/repos/o/r/pulls?per_page=100&page=2": ([3], ""),
+    }
+
+    async def get(path, params=None, **kwargs):
+        requested.append((path, params))
+        data, link = pages[path]
+        return GitHubResponse(200, {"Link": link}, data)
+
+    client.get = get
+
+    async def run():
+        return [item async for response in client.paginate("repos/o/r/pulls", {"state": "open"}) for item in response.data]
+
+    assert asyncio.run(run()) == [1, 2, 3]
+    # Die nächste URL enthält bereits alle Parameter
+    assert requested == [
+        ("repos/o/r/pulls", {"per_page": 100, "state": "open"}),
+        ("https://api.github.com/repos/o/r/pulls?per_page=100&page=2", None),
+    ]
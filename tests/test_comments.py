@@ -0,0 +1,116 @@
+import asyncio
+import os
+import pytest
+from github.comments import COMMENTS, MARKER, CommentManager
+from utils.state_store import StateStore
+
+
+class FakeResponse:
+    def __init__(self, status, data=None):
+        self.status = status
+        self.data = data
+        self.headers = {}
+        self.not_modified = False
+
+
+class FakeCommentClient:
+    """Simuliert die Kommentar-Endpunkte eines Pull Requests; `patch_status` erzwingt Fehler beim Bearbeiten."""
+
+    def __init__(self, comments=None, patch_status=None, list_status=200):
+        self.comments = dict(comments or {})
+        self.patch_status = patch_status
+        self.list_status = list_status
+        self.posted = []
+        self.patched = []
+
+    async def paginate(self, path, params=None):
+        yield FakeResponse(self.list_status, [{"id": comment_id, "body": body} for comment_id, body in self.comments.items()])
+
+    async def patch(self, path, json):
+        comment_id = int(path.rsplit("/", 1)[1])
+        self.patched.append(comment_id)
+        if self.patch_status is not None:
+            return FakeResponse(self.patch_status)
+        if comment_id not in self.comments:
+            return FakeResponse(404)
+        self.comments[comment_id] = json["body"]
+        return FakeResponse(200, {"id": comment_id})
+
+    async def post(self, path, json):
+        comment_id = 100 + len(self.posted)
+        self.posted.append(comment_id)
+        self.comments[comment_id] = json["body"]
+        return FakeResponse(201, {"id": comment_id})
+
+
+PULL = {"number": 7, "head": {"sha": "abcdef1234"}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StateStore(os.path.join(tmp_path, "state.sqlite3"))
+
+
+def upsert(manager, summary):
+    asyncio.run(manager.upsert("o/r", PULL, summary))
+
+
+def test_creates_comment_once_and_skips_unchanged_result(store):
+    client = FakeCommentClient()
+    manager = CommentManager(client, store=store)
+    upsert(manager, "\n**a.py**:\nE501")
+    upsert(manager, "\n**a.py**:\nE501")
+
+    assert client.posted == [100]
+    assert client.patched == []
+    assert store.get_value(COMMENTS, "o/r#7")["comment_id"] == 100
+    assert (manager.created, manager.skipped) == (1, 1)
+
+
+def test_updates_comment_found_by_marker(store):
+    client = FakeCommentClient(comments={5: f"{MARKER}\nalt"})
+    manager = CommentManager(client, store=store)
+    upsert(manager, "neu")
+
+    assert client.posted == []
+    assert client.patched == [5]
+    assert "neu" in client.comments[5]
+    assert store.get_value(COMMENTS, "o/r#7")["comment_id"] == 5
+
+
+@pytest.mark.parametrize("status", [403, 500, 502])
+def test_transient_patch_error_keeps_state_and_does_not_post(store, status):
+    store.set_value(COMMENTS, "o/r#7", {"hash": "alt", "comment_id": 5, "head_sha": "0000000"})
+    client = FakeCommentClient(comments={5: f"{MARKER}\nalt"}, patch_status=status)
+    manager = CommentManager(client, store=store)
+    upsert(manager, "neu")
+
+    assert client.posted == []
+    assert store.get_value(COMMENTS, "o/r#7") == {"hash": "alt", "comment_id": 5, "head_sha": "0000000"}
+
+    # Im nächsten Zyklus klappt das Bearbeiten
+    client.patch_status = None
+    upsert(manager, "neu")
+    assert client.posted == []
+    assert client.patched == [5, 5]
+    assert store.get_value(COMMENTS, "o/r#7")["comment_id"] == 5
+
+
+def test_deleted_comment_is_recreated(store):
+    store.set_value(COMMENTS, "o/r#7", {"hash": "alt", "comment_id": 5, "head_sha": "0000000"})
+    client = FakeCommentClient()
+    manager = CommentManager(client, store=store)
+    upsert(manager, "neu")
+
+    assert client.patched == [5]
+    assert client.posted == [100]
+    assert store.get_value(COMMENTS, "o/r#7")["comment_id"] == 100
+
+
+def test_failed_lookup_does_not_post(store):
+    client = FakeCommentClient(list_status=502)
+    manager = CommentManager(client, store=store)
+    upsert(manager, "neu")
+
+    assert client.posted == []
+    assert store.get_value(COMMENTS, "o/r#7") is None
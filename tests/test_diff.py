@@ -0,0 +1,87 @@
+from utils.diff import build_line_index, changed_lines, filter_findings, needs_analysis
+
+MULTI_HUNK = "\n".join([
+    "@@ -1,3 +1,4 @@ import os",
+    " import os",
+    "+import sys",
+    " ",
+    " def a():",
+    "@@ -20,4 +21,4 @@ def b():",
+    "     x = 1",
+    "-    y = 2",
+    "+    y = 3",
+    "     return x",
+    "+    # Ende",
+])
+
+NO_NEWLINE = "\n".join([
+    "@@ -1,2 +1,2 @@",
+    " a = 1",
+    "-b = 2",
+    "\\ No newline at end of file",
+    "+b = 3",
+    "\\ No newline at end of file",
+])
+
+DELETION_ONLY = "\n".join([
+    "@@ -5,3 +5,1 @@ def c():",
+    " keep = True",
+    "-old = 1",
+    "-older = 2",
+])
+
+
+def finding(line):
+    return {"line": line, "message": f"Fund in Zeile {line}"}
+
+
+def test_changed_lines_multi_hunk():
+    assert changed_lines(MULTI_HUNK) == {2, 22, 24}
+
+
+def test_changed_lines_ignores_no_newline_marker():
+    assert changed_lines(NO_NEWLINE) == {2}
+
+
+def test_changed_lines_deletion_only_and_missing_patch():
+    assert changed_lines(DELETION_ONLY) == set()
+    assert changed_lines(None) == set()
+    assert changed_lines("") == set()
+
+
+def test_build_line_index_marks_files_without_patch():
+    index = build_line_index([
+        {"filename": "a.py", "patch": MULTI_HUNK},
+        {"filename": "big.py"},
+    ])
+    assert index == {"a.py": {2, 22, 24}, "big.py": None}
+
+
+def test_needs_analysis():
+    index = build_line_index([
+        {"filename": "a.py", "patch": MULTI_HUNK},
+        {"filename": "deleted_lines.py", "patch": DELETION_ONLY},
+        {"filename": "big.py"},
+        {"filename": "README.md", "patch": MULTI_HUNK},
+    ])
+    assert needs_analysis({"filename": "a.py", "status": "modified"}, index)
+    assert not needs_analysis({"filename": "deleted_lines.py", "status": "modified"}, index)
+    # Ohne Patch ist unbekannt, was sich geändert hat: analysieren
+    assert needs_analysis({"filename": "big.py", "status": "modified"}, index)
+    assert not needs_analysis({"filename": "README.md", "status": "modified"}, index)
+    assert not needs_analysis({"filename": "a.py", "status": "removed"}, index)
+
+
+def test_filter_findings_keeps_changed_lines_only():
+    result = {"quality": [finding(2), finding(3)], "security": [finding(24), finding(1)]}
+    filtered = filter_findings(result, {2, 22, 24})
+    assert filtered["quality"] == [finding(2)]
+    assert filtered["security"] == [finding(24)]
+    assert result["quality"] == [finding(2), finding(3)]
+
+
+def test_filter_findings_without_line_index_or_on_error():
+    result = {"quality": [finding(3)], "security": []}
+    assert filter_findings(result, None) is result
+    failed = {"quality": [], "security": [], "error": "Timeout"}
+    assert filter_findings(failed, {1}) is failed
@@ -0,0 +1,133 @@
+import asyncio
+import re
+from github.fetchers import GraphQLFetcher
+
+ALIAS = re.compile(
+    r'(r\d+): repository\(owner: "([^"]+)", name: "([^"]+)"\) \{\s*(nameWithOwner)?.*?(pullRequests|issues)\(states: OPEN, first',
+    re.S,
+)
+
+
+class FakeResponse:
+    def __init__(self, data, status=200):
+        self.status = status
+        self.data = data
+        self.headers = {}
+        self.not_modified = False
+
+
+class FakeGraphQLClient:
+    """Beantwortet die gebündelten Abfragen des GraphQLFetcher; `missing` sind nicht auffindbare Repositories."""
+
+    def __init__(self, pulls=None, missing=(), page_size=50):
+        self.pulls = pulls or {}
+        self.missing = set(missing)
+        self.page_size = page_size
+        self.queries = []
+
+    def url(self, path):
+        return f"https://api.github.com/{path}"
+
+    async def post(self, path, json):
+        self.queries.append(json)
+        data, errors = {}, []
+        for alias, owner, name, metadata, kind in ALIAS.findall(json["query"]):
+            repo = f"{owner}/{name}"
+            if repo in self.missing:
+                data[alias] = None
+                errors.append({"type": "NOT_FOUND", "path": [alias], "message": f"Could not resolve {repo}"})
+                continue
+            nodes = [pull_node(number) for number in self.pulls.get(repo, [])] if kind == "pullRequests" else []
+            start = int(json["variables"][f"c{alias[1:]}"] or 0)
+            end = start + self.page_size
+            data[alias] = {kind: {
+                "totalCount": len(nodes),
+                "pageInfo": {"hasNextPage": end < len(nodes), "endCursor": str(end)},
+                "nodes": nodes[start:end],
+            }}
+            if metadata:
+                data[alias].update(
+                    nameWithOwner=repo, description=None, stargazerCount=1, forkCount=0,
+                    owner={"login": owner, "avatarUrl": "https://example.invalid/a.png"},
+                    openIssues={"totalCount": 2},
+                )
+        return FakeResponse({"data": data, "errors": errors})
+
+
+def pull_node(number):
+    return {
+        "databaseId": 1000 + number, "number": number, "title": f"PR {number}", "url": f"https://github.com/pr/{number}",
+        "isDraft": False, "updatedAt": "2024-01-01T00:00:00Z", "headRefOid": "head", "baseRefOid": "base",
+        "author": {"login": "dev"},
+        "files": {"pageInfo": {"hasNextPage": False, "endCursor": None},
+                  "nodes": [{"path": "a.py", "additions": 1, "deletions": 0, "changeType": "MODIFIED"}]},
+    }
+
+
+def collect(fetcher, repos):
+    async def run():
+        return {snapshot.repo: snapshot async for snapshot in fetcher.fetch(repos)}
+
+    return asyncio.run(run())
+
+
+def test_graphql_fetch_spans_several_batches():
+    repos = [f"org/repo{index}" for index in range(5)]
+    client = FakeGraphQLClient(pulls={"org/repo4": [7]})
+    snapshots = collect(GraphQLFetcher(client, batch_size=2), repos)
+
+    assert list(snapshots) == repos
+    assert len(client.queries) == 3
+    assert all(snapshots[repo].repository["full_name"] == repo for repo in repos)
+    pull, files = snapshots["org/repo4"].pulls[0]
+    assert pull["number"] == 7 and files[0]["filename"] == "a.py"
+    assert snapshots["org/repo4"].repository["open_issues_count"] == 3
+
+
+def test_graphql_fetch_follows_cursors():
+    client = FakeGraphQLClient(pulls={"org/a": list(range(1, 6)), "org/b": [9]}, page_size=2)
+    snapshots = collect(GraphQLFetcher(client, page_size=2), ["org/a", "org/b"])
+
+    assert [pull["number"] for pull, _ in snapshots["org/a"].pulls] == [1, 2, 3, 4, 5]
+    assert [pull["number"] for pull, _ in snapshots["org/b"].pulls] == [9]
+    # Erste Abfrage für beide Repositories, danach nur noch die offenen Seiten von org/a
+    assert len(client.queries) == 3
+    assert snapshots["org/a"].repository["open_issues_count"] == 7
+
+
+def test_graphql_fetch_skips_only_unavailable_repositories():
+    client = FakeGraphQLClient(pulls={"org/a": [1, 2]}, missing=["org/gone"])
+    snapshots = collect(GraphQLFetcher(client), ["org/a", "org/gone", "org/b"])
+
+    assert list(snapshots) == ["org/a", "org/gone", "org/b"]
+    assert [pull["number"] for pull, _ in snapshots["org/a"].pulls] == [1, 2]
+    assert snapshots["org/gone"].pulls == [] and snapshots["org/gone"].repository is None
+    assert snapshots["org/b"].repository["full_name"] == "org/b"
+
+
+def test_graphql_pull_requests_have_the_rest_shape():
+    client = FakeGraphQLClient(pulls={"org/a": [3]})
+    pull, files = collect(GraphQLFetcher(client), ["org/a"])["org/a"].pulls[0]
+
+    assert pull["id"] == 1003 and pull["user"] == {"login": "dev"}
+    assert pull["head"]["sha"] == "head" and pull["base"]["sha"] == "base"
+    assert pull["_links"]["self"]["href"] == "https://api.github.com/repos/org/a/pulls/3"
+    assert files == [{"filename": "a.py", "additions": 1, "deletions": 0, "status": "modified"}]
+
+
+def test_graphql_activity_follows_the_fingerprint():
+    client = FakeGraphQLClient(pulls={"org/a": [1]})
+    fetcher = GraphQLFetcher(client)
+    assert collect(fetcher, ["org/a"])["org/a"].active
+    assert not collect(fetcher, ["org/a"])["org/a"].active
+    client.pulls["org/a"] = [1, 2]
+    assert collect(fetcher, ["org/a"])["org/a"].active
+
+
+def test_graphql_error_without_data_yields_empty_snapshots():
+    class BrokenClient(FakeGraphQLClient):
+        async def post(self, path, json):
+            return FakeResponse({"data": None, "errors": [{"message": "Something went wrong"}]})
+
+    snapshots = collect(GraphQLFetcher(BrokenClient()), ["org/a", "org/b"])
+    assert [snapshot.pulls for snapshot in snapshots.values()] == [[], []]
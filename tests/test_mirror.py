@@ -0,0 +1,93 @@
+import asyncio
+import os
+import subprocess
+import pytest
+import github.mirror as mirror_module
+from github.mirror import RepoMirror, unquote_path
+
+UMLAUT_PATH = "src/prüfung.py"
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """Lokales Repository mit einem Basis- und einem Head-Commit (Änderung, neue Datei mit Umlaut)."""
+    path = tmp_path / "upstream"
+    path.mkdir()
+    git(path, "init", "--quiet", "-b", "main")
+    git(path, "config", "user.email", "test@example.com")
+    git(path, "config", "user.name", "Test")
+    (path / "src").mkdir()
+    (path / "src" / "app.py").write_text("a = 1\nb = 2\n")
+    git(path, "add", ".")
+    git(path, "commit", "--quiet", "-m", "base")
+    base = git(path, "rev-parse", "HEAD")
+    (path / "src" / "app.py").write_text("a = 1\nb = 3\nc = 4\n")
+    (path / UMLAUT_PATH).write_text("x = 1\n", encoding="utf-8")
+    git(path, "add", ".")
+    git(path, "commit", "--quiet", "-m", "head")
+    head = git(path, "rev-parse", "HEAD")
+    return path, base, head
+
+
+@pytest.fixture
+def mirror(upstream, tmp_path):
+    path, _, _ = upstream
+    return RepoMirror("owner/repo", str(path), str(tmp_path / "mirrors"))
+
+
+def test_unquote_path():
+    assert unquote_path("b/src/app.py") == "b/src/app.py"
+    assert unquote_path('"b/src/pr\\303\\274fung.py"') == "b/" + UMLAUT_PATH
+    assert unquote_path('"b/tab\\there.py"') == "b/tab\there.py"
+
+
+def test_describe_files_fills_sha_and_patch_for_non_ascii_paths(upstream, mirror):
+    path, base, head = upstream
+    files = [{"filename": "src/app.py"}, {"filename": UMLAUT_PATH}]
+    described = {file["filename"]: file for file in asyncio.run(mirror.describe_files(base, head, files))}
+
+    for filename in ("src/app.py", UMLAUT_PATH):
+        assert described[filename]["sha"] == git(path, "rev-parse", f"{head}:{filename}")
+    hunk, *lines = described["src/app.py"]["patch"].splitlines()
+    assert hunk.startswith("@@ -2 +2,2 @@")
+    assert lines == ["-b = 2", "+b = 3", "+c = 4"]
+    assert described[UMLAUT_PATH]["patch"].splitlines() == ["@@ -0,0 +1 @@", "+x = 1"]
+
+
+def test_read_files_and_checkout(upstream, mirror):
+    _, base, head = upstream
+
+    async def run():
+        await mirror.ensure_commit(head)
+        contents = await mirror.read_files(base, ["src/app.py", UMLAUT_PATH])
+        async with mirror.checkout(head, ["src/app.py", UMLAUT_PATH, "missing.py"]) as local_paths:
+            checked_out = {path: open(local, encoding="utf-8").read() for path, local in local_paths.items()}
+            directory = os.path.dirname(local_paths["src/app.py"])
+        return contents, checked_out, directory
+
+    contents, checked_out, directory = asyncio.run(run())
+    assert contents == {"src/app.py": b"a = 1\nb = 2\n", UMLAUT_PATH: None}
+    assert checked_out == {"src/app.py": "a = 1\nb = 3\nc = 4\n", UMLAUT_PATH: "x = 1\n"}
+    assert not os.path.exists(directory)
+
+
+def test_token_is_passed_via_environment_not_command_line(monkeypatch, tmp_path):
+    calls = []
+
+    async def fake_exec(*args, env=None, **kwargs):
+        calls.append((args, env))
+        raise RuntimeError("stop")
+
+    monkeypatch.setattr(mirror_module.asyncio, "create_subprocess_exec", fake_exec)
+    mirror = RepoMirror("owner/repo", "https://github.com/owner/repo.git", str(tmp_path), token="secret-token")
+    with pytest.raises(RuntimeError):
+        asyncio.run(mirror._git("fetch"))
+
+    args, env = calls[0]
+    assert not any("secret-token" in arg or "extraheader" in arg for arg in args)
+    assert env["GIT_CONFIG_KEY_0"] == "http.extraheader"
+    assert env["GIT_CONFIG_VALUE_0"].startswith("AUTHORIZATION: basic ")
@@ -0,0 +1,45 @@
+import asyncio
+from Discord.notifier import DiscordSink
+from github.pipeline import PullRequestResult
+
+
+class FakeOutbox:
+    def __init__(self):
+        self.messages = []
+
+    def enqueue(self, channel_id, repo, content=None, embed=None):
+        self.messages.append((repo, content))
+
+
+def pull(pull_id):
+    return {
+        "id": pull_id, "number": pull_id, "title": "Neue Funktion", "html_url": f"https://github.com/o/r/pull/{pull_id}",
+        "user": {"login": "dev"}, "head": {"sha": "abcdef1"},
+    }
+
+
+def deliver(sink, result):
+    asyncio.run(sink.on_pull_request(result))
+
+
+def test_unchanged_result_is_not_posted_again():
+    outbox = FakeOutbox()
+    sink = DiscordSink(outbox=outbox)
+    summary = "\n**a.py**:\nKeine Probleme gefunden."
+
+    deliver(sink, PullRequestResult("o/r", pull(9001), summary))
+    # Gleiches Ergebnis im nächsten Zyklus (GraphQL bzw. PR am REST-Wasserstand)
+    deliver(sink, PullRequestResult("o/r", pull(9001), summary, changed=False))
+    deliver(sink, PullRequestResult("o/r", pull(9001), summary, changed=False))
+    assert len(outbox.messages) == 1
+
+    # Neue Funde nach einem neuen Commit werden gemeldet
+    deliver(sink, PullRequestResult("o/r", pull(9001), "\n**a.py**:\nE501 line too long"))
+    assert len(outbox.messages) == 2
+
+
+def test_unchanged_result_of_unknown_pull_request_is_posted():
+    outbox = FakeOutbox()
+    sink = DiscordSink(outbox=outbox)
+    deliver(sink, PullRequestResult("o/r", pull(9002), "", changed=False))
+    assert len(outbox.messages) == 1
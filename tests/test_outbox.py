@@ -0,0 +1,95 @@
+import asyncio
+import os
+import discord
+from Discord.outbox import MAX_EMBED_CHARS, MAX_EMBEDS, Outbox
+from utils.state_store import StateStore
+
+
+def item(index, description_chars=10, embed=True):
+    payload = {"content": f"Meldung {index}"}
+    if embed:
+        payload["embed"] = {"title": "", "description": "x" * description_chars}
+    return (index, "123", "o/r", payload)
+
+
+def ids(batches):
+    return [[entry[0] for entry in batch] for batch in batches]
+
+
+def test_batches_respect_embed_count():
+    batches = list(Outbox._batches([item(index) for index in range(25)]))
+    assert [len(batch) for batch in batches] == [MAX_EMBEDS, MAX_EMBEDS, 5]
+    assert [entry[0] for batch in batches for entry in batch] == list(range(25))
+
+
+def test_batches_respect_character_limit():
+    items = [item(index, description_chars=2500) for index in range(5)]
+    batches = list(Outbox._batches(items))
+    assert ids(batches) == [[0, 1], [2, 3], [4]]
+    assert all(len(batch) * 2500 <= MAX_EMBED_CHARS for batch in batches)
+
+
+def test_batches_keep_oversized_item_alone():
+    items = [item(0), item(1, description_chars=MAX_EMBED_CHARS + 1), item(2)]
+    assert ids(Outbox._batches(items)) == [[0], [1], [2]]
+
+
+def test_batches_without_embeds_and_empty_input():
+    assert ids(Outbox._batches([item(index, embed=False) for index in range(3)])) == [[0, 1, 2]]
+    assert list(Outbox._batches([])) == []
+
+
+class FakeHTTPResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "Fehler"
+
+
+class FakeChannel:
+    """Nimmt Nachrichten an; Embeds mit dem Titel "kaputt" lehnt Discord mit `status` ab."""
+
+    def __init__(self, status=400):
+        self.status = status
+        self.messages = []
+
+    async def send(self, content=None, embeds=()):
+        if any(embed.title == "kaputt" for embed in embeds):
+            raise discord.HTTPException(FakeHTTPResponse(self.status), "Invalid Form Body")
+        self.messages.append([embed.title for embed in embeds])
+
+
+class FakeBot:
+    def __init__(self, channel):
+        self.channel = channel
+
+    def get_channel(self, channel_id):
+        return self.channel
+
+
+def queue(store, titles):
+    for title in titles:
+        store.enqueue_message("123", "o/r", {"content": None, "embed": {"title": title}})
+    store.commit()
+
+
+def test_flush_drops_only_the_permanently_rejected_message(tmp_path):
+    store = StateStore(os.path.join(tmp_path, "state.sqlite3"))
+    channel = FakeChannel(status=400)
+    outbox = Outbox(FakeBot(channel), store, rate=100, per=1)
+    queue(store, ["a", "kaputt", "b"])
+    asyncio.run(outbox.flush())
+
+    # Gemeinsamer Versuch scheitert, danach einzeln: nur "kaputt" wird verworfen
+    assert channel.messages == [["a"], ["b"]]
+    assert store.queued_messages() == []
+
+
+def test_flush_keeps_messages_on_transient_errors(tmp_path):
+    store = StateStore(os.path.join(tmp_path, "state.sqlite3"))
+    channel = FakeChannel(status=503)
+    outbox = Outbox(FakeBot(channel), store, rate=100, per=1)
+    queue(store, ["a", "kaputt"])
+    asyncio.run(outbox.flush())
+
+    assert channel.messages == []
+    assert [item[3]["embed"]["title"] for item in store.queued_messages()] == ["a", "kaputt"]
@@ -0,0 +1,104 @@
+import asyncio
+import os
+from github.fetchers import RestFetcher
+from github.pipeline import Pipeline, Sink
+from github.repo_cache import RepoCache
+from utils.state_store import StateStore
+
+
+class FakeResponse:
+    def __init__(self, data, not_modified=False, status=200):
+        self.status = status
+        self.data = data
+        self.headers = {}
+        self.not_modified = not_modified
+
+
+class FakeRestClient:
+    """
+    Beantwortet Listen-Abfragen mit festen Seiten. Wie beim ETag-Cache kommt jede Seite ab der
+    zweiten Abfrage als 304 (`not_modified`) mit dem gespeicherten Inhalt zurück.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def url(self, path):
+        return f"https://api.github.com/{path}"
+
+    async def paginate(self, path, params=None):
+        yield FakeResponse(self.pages.get(path, []), not_modified=path in self.requests)
+        self.requests.append(path)
+
+    async def get(self, path, **kwargs):
+        return FakeResponse({}, status=404)
+
+    def flush_cache(self):
+        pass
+
+
+class FlakySink(Sink):
+    """Scheitert bei der ersten Zustellung der Issues in `fail_once`."""
+
+    name = "flaky"
+
+    def __init__(self, fail_once=()):
+        self.fail_once = set(fail_once)
+        self.issues = []
+
+    async def on_issue(self, repo, issue):
+        self.issues.append(issue["id"])
+        if issue["id"] in self.fail_once:
+            self.fail_once.discard(issue["id"])
+            raise RuntimeError("Discord nicht erreichbar")
+
+
+def issue(issue_id, updated_at):
+    return {"id": issue_id, "title": "Fehler", "updated_at": updated_at}
+
+
+def run_cycles(pages, sink, store, cycles):
+    async def run():
+        client = FakeRestClient(pages)
+        pipeline = Pipeline(client, [sink], fetcher=RestFetcher(client, store=store), repo_cache=RepoCache())
+        try:
+            for _ in range(cycles):
+                await pipeline.run_cycle(["o/r"])
+        finally:
+            await pipeline.stop()
+
+    asyncio.run(run())
+
+
+def test_watermark_advances_after_successful_cycle(tmp_path):
+    store = StateStore(os.path.join(tmp_path, "state.sqlite3"))
+    sink = FlakySink()
+    pages = {"repos/o/r/issues": [issue(1, "2024-01-02T00:00:00Z"), issue(2, "2024-01-01T00:00:00Z")]}
+    run_cycles(pages, sink, store, cycles=2)
+
+    # Zweiter Zyklus: 304 auf der ersten Seite, nichts wird erneut verarbeitet
+    assert sink.issues == [1, 2]
+    assert store.get_value("watermark", "o/r:issues") == "2024-01-02T00:00:00Z"
+    assert not store.get_value("watermark_retry", "o/r:issues", False)
+
+
+def test_failed_item_is_retried_although_the_page_is_unchanged(tmp_path):
+    store = StateStore(os.path.join(tmp_path, "state.sqlite3"))
+    sink = FlakySink(fail_once=[1])
+    pages = {"repos/o/r/issues": [issue(1, "2024-01-02T00:00:00Z")]}
+    run_cycles(pages, sink, store, cycles=3)
+
+    # Zyklus 1 scheitert, Zyklus 2 holt das Issue trotz 304 erneut, Zyklus 3 hat nichts mehr zu tun
+    assert sink.issues == [1, 1]
+    assert store.get_value("watermark", "o/r:issues") == "2024-01-02T00:00:00Z"
+    assert not store.get_value("watermark_retry", "o/r:issues", False)
+
+
+def test_watermark_stays_before_the_oldest_failed_item(tmp_path):
+    store = StateStore(os.path.join(tmp_path, "state.sqlite3"))
+    sink = FlakySink(fail_once=[2])
+    pages = {"repos/o/r/issues": [issue(1, "2024-01-03T00:00:00Z"), issue(2, "2024-01-02T00:00:00Z")]}
+    run_cycles(pages, sink, store, cycles=1)
+    assert store.get_value("watermark", "o/r:issues") == "2024-01-02T00:00:00Z"
+    assert store.get_value("watermark_retry", "o/r:issues", False)
@@ -0,0 +1,74 @@
+import time
+from github.rate_limit import RateLimitBudget
+from github.scheduler import RepoScheduler
+
+NOW = 1_000_000.0
+
+
+def budget(remaining, limit=5000, reset_in=600, reserve=100):
+    rate_limit = RateLimitBudget(reserve=reserve)
+    rate_limit.update({
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Reset": str(time.time() + reset_in),
+    })
+    return rate_limit
+
+
+def test_new_repositories_are_due_immediately():
+    scheduler = RepoScheduler(["o/a", "o/b"])
+    assert sorted(scheduler.due(now=time.time() + 1)) == ["o/a", "o/b"]
+
+
+def test_interval_halves_on_activity_and_doubles_when_quiet():
+    scheduler = RepoScheduler(["o/r"], base_interval=300, min_interval=60, max_interval=3600)
+    for expected in (150, 75, 60, 60):
+        scheduler.record("o/r", True, now=NOW)
+        assert scheduler.interval("o/r") == expected
+    for expected in (120, 240, 480, 960, 1920, 3600, 3600):
+        scheduler.record("o/r", False, now=NOW)
+        assert scheduler.interval("o/r") == expected
+    assert scheduler.due(now=NOW + 3599) == []
+    assert scheduler.due(now=NOW + 3600) == ["o/r"]
+
+
+def test_interval_lookup_ignores_case_and_unknown_repositories():
+    scheduler = RepoScheduler(["Org/Repo"], base_interval=300)
+    assert scheduler.interval("org/repo") == 300
+    assert scheduler.interval("org/other") is None
+
+
+def test_pinned_intervals_stay_fixed():
+    # Webhook-Modus: Polling nur als Abgleich alle `reconcile_interval` Sekunden
+    scheduler = RepoScheduler(["o/r"], base_interval=7200, min_interval=7200, max_interval=7200)
+    scheduler.record("o/r", True, now=NOW)
+    assert scheduler.interval("o/r") == 7200
+    scheduler.record("o/r", False, now=NOW)
+    scheduler.record("o/r", False, now=NOW)
+    assert scheduler.interval("o/r") == 7200
+
+
+def test_budget_pressure_stretches_intervals():
+    assert budget(remaining=4000).pressure() == 1.0
+    assert budget(remaining=1250).pressure() == 2.0
+    assert budget(remaining=10).pressure() == 4.0
+    # Nach dem Reset gilt das volle Budget wieder
+    assert budget(remaining=10, reset_in=-1).pressure() == 1.0
+
+    scheduler = RepoScheduler(["o/r"], budget=budget(remaining=1250), base_interval=300)
+    scheduler.record("o/r", False, now=NOW)
+    assert scheduler.interval("o/r") == 1200
+    assert scheduler.due(now=NOW + 1199) == []
+
+
+def test_budget_delays_requests_below_reserve_until_reset():
+    assert budget(remaining=500).delay() == 0
+    delay = budget(remaining=50, reset_in=600).delay()
+    assert 590 < delay <= 600
+
+
+def test_budget_honours_retry_after():
+    rate_limit = RateLimitBudget()
+    assert rate_limit.block(403, {"Retry-After": "30"})
+    assert 29 < rate_limit.delay() <= 30
+    assert not RateLimitBudget().block(403, {})
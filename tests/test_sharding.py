@@ -0,0 +1,82 @@
+import os
+from github.sharding import HashRing, ShardCoordinator, ShardLeases, WebhookRouter
+from utils.state_store import StateStore
+
+REPOS = [f"org/repo{index}" for index in range(200)]
+
+
+def leases(tmp_path, worker_id, shard_count=16, ttl=60):
+    return ShardLeases(os.path.join(tmp_path, "state.sqlite3"), worker_id, shard_count, ttl=ttl)
+
+
+def test_hash_ring_is_stable_and_uses_all_shards():
+    ring = HashRing(16)
+    assignment = {repo: ring.shard_for(repo) for repo in REPOS}
+    assert assignment == {repo: HashRing(16).shard_for(repo) for repo in REPOS}
+    assert set(assignment.values()) == set(range(16))
+
+
+def test_hash_ring_moves_few_repositories_when_shards_are_added():
+    before, after = HashRing(16), HashRing(17)
+    moved = [repo for repo in REPOS if before.shard_for(repo) != after.shard_for(repo)]
+    # Idealerweise wechselt nur etwa 1/17 der Repositories; deutlich weniger als bei Modulo-Verteilung
+    assert len(moved) < len(REPOS) / 4
+    assert all(after.shard_for(repo) == 16 for repo in moved)
+
+
+def test_single_instance_takes_all_shards(tmp_path):
+    assert leases(tmp_path, "a").heartbeat(now=1000) == set(range(16))
+
+
+def test_new_instance_gets_fair_share_after_rebalancing(tmp_path):
+    a, b = leases(tmp_path, "a"), leases(tmp_path, "b")
+    a.heartbeat(now=1000)
+    # b ist angemeldet, aber alle Shards sind noch vergeben
+    assert b.heartbeat(now=1001) == set()
+    # a gibt den Überschuss frei, b übernimmt ihn
+    owned_a = a.heartbeat(now=1002)
+    owned_b = b.heartbeat(now=1003)
+    assert len(owned_a) == len(owned_b) == 8
+    assert owned_a.isdisjoint(owned_b)
+    assert a.heartbeat(now=1004) == owned_a
+    assert b.heartbeat(now=1005) == owned_b
+
+
+def test_expired_leases_are_taken_over(tmp_path):
+    a, b = leases(tmp_path, "a", ttl=60), leases(tmp_path, "b", ttl=60)
+    a.heartbeat(now=1000)
+    b.heartbeat(now=1001)
+    a.heartbeat(now=1002)
+    b.heartbeat(now=1003)
+    # b meldet sich nicht mehr; nach Ablauf der TTL übernimmt a alle Shards
+    assert a.heartbeat(now=1030) != set(range(16))
+    assert a.heartbeat(now=1070) == set(range(16))
+
+
+def test_release_frees_shards_immediately(tmp_path):
+    a, b = leases(tmp_path, "a"), leases(tmp_path, "b")
+    a.heartbeat(now=1000)
+    b.heartbeat(now=1001)
+    a.release()
+    assert a.owned == set()
+    assert b.heartbeat(now=1002) == set(range(16))
+
+
+def test_webhook_router_forwards_only_foreign_repositories(tmp_path):
+    store = StateStore(os.path.join(tmp_path, "state.sqlite3"))
+    own = leases(tmp_path, "a", shard_count=2)
+    other = leases(tmp_path, "b", shard_count=2)
+    own.heartbeat(now=1000)
+    other.heartbeat(now=1001)
+    own.heartbeat(now=1002)
+    other.heartbeat(now=1003)
+    coordinator = ShardCoordinator(REPOS, own)
+    router = WebhookRouter(coordinator, store)
+    mine = next(repo for repo in REPOS if coordinator.owns(repo))
+    foreign = next(repo for repo in REPOS if not coordinator.owns(repo))
+
+    assert router.forward("pull_request", mine, {}) is False
+    assert router.forward("pull_request", foreign, {"action": "opened"}) is True
+    assert store.routed_events(own.owned) == []
+    events = store.routed_events(other.owned)
+    assert [event["repo"] for _, event in events] == [foreign]
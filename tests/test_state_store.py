@@ -0,0 +1,69 @@
+import json
+import os
+from utils.state_store import StateStore
+
+LEGACY = {
+    "123456": {"title": "Fix Bug #42", "author": "user123", "url": "https://github.com/user/repo/pull/42"},
+    "654321": {"title": "Umlaute: Größe", "author": "jörg", "url": "https://github.com/user/repo/pull/43"},
+}
+
+
+def write_legacy(tmp_path, content):
+    path = os.path.join(tmp_path, "sent_pull_requests.json")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+    return path
+
+
+def test_migrate_json_imports_entries_once(tmp_path):
+    path = write_legacy(tmp_path, json.dumps(LEGACY))
+    db_path = os.path.join(tmp_path, "state.sqlite3")
+    store = StateStore(db_path)
+
+    assert store.migrate_json("pull_request", path) == 2
+    assert not os.path.exists(path) and os.path.exists(path + ".migrated")
+    assert store.migrate_json("pull_request", path) == 0
+    store.close()
+
+    # Nach einem Neustart sind die Einträge dauerhaft vorhanden
+    store = StateStore(db_path)
+    assert store.count("pull_request") == 2
+    assert store.contains("pull_request", 123456)
+    assert store.get("pull_request", "654321") == LEGACY["654321"]
+    assert not store.contains("issue", "123456")
+
+
+def test_migrate_json_is_idempotent_after_an_interrupted_run(tmp_path):
+    path = write_legacy(tmp_path, json.dumps(LEGACY))
+    store = StateStore(os.path.join(tmp_path, "state.sqlite3"))
+    store.add("pull_request", "123456", LEGACY["123456"])
+    store.commit()
+
+    assert store.migrate_json("pull_request", path) == 2
+    assert store.count("pull_request") == 2
+
+
+def test_migrate_json_handles_empty_and_broken_files(tmp_path):
+    store = StateStore(os.path.join(tmp_path, "state.sqlite3"))
+    empty = write_legacy(tmp_path, "")
+    assert store.migrate_json("pull_request", empty) == 0
+    assert os.path.exists(empty + ".migrated")
+
+    broken = write_legacy(tmp_path, "{kaputt")
+    assert store.migrate_json("pull_request", broken) == 0
+    assert os.path.exists(broken)
+    assert store.count("pull_request") == 0
+
+
+def test_writes_are_buffered_until_commit(tmp_path):
+    db_path = os.path.join(tmp_path, "state.sqlite3")
+    store = StateStore(db_path)
+    store.add("issue", "1", {"title": "Fehler"})
+    store.set_value("watermark", "o/r:issues", "2024-01-01T00:00:00Z")
+    assert store.contains("issue", "1")
+
+    other = StateStore(db_path)
+    assert not other.contains("issue", "1")
+    store.commit()
+    assert other.contains("issue", "1")
+    assert other.get_value("watermark", "o/r:issues") == "2024-01-01T00:00:00Z"
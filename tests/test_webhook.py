@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import socket
+import aiohttp
+from github.webhook import WebhookServer, replay, sign_payload
+
+SECRET = "geheim"
+
+
+class FakePipeline:
+    def __init__(self):
+        self.pulls = []
+        self.issues = []
+        self.drained = 0
+
+    def start(self):
+        pass
+
+    async def submit_pull(self, repo, pull, files=None):
+        self.pulls.append((repo, pull["number"]))
+
+    async def submit_issue(self, repo, issue):
+        self.issues.append((repo, issue["number"]))
+
+    async def drain(self):
+        self.drained += 1
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def write_payload(tmp_path, name, payload):
+    path = os.path.join(tmp_path, name)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(payload, file)
+    return path
+
+
+def serve(pipeline, scenario):
+    """Startet einen WebhookServer auf einem freien Port und führt `scenario(url)` dagegen aus."""
+
+    async def run():
+        port = free_port()
+        server = WebhookServer(pipeline, SECRET, ["o/r"], host="127.0.0.1", port=port)
+        await server.start()
+        try:
+            result = await scenario(f"http://127.0.0.1:{port}/webhook")
+            # Hintergrundverarbeitung abwarten
+            await asyncio.gather(*server.dispatcher._tasks)
+            return result
+        finally:
+            await server.stop()
+
+    return asyncio.run(run())
+
+
+def test_replayed_payloads_reach_the_pipeline(tmp_path):
+    pull_path = write_payload(tmp_path, "pull.json", {
+        "action": "synchronize", "repository": {"full_name": "o/r"}, "pull_request": {"number": 5},
+    })
+    issue_path = write_payload(tmp_path, "issue.json", {
+        "action": "opened", "repository": {"full_name": "o/r"}, "issue": {"number": 8},
+    })
+    pipeline = FakePipeline()
+
+    async def scenario(url):
+        return [
+            await replay(url, SECRET, "pull_request", pull_path),
+            await replay(url, SECRET, "issues", issue_path),
+        ]
+
+    assert serve(pipeline, scenario) == [(202, "accepted"), (202, "accepted")]
+    assert pipeline.pulls == [("o/r", 5)]
+    assert pipeline.issues == [("o/r", 8)]
+    assert pipeline.drained == 2
+
+
+def test_wrong_signature_is_rejected(tmp_path):
+    path = write_payload(tmp_path, "pull.json", {
+        "action": "opened", "repository": {"full_name": "o/r"}, "pull_request": {"number": 5},
+    })
+    pipeline = FakePipeline()
+
+    async def scenario(url):
+        return await replay(url, "falsch", "pull_request", path)
+
+    assert serve(pipeline, scenario) == (401, "invalid signature")
+    assert pipeline.pulls == []
+
+
+def test_ping_unknown_repositories_and_invalid_json(tmp_path):
+    pipeline = FakePipeline()
+    ping = write_payload(tmp_path, "ping.json", {"zen": "Keep it logically awesome."})
+    other = write_payload(tmp_path, "other.json", {
+        "action": "opened", "repository": {"full_name": "fremd/repo"}, "pull_request": {"number": 1},
+    })
+
+    async def scenario(url):
+        body = b"{kaputt"
+        headers = {"X-GitHub-Event": "push", "X-Hub-Signature-256": sign_payload(SECRET, body)}
+        async with aiohttp.ClientSession() as session:
+            async with session.post(url, data=body, headers=headers) as response:
+                invalid = (response.status, await response.text())
+        return [
+            await replay(url, SECRET, "ping", ping),
+            await replay(url, SECRET, "pull_request", other),
+            invalid,
+        ]
+
+    assert serve(pipeline, scenario) == [(200, "pong"), (202, "ignored"), (400, "invalid payload")]
+    assert pipeline.pulls == []